@@ -1,14 +1,14 @@
 from django.contrib import admin
 from django.utils.html import format_html
 
-from .models import Brand, Category, Media, Product
+from .models import Brand, Category, Media, Product, SearchQueryStat
 
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     """Enhanced Category admin with tree structure support."""
 
-    list_display = ['name', 'slug', 'parent', 'level_display', 'product_count', 'created_at']
+    list_display = ['name', 'slug', 'parent', 'level_display', 'product_count_display', 'created_at']
     list_filter = ['parent', 'created_at']
     search_fields = ['name', 'slug', 'description']
     prepopulated_fields = {'slug': ('name',)}
@@ -29,18 +29,21 @@ class CategoryAdmin(admin.ModelAdmin):
         return format_html('{} {}', indent, obj.level)
     level_display.short_description = 'Level'
 
-    def product_count(self, obj):
-        """Show number of products in category."""
-        count = obj.products.count()
-        return format_html('<b>{}</b>', count) if count > 0 else '0'
-    product_count.short_description = 'Products'
+    def product_count_display(self, obj):
+        """Show the stored number of active products in the category and its subtree."""
+        count = obj.subtree_product_count
+        if count == 0:
+            return '0'
+        return format_html('<b>{}</b> ({} direct)', count, obj.product_count)
+    product_count_display.short_description = 'Products'
+    product_count_display.admin_order_field = 'subtree_product_count'
 
 
 @admin.register(Brand)
 class BrandAdmin(admin.ModelAdmin):
     """Enhanced Brand admin with product tracking."""
 
-    list_display = ['name', 'slug', 'product_count', 'logo_preview', 'created_at']
+    list_display = ['name', 'slug', 'product_count_display', 'logo_preview', 'created_at']
     list_filter = ['created_at']
     search_fields = ['name', 'slug', 'description']
     prepopulated_fields = {'slug': ('name',)}
@@ -58,11 +61,12 @@ class BrandAdmin(admin.ModelAdmin):
         }),
     )
 
-    def product_count(self, obj):
-        """Show number of products for brand."""
-        count = obj.products.count()
+    def product_count_display(self, obj):
+        """Show the stored number of active products for brand."""
+        count = obj.product_count
         return format_html('<b>{}</b>', count) if count > 0 else '0'
-    product_count.short_description = 'Products'
+    product_count_display.short_description = 'Products'
+    product_count_display.admin_order_field = 'product_count'
 
     def logo_preview(self, obj):
         """Show logo preview if available."""
@@ -180,3 +184,21 @@ class ProductAdmin(admin.ModelAdmin):
         updated = queryset.update(is_active=False)
         self.message_user(request, f'{updated} products marked as inactive.')
     make_inactive.short_description = 'Mark selected products as inactive'
+
+
+@admin.register(SearchQueryStat)
+class SearchQueryStatAdmin(admin.ModelAdmin):
+    """Read-only view of search result cache usage per query."""
+
+    list_display = ['query', 'hits', 'misses', 'hit_rate_display', 'last_searched_at']
+    search_fields = ['query']
+    ordering = ['-hits']
+    readonly_fields = ['query', 'hits', 'misses', 'last_searched_at']
+
+    def hit_rate_display(self, obj):
+        """Display the share of searches served from the cache."""
+        return f'{obj.hit_rate:.0%}'
+    hit_rate_display.short_description = 'Hit rate'
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,55 @@
+"""
+Catalog cache versioning.
+
+Cached catalog reads embed a version counter in their keys. Writes bump the
+counter once their transaction commits, which orphans every older entry at
+once; the orphans simply expire with their TTL.
+
+The catalog version changes on any product, brand or category write; the
+category tree and brand versions only when a row of that model changes.
+"""
+
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_CACHE_KEY = 'catalog:version'
+CATEGORY_TREE_VERSION_CACHE_KEY = 'catalog:category_tree:version'
+BRAND_VERSION_CACHE_KEY = 'catalog:brands:version'
+
+
+def _initial_version():
+    # Start from the clock so an evicted counter does not come back to a
+    # version whose entries may still be cached
+    return int(time.time() * 1000)
+
+
+def get_version(key):
+    """Return the current value of the version counter stored under ``key``."""
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def incr_version(key):
+    """Increment the version counter under ``key`` now and return its new value."""
+    cache.add(key, _initial_version(), timeout=None)
+    return cache.incr(key)
+
+
+def bump_version(key):
+    """Increment the version counter under ``key`` once the current transaction commits."""
+    transaction.on_commit(lambda: incr_version(key))
+
+
+def catalog_version():
+    """Return the current catalog version."""
+    return get_version(VERSION_CACHE_KEY)
+
+
+def bump_catalog_version():
+    """Invalidate catalog-version-keyed caches once the current transaction commits."""
+    bump_version(VERSION_CACHE_KEY)
@@ -0,0 +1,305 @@
+"""
+JSON responses rendered by the database.
+
+``DatabaseJSONSerializer`` compiles a bound ``ModelSerializer`` (after its
+sparse fieldset trimming) into one SQL expression that builds each row's
+representation with ``json_build_object()`` (``json_object()`` on SQLite).
+Nested serializers become objects over the joined columns, to-many
+relations ``json_agg()`` subqueries, and JSON columns such as
+``attributes`` pass through without being decoded. Rows come back as JSON
+text, which ``render_json()`` embeds in the response as is.
+
+The expressions reproduce the DRF fields' output: decimals as strings with
+the field's decimal places and datetimes as UTC ISO 8601 with a ``Z``
+suffix. Serializers with fields that have no SQL equivalent are not
+compiled; ``DatabaseJSONSerializer.compile()`` returns None for them.
+"""
+
+from itertools import chain
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections, router
+from django.db.models import (
+    BooleanField,
+    Case,
+    CharField,
+    DecimalField,
+    F,
+    Func,
+    JSONField,
+    OuterRef,
+    Subquery,
+    TextField,
+    Value,
+    When,
+    Window,
+)
+from django.db.models.functions import Cast, RowNumber
+from rest_framework import ISO_8601, relations, serializers
+from rest_framework import fields as drf_fields
+from rest_framework.settings import api_settings
+
+from apps.core.renderers import ORJSONRenderer
+
+from .rows import UnsupportedFieldError
+
+SUPPORTED_VENDORS = ('postgresql', 'sqlite')
+# DRF fields rendered from the bare column value
+PLAIN_FIELDS = (
+    drf_fields.CharField,
+    drf_fields.SlugField,
+    drf_fields.URLField,
+    drf_fields.EmailField,
+    drf_fields.IntegerField,
+)
+JSON_ALIAS = 'row_json'
+
+
+class JSONObject(Func):
+    """``{key: value, ...}`` of ``(key, expression)`` pairs, keys in order."""
+
+    function = 'JSON_BUILD_OBJECT'
+    output_field = JSONField()
+
+    def __init__(self, pairs):
+        super().__init__(*chain.from_iterable((Value(key), expression) for key, expression in pairs))
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, function='JSON_OBJECT', **extra_context)
+
+
+class JSONValue(Func):
+    """A JSON value nested in another (SQLite needs ``json()`` to keep it JSON)."""
+
+    arity = 1
+    template = '%(expressions)s'
+    output_field = JSONField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, template='JSON(%(expressions)s)', **extra_context)
+
+
+class JSONBoolean(Func):
+    """A boolean as ``true``/``false`` (SQLite stores ``1``/``0``)."""
+
+    arity = 1
+    template = '%(expressions)s'
+    output_field = BooleanField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        template = "JSON(CASE %(expressions)s WHEN 1 THEN 'true' WHEN 0 THEN 'false' END)"
+        return super().as_sql(compiler, connection, template=template, **extra_context)
+
+
+class ISODateTime(Func):
+    """
+    A datetime like ``DateTimeField`` renders it in UTC: ISO 8601, with
+    microseconds only when there are any, and a ``Z`` suffix.
+    """
+
+    arity = 1
+    template = (
+        "REGEXP_REPLACE(TO_CHAR(%(expressions)s AT TIME ZONE 'UTC', 'YYYY-MM-DD\"T\"HH24:MI:SS.US'), "
+        r"'\.0+$', '') || 'Z'"
+    )
+    output_field = CharField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # Stored as UTC text in the same format, with a space separator
+        template = "REPLACE(%(expressions)s, ' ', 'T') || 'Z'"
+        return super().as_sql(compiler, connection, template=template, **extra_context)
+
+
+class DecimalText(Func):
+    """A decimal column as text with its own number of decimal places."""
+
+    arity = 1
+    template = 'CAST(%(expressions)s AS TEXT)'
+    output_field = CharField()
+
+    def __init__(self, expression, decimal_places):
+        super().__init__(expression)
+        self.decimal_places = decimal_places
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # Decimals are stored as REAL or INTEGER, which drop trailing zeros
+        text = Func(
+            Value(f'%.{self.decimal_places}f'), *self.get_source_expressions(),
+            function='PRINTF', output_field=CharField(),
+        )
+        return text.as_sql(compiler, connection, **extra_context)
+
+
+class JSONArraySubquery(Subquery):
+    """
+    ``[value, ...]`` of the ``value`` column of ``queryset``, ordered by its
+    ``position`` column; ``[]`` without rows.
+    """
+
+    template = (
+        '(SELECT COALESCE(JSON_AGG("value" ORDER BY "position"), \'[]\') FROM (%(subquery)s) "items")'
+    )
+    output_field = JSONField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # No ORDER BY in aggregates before SQLite 3.44; rows are aggregated
+        # in the order of the ordered subquery
+        template = '(SELECT JSON_GROUP_ARRAY(JSON("value")) FROM (%(subquery)s) "items")'
+        return super().as_sql(compiler, connection, template=template, **extra_context)
+
+
+class JSONFragment:
+    """JSON text rendered by the database, embedded verbatim by ``render_json()``."""
+
+    __slots__ = ('text',)
+
+    def __init__(self, text):
+        self.text = text
+
+
+def render_json(data):
+    """
+    Render ``data`` like ``ORJSONRenderer``, inserting the
+    ``JSONFragment`` values of a top-level dict (or ``data`` itself) as is.
+    """
+    if isinstance(data, JSONFragment):
+        return data.text.encode()
+    renderer = ORJSONRenderer()
+
+    def render(value):
+        if isinstance(value, JSONFragment):
+            return value.text.encode()
+        # Rendered as a list item so that None becomes null rather than b''
+        return renderer.render([value])[1:-1]
+
+    return b'{' + b','.join(render(key) + b':' + render(value) for key, value in data.items()) + b'}'
+
+
+def _datetime(field, expression):
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or str(field_timezone) != 'UTC':
+        raise UnsupportedFieldError(field.field_name)
+    return ISODateTime(expression)
+
+
+def _decimal(field, model_field, expression):
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if (
+        not isinstance(model_field, DecimalField)
+        or field.decimal_places != model_field.decimal_places
+        or field.normalize_output
+        or field.localize
+        or not coerce_to_string
+    ):
+        raise UnsupportedFieldError(field.field_name)
+    return DecimalText(expression, field.decimal_places)
+
+
+class DatabaseJSONSerializer:
+    """Render rows like a compiled ``ModelSerializer``, in SQL."""
+
+    def __init__(self, expression):
+        self.expression = expression
+
+    @classmethod
+    def compile(cls, serializer):
+        """
+        Compile the bound ``serializer`` (a ``ModelSerializer``, or the
+        ``ListSerializer`` wrapping one); None if it cannot be compiled for
+        the database its model is read from.
+        """
+        if isinstance(serializer, serializers.ListSerializer):
+            serializer = serializer.child
+        model = serializer.Meta.model
+        if connections[router.db_for_read(model)].vendor not in SUPPORTED_VENDORS:
+            return None
+        try:
+            expression = cls._object(serializer, '')
+        except UnsupportedFieldError:
+            return None
+        return cls(Cast(expression, TextField()))
+
+    @classmethod
+    def _object(cls, serializer, prefix):
+        model = serializer.Meta.model
+        computed = getattr(serializer, 'sql_computed_fields', {})
+        pairs = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if name in computed:
+                if prefix:
+                    raise UnsupportedFieldError(name)
+                expression = computed[name]
+                if isinstance(expression.output_field, BooleanField):
+                    expression = JSONBoolean(expression)
+                pairs.append((name, expression))
+            elif isinstance(field, (serializers.ListSerializer, relations.ManyRelatedField)):
+                if prefix:
+                    raise UnsupportedFieldError(name)
+                pairs.append((name, cls._many(model, field)))
+            elif isinstance(field, serializers.ModelSerializer):
+                source = f'{prefix}{field.source}'
+                nested = cls._object(field, f'{source}__')
+                pairs.append((name, JSONValue(Case(When(**{f'{source}__isnull': False}, then=nested)))))
+            else:
+                pairs.append((name, cls._scalar(model, field, prefix)))
+        return JSONObject(pairs)
+
+    @classmethod
+    def _scalar(cls, model, field, prefix):
+        if '.' in field.source or field.source == '*':
+            raise UnsupportedFieldError(field.field_name)
+        try:
+            model_field = model._meta.pk if field.source == 'pk' else model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            raise UnsupportedFieldError(field.field_name)
+        expression = F(f'{prefix}{field.source}')
+        field_type = type(field)
+        if field_type in PLAIN_FIELDS:
+            return expression
+        if field_type is relations.PrimaryKeyRelatedField and field.pk_field is None:
+            return expression
+        if field_type is drf_fields.BooleanField:
+            return JSONBoolean(expression)
+        if field_type is drf_fields.DateTimeField:
+            return _datetime(field, expression)
+        if field_type is drf_fields.DecimalField:
+            return _decimal(field, model_field, expression)
+        if field_type is drf_fields.JSONField and not field.binary:
+            return JSONValue(expression)
+        raise UnsupportedFieldError(field.field_name)
+
+    @classmethod
+    def _many(cls, model, field):
+        """A one-to-many relation as a subquery aggregating the related rows."""
+        try:
+            relation = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            raise UnsupportedFieldError(field.field_name)
+        if not relation.one_to_many:
+            raise UnsupportedFieldError(field.field_name)
+        related_model = relation.related_model
+        if isinstance(field, serializers.ListSerializer):
+            value = cls._object(field.child, '')
+        else:
+            value = F('pk')
+        # The order in which the prefetch behind the serializer lists them
+        ordering = related_model._meta.ordering or ['pk']
+        items = (
+            related_model._default_manager.filter(**{relation.field.name: OuterRef('pk')})
+            .order_by(*ordering)
+            .values(value=value, position=Window(RowNumber(), order_by=ordering))
+        )
+        return JSONArraySubquery(items)
+
+    def values(self, queryset):
+        """``queryset`` as the JSON text of each row."""
+        return queryset.prefetch_related(None).annotate(**{JSON_ALIAS: self.expression}).values_list(
+            JSON_ALIAS, flat=True
+        )
+
+    def render(self, rows):
+        """The JSON array of the rows' JSON text, as a ``JSONFragment``."""
+        return JSONFragment(f'[{",".join(rows)}]')
@@ -0,0 +1,170 @@
+"""
+Faceted navigation counts for product listings.
+
+Each facet is counted with one grouped query over the products matching every
+applied filter except the facet's own (attribute facets over the indexed
+``ProductAttribute`` rows of those products), so selecting a value does not hide its
+alternatives (multi-select). Results are cached per normalized filter set
+under the catalog version.
+"""
+
+import hashlib
+from decimal import Decimal
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, F, Max, Min, Value
+from django.db.models.functions import Floor, Least
+
+from .caching import catalog_version
+from .models import ProductAttribute
+
+FACET_CACHE_KEY = 'catalog:facets:{version}:{digest}'
+ATTRIBUTE_KEYS_CACHE_KEY = 'catalog:attribute_keys:{version}'
+ATTRIBUTE_FACETS = ('color', 'material', 'size')
+# Query parameters filtering on any attribute are named ``attr.<key>``
+ATTRIBUTE_PARAM_PREFIX = 'attr.'
+PRICE_PARAMS = ('min_price', 'max_price')
+# Query parameters that do not change the matching products
+IGNORED_PARAMS = frozenset({
+    'page', 'page_size', 'cursor', 'ordering', 'format', 'highlight', 'highlight_words',
+    'fields', 'expand', 'layout',
+})
+CENTS = Decimal('0.01')
+
+
+def facet_cache_key(query_params, language):
+    params = [('language', language)] + sorted(
+        (name, value)
+        for name, values in query_params.lists()
+        if name not in IGNORED_PARAMS
+        for value in values
+    )
+    digest = hashlib.sha256(urlencode(params).encode()).hexdigest()
+    return FACET_CACHE_KEY.format(version=catalog_version(), digest=digest)
+
+
+def _group_counts(queryset, *fields):
+    return (
+        queryset.order_by()
+        .values(*fields)
+        .annotate(count=Count('pk'))
+        .order_by('-count', *fields)
+    )
+
+
+def brand_facet(queryset):
+    rows = _group_counts(queryset.filter(brand__isnull=False), 'brand_id', 'brand__slug', 'brand__name')
+    return [
+        {'id': row['brand_id'], 'slug': row['brand__slug'], 'name': row['brand__name'], 'count': row['count']}
+        for row in rows
+    ]
+
+
+def category_facet(queryset):
+    rows = _group_counts(
+        queryset.filter(category__isnull=False), 'category_id', 'category__slug', 'category__name'
+    )
+    return [
+        {
+            'id': row['category_id'],
+            'slug': row['category__slug'],
+            'name': row['category__name'],
+            'count': row['count'],
+        }
+        for row in rows
+    ]
+
+
+def attribute_facet(queryset, key):
+    """
+    Count the products of ``queryset`` per canonical value of attribute ``key``,
+    grouping the indexed ``ProductAttribute`` rows the ``attr.<key>`` filters
+    match, so each value selects exactly the products it counts.
+    """
+    rows = _group_counts(
+        ProductAttribute.objects.using(queryset.db).filter(
+            key=key, product__in=queryset.order_by().values('pk')
+        ),
+        'value',
+    )
+    return [{'value': row['value'], 'count': row['count']} for row in rows]
+
+
+def price_histogram(queryset, buckets):
+    """Split the price range into ``buckets`` equal-width buckets and count each."""
+    bounds = queryset.order_by().aggregate(low=Min('price'), high=Max('price'))
+    low, high = bounds['low'], bounds['high']
+    if low is None:
+        return {'min': None, 'max': None, 'buckets': []}
+
+    if low == high:
+        buckets = 1
+    width = (high - low) / buckets or Decimal(1)
+    decimal = DecimalField(max_digits=20, decimal_places=10)
+    bucket = Least(
+        Floor((F('price') - Value(low, output_field=decimal)) / Value(width, output_field=decimal)),
+        Value(buckets - 1, output_field=decimal),
+        output_field=decimal,
+    )
+    counts = {
+        int(row['bucket']): row['count']
+        for row in queryset.order_by().annotate(bucket=bucket).values('bucket').annotate(count=Count('pk'))
+    }
+    # Prices are rendered as strings, like the serializers' DecimalFields
+    edges = [str((low + width * i).quantize(CENTS)) for i in range(buckets)] + [str(high.quantize(CENTS))]
+    return {
+        'min': edges[0],
+        'max': edges[-1],
+        'buckets': [
+            {'min': edges[i], 'max': edges[i + 1], 'count': counts.get(i, 0)}
+            for i in range(buckets)
+        ],
+    }
+
+
+def compute_facets(products_for):
+    """
+    Compute every facet.
+
+    ``products_for(excluded)`` returns the products matching the request's
+    filters except the parameters named in ``excluded``.
+    """
+    return {
+        'brands': brand_facet(products_for(('brand',))),
+        'categories': category_facet(products_for(('category',))),
+        'attributes': {
+            key: attribute_facet(products_for((key, f'{ATTRIBUTE_PARAM_PREFIX}{key}')), key)
+            for key in ATTRIBUTE_FACETS
+        },
+        'price': price_histogram(products_for(PRICE_PARAMS), settings.CATALOG_FACET_PRICE_BUCKETS),
+    }
+
+
+def get_facets(query_params, language, products_for):
+    """Return the cached facets for the request parameters, computing them on a miss."""
+    key = facet_cache_key(query_params, language)
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(products_for)
+        cache.set(key, facets, timeout=settings.CATALOG_FACETS_CACHE_TTL)
+    return facets
+
+
+def get_attribute_keys():
+    """
+    Return the filterable attribute keys with the number of active products
+    and distinct values of each, cached until the catalog changes.
+    """
+    key = ATTRIBUTE_KEYS_CACHE_KEY.format(version=catalog_version())
+    keys = cache.get(key)
+    if keys is None:
+        keys = list(
+            ProductAttribute.objects.filter(product__is_active=True)
+            .values('key')
+            .annotate(products=Count('product_id', distinct=True), values=Count('value', distinct=True))
+            .order_by('key')
+        )
+        cache.set(key, keys, timeout=settings.CATALOG_FACETS_CACHE_TTL)
+    return keys
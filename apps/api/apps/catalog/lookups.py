@@ -0,0 +1,27 @@
+"""Custom lookups used by catalog search."""
+
+from django.db.models import CharField
+from django.db.models.lookups import IContains
+
+
+@CharField.register_lookup
+class TrigramContains(IContains):
+    """
+    Case-insensitive substring match that can use a ``gin_trgm_ops`` index.
+
+    Django compiles ``icontains`` to ``UPPER(col::text) LIKE UPPER(...)`` on
+    PostgreSQL, which a trigram index on the bare column cannot serve. This
+    lookup emits ``col ILIKE '%...%'`` instead and behaves like ``icontains``
+    on other databases.
+    """
+
+    lookup_name = 'trigram_contains'
+
+    def get_rhs_op(self, connection, rhs):
+        return f'ILIKE {rhs}'
+
+    def as_sql(self, compiler, connection):
+        return IContains(self.lhs, self.rhs).as_sql(compiler, connection)
+
+    def as_postgresql(self, compiler, connection):
+        return super().as_sql(compiler, connection)
@@ -0,0 +1,58 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.catalog.models import Product, SearchTerm
+from apps.catalog.search import BACKENDS, MATCH_MODES, get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Compare search backends on the same queries (latency and top-N overlap)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('queries', nargs='*', help='Queries to run (default: most common catalog words)')
+        parser.add_argument('--backends', nargs='+', choices=sorted(BACKENDS), default=sorted(BACKENDS))
+        parser.add_argument('--match', choices=MATCH_MODES, default=MATCH_MODES[0])
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--top', type=int, default=20, help='Results fetched per query (one page)')
+
+    def handle(self, *args, **options):
+        backends = options['backends']
+        if 'postgres' in backends and connection.vendor != 'postgresql':
+            self.stderr.write('Skipping postgres backend: database is not PostgreSQL')
+            backends = [name for name in backends if name != 'postgres']
+        if not backends:
+            raise CommandError('No backend can run against this database')
+
+        queries = options['queries'] or list(
+            SearchTerm.objects.order_by('-ndoc').values_list('word', flat=True)[:10]
+        )
+        if not queries:
+            raise CommandError('No queries given and the search vocabulary is empty')
+
+        for name in backends:
+            get_search_backend(name).rebuild()
+
+        top = options['top']
+        results = {}
+        for query in queries:
+            for name in backends:
+                backend = get_search_backend(name)
+                timings = []
+                for _ in range(options['repeat']):
+                    start = time.perf_counter()
+                    queryset = backend.search(Product.objects.filter(is_active=True), query, options['match'])
+                    ids = list(queryset.values_list('pk', flat=True)[:top])
+                    timings.append((time.perf_counter() - start) * 1000)
+                results[query, name] = ids
+                p95 = sorted(timings)[int(len(timings) * 0.95) - 1] if len(timings) > 1 else timings[0]
+                self.stdout.write(
+                    f'{query!r:<24} {name:<9} median {statistics.median(timings):7.2f}ms  '
+                    f'p95 {p95:7.2f}ms  results {len(ids)}'
+                )
+            if len(backends) == 2:
+                first, second = (set(results[query, name]) for name in backends)
+                overlap = len(first & second) / max(len(first | second), 1)
+                self.stdout.write(f'{"":<24} top-{top} overlap {overlap:.0%}')
@@ -0,0 +1,53 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from apps.catalog.models import Product
+from apps.catalog.rows import RowSerializer
+from apps.catalog.serializers import ProductListSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compare ProductListSerializer with the compiled row serializer per page size (latency and output)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-sizes', nargs='+', type=int, default=[20, 50, 100])
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        queryset = (
+            Product.objects.filter(is_active=True)
+            .select_related('brand', 'category', 'primary_image')
+            .order_by('-created_at')
+        )
+        renderer = JSONRenderer()
+        row_serializer = RowSerializer.compile(ProductListSerializer(many=True))
+
+        for page_size in options['page_sizes']:
+            page = queryset[:page_size]
+
+            def serialize_instances():
+                return ProductListSerializer(list(page), many=True).data
+
+            def serialize_rows():
+                return row_serializer.to_representation(row_serializer.values(page))
+
+            expected, actual = (renderer.render(serialize()) for serialize in (serialize_instances, serialize_rows))
+            if actual != expected:
+                raise CommandError(f'Row serializer output differs from ProductListSerializer at page size {page_size}')
+
+            medians = {}
+            for name, serialize in (('serializer', serialize_instances), ('rows', serialize_rows)):
+                timings = []
+                for _ in range(options['repeat']):
+                    start = time.perf_counter()
+                    serialize()
+                    timings.append((time.perf_counter() - start) * 1000)
+                medians[name] = statistics.median(timings)
+            self.stdout.write(
+                f'page size {page_size:>4}  serializer {medians["serializer"]:7.2f}ms  '
+                f'rows {medians["rows"]:7.2f}ms  speedup {medians["serializer"] / medians["rows"]:4.1f}x  '
+                f'({len(expected)} bytes, identical)'
+            )
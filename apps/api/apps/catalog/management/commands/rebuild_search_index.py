@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from apps.catalog.search import BACKENDS, get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the catalog search index (a no-op for the postgres backend)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backend', choices=sorted(BACKENDS), help='Backend to rebuild (default: configured backend)'
+        )
+
+    def handle(self, *args, **options):
+        backend = get_search_backend(options['backend'])
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {backend.name} search index'))
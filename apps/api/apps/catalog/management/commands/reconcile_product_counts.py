@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.catalog.models import Brand, Category
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored active-product counts of categories and brands, fixing any drift'
+
+    def handle(self, *args, **options):
+        categories = Category.objects.recount_products()
+        brands = Brand.objects.recount_products()
+        self.stdout.write(self.style.SUCCESS(
+            f'Corrected {categories} category and {brands} brand product counts'
+        ))
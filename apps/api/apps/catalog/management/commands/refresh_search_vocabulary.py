@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.catalog.spelling import refresh_vocabulary
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the "did you mean" search vocabulary from active products (run periodically, e.g. hourly)'
+
+    def handle(self, *args, **kwargs):
+        count = refresh_vocabulary()
+        self.stdout.write(self.style.SUCCESS(f'Search vocabulary refreshed: {count} words'))
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import F
+from django.test import RequestFactory
+
+from apps.catalog.models import SearchQueryStat
+from apps.catalog.views import ProductViewSet
+
+
+class Command(BaseCommand):
+    help = 'Cache the ranked results of the most frequent search queries (run after deploys or catalog imports)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=50, help='Number of queries to warm (default: 50)')
+
+    def handle(self, *args, **options):
+        queries = SearchQueryStat.objects.order_by(
+            (F('hits') + F('misses')).desc()
+        ).values_list('query', flat=True)[:options['top']]
+
+        factory = RequestFactory()
+        warmed = 0
+        for query in queries:
+            # Results are cached per search language
+            for language, _name in settings.LANGUAGES:
+                # Run the same filter pipeline as GET /products/?q=<query>
+                view = ProductViewSet(action_map={'get': 'list'}, args=(), kwargs={}, format_kwarg=None)
+                request = factory.get('/api/v1/products/', {'q': query}, HTTP_ACCEPT_LANGUAGE=language)
+                view.request = view.initialize_request(request)
+                _product_ids, hit = view.get_search_result_ids()
+                warmed += not hit
+        self.stdout.write(self.style.SUCCESS(
+            f'Warmed {warmed} of {len(queries) * len(settings.LANGUAGES)} search query and language pairs'
+        ))
@@ -0,0 +1,35 @@
+# Generated migration backfilling the stored product search vector
+
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import F, OuterRef, Subquery
+
+
+def populate_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Brand = apps.get_model('catalog', 'Brand')
+    Category = apps.get_model('catalog', 'Category')
+    Product = apps.get_model('catalog', 'Product')
+    brand_name = Subquery(Brand.objects.filter(pk=OuterRef('brand_id')).values('name')[:1])
+    category_name = Subquery(Category.objects.filter(pk=OuterRef('category_id')).values('name')[:1])
+    Product.objects.using(schema_editor.connection.alias).update(
+        search_vector=(
+            SearchVector(F('title'), weight='A')
+            + SearchVector(F('sku'), weight='A')
+            + SearchVector(brand_name, weight='B')
+            + SearchVector(category_name, weight='B')
+            + SearchVector(F('description'), weight='C')
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0002_add_search_vector_and_enhanced_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_search_vector, migrations.RunPython.noop),
+    ]
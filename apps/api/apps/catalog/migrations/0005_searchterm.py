@@ -0,0 +1,31 @@
+# Generated migration adding the search vocabulary table
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0004_product_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('word', models.CharField(max_length=100, unique=True)),
+                ('ndoc', models.IntegerField(default=0)),
+                ('nentry', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'search_terms',
+                'indexes': [
+                    django.contrib.postgres.indexes.GinIndex(
+                        fields=['word'], name='search_term_word_trgm_idx', opclasses=['gin_trgm_ops']
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated migration adding per-query search cache statistics
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_searchterm'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchQueryStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query', models.CharField(max_length=255, unique=True)),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('misses', models.PositiveIntegerField(default=0)),
+                ('last_searched_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'search_query_stats',
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated migration adding the Turkish search vector and rebuilding both
+# vectors with explicit text search configurations
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import F, OuterRef, Subquery
+
+SEARCH_VECTOR_CONFIGS = {
+    'search_vector': 'english',
+    'search_vector_tr': 'turkish',
+}
+
+
+def populate_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Brand = apps.get_model('catalog', 'Brand')
+    Category = apps.get_model('catalog', 'Category')
+    Product = apps.get_model('catalog', 'Product')
+    brand_name = Subquery(Brand.objects.filter(pk=OuterRef('brand_id')).values('name')[:1])
+    category_name = Subquery(Category.objects.filter(pk=OuterRef('category_id')).values('name')[:1])
+    Product.objects.using(schema_editor.connection.alias).update(**{
+        field: (
+            SearchVector(F('title'), weight='A', config=config)
+            + SearchVector(F('sku'), weight='A', config=config)
+            + SearchVector(brand_name, weight='B', config=config)
+            + SearchVector(category_name, weight='B', config=config)
+            + SearchVector(F('description'), weight='C', config=config)
+        )
+        for field, config in SEARCH_VECTOR_CONFIGS.items()
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0006_searchquerystat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector_tr',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=['search_vector_tr'], name='product_search_tr_gin_idx'
+            ),
+        ),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated migration adding the materialized path and depth of categories
+
+from django.db import migrations, models
+
+
+def populate_paths(apps, schema_editor):
+    Category = apps.get_model('catalog', 'Category')
+    categories = Category.objects.using(schema_editor.connection.alias)
+    children = {}
+    for pk, parent_id in categories.values_list('pk', 'parent_id'):
+        children.setdefault(parent_id, []).append(pk)
+
+    paths = {}
+    pending = [(pk, '', 0) for pk in children.get(None, [])]
+    while pending:
+        pk, parent_path, depth = pending.pop()
+        paths[pk] = (f'{parent_path}{pk}/', depth)
+        pending.extend((child, paths[pk][0], depth + 1) for child in children.get(pk, []))
+
+    rows = list(categories.filter(pk__in=paths))
+    for row in rows:
+        row.path, row.depth = paths[row.pk]
+    categories.bulk_update(rows, ['path', 'depth'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0007_product_search_vector_tr'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['path'], name='category_path_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunPython(populate_paths, migrations.RunPython.noop),
+    ]
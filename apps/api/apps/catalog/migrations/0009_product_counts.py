@@ -0,0 +1,55 @@
+# Generated migration adding the denormalized active-product counts of categories and brands
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_counts(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    Product = apps.get_model('catalog', 'Product')
+    Category = apps.get_model('catalog', 'Category')
+    Brand = apps.get_model('catalog', 'Brand')
+
+    def active_count(**lookups):
+        count = (
+            Product.objects.using(alias)
+            .filter(is_active=True, **lookups)
+            .order_by()
+            .values('is_active')
+            .annotate(count=Count('pk'))
+            .values('count')
+        )
+        return Coalesce(Subquery(count), 0)
+
+    Category.objects.using(alias).update(
+        product_count=active_count(category_id=OuterRef('pk')),
+        subtree_product_count=active_count(category__path__startswith=OuterRef('path')),
+    )
+    Brand.objects.using(alias).update(product_count=active_count(brand_id=OuterRef('pk')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0008_category_materialized_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='product_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='subtree_product_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='brand',
+            name='product_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_counts, migrations.RunPython.noop),
+    ]
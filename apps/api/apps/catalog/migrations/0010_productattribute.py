@@ -0,0 +1,59 @@
+# Generated migration adding the indexed attribute lookup rows of products
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def canonical(value):
+    if isinstance(value, bool):
+        value = 'true' if value else 'false'
+    return ' '.join(str(value).split()).casefold()[:255]
+
+
+def populate_attributes(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    Product = apps.get_model('catalog', 'Product')
+    ProductAttribute = apps.get_model('catalog', 'ProductAttribute')
+
+    rows = set()
+    for pk, attributes in Product.objects.using(alias).values_list('pk', 'attributes').iterator():
+        if not isinstance(attributes, dict):
+            continue
+        for key, value in attributes.items():
+            for item in value if isinstance(value, list) else [value]:
+                if item is not None and not isinstance(item, (dict, list)):
+                    rows.add((pk, canonical(key)[:100], canonical(item)))
+    ProductAttribute.objects.using(alias).bulk_create(
+        [ProductAttribute(product_id=pk, key=key, value=value) for pk, key, value in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0009_product_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductAttribute',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100)),
+                ('value', models.CharField(max_length=255)),
+                ('product', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='attribute_values',
+                    to='catalog.product',
+                )),
+            ],
+            options={
+                'db_table': 'product_attributes',
+                'constraints': [
+                    models.UniqueConstraint(fields=('key', 'value', 'product'), name='product_attribute_unique'),
+                ],
+            },
+        ),
+        migrations.RunPython(populate_attributes, migrations.RunPython.noop),
+    ]
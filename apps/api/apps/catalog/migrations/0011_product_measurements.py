@@ -0,0 +1,77 @@
+# Generated migration adding the normalized weight and dimension columns of products
+
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations, models
+
+WEIGHT_UNITS = {
+    'mg': Decimal('0.001'),
+    'g': Decimal('1'),
+    'kg': Decimal('1000'),
+    'oz': Decimal('28.349523125'),
+    'lb': Decimal('453.59237'),
+}
+LENGTH_UNITS = {
+    'mm': Decimal('0.1'),
+    'cm': Decimal('1'),
+    'm': Decimal('100'),
+    'in': Decimal('2.54'),
+    'ft': Decimal('30.48'),
+}
+
+
+def measurement(value, factor):
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        return None
+    try:
+        value = Decimal(str(value))
+    except InvalidOperation:
+        return None
+    if not value.is_finite() or value < 0:
+        return None
+    return (value * factor).quantize(Decimal('0.001'))
+
+
+def populate_measurements(apps, schema_editor):
+    Product = apps.get_model('catalog', 'Product')
+    products = Product.objects.using(schema_editor.connection.alias)
+    updated = []
+    for product in products.only('pk', 'attributes').iterator():
+        attributes = product.attributes if isinstance(product.attributes, dict) else {}
+        weight, dims = attributes.get('weight'), attributes.get('dimensions')
+        changed = False
+        if isinstance(weight, dict):
+            factor = WEIGHT_UNITS.get(str(weight.get('unit')).lower())
+            if factor is not None:
+                product.weight_grams = measurement(weight.get('value'), factor)
+                changed = True
+        if isinstance(dims, dict):
+            factor = LENGTH_UNITS.get(str(dims.get('unit')).lower())
+            if factor is not None:
+                for name in ('width', 'height', 'depth'):
+                    setattr(product, f'{name}_cm', measurement(dims.get(name), factor))
+                changed = True
+        if changed:
+            updated.append(product)
+    products.bulk_update(updated, ['weight_grams', 'width_cm', 'height_cm', 'depth_cm'], batch_size=1000)
+
+
+def measurement_field():
+    return models.DecimalField(
+        blank=True, db_index=True, decimal_places=3, editable=False, max_digits=12, null=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0010_productattribute'),
+    ]
+
+    operations = [
+        migrations.AddField(model_name='product', name='weight_grams', field=measurement_field()),
+        migrations.AddField(model_name='product', name='width_cm', field=measurement_field()),
+        migrations.AddField(model_name='product', name='height_cm', field=measurement_field()),
+        migrations.AddField(model_name='product', name='depth_cm', field=measurement_field()),
+        migrations.RunPython(populate_measurements, migrations.RunPython.noop),
+    ]
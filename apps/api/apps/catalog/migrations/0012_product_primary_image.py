@@ -0,0 +1,41 @@
+# Generated migration adding the denormalized primary image of products
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def populate_primary_images(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    Product = apps.get_model('catalog', 'Product')
+    Media = apps.get_model('catalog', 'Media')
+    first_media = (
+        Media.objects.using(alias)
+        .filter(product=OuterRef('pk'))
+        .order_by('order', 'created_at', 'pk')
+        .values('pk')[:1]
+    )
+    Product.objects.using(alias).update(primary_image=Subquery(first_media))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0011_product_measurements'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='primary_image',
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name='+',
+                to='catalog.media',
+            ),
+        ),
+        migrations.RunPython(populate_primary_images, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,73 @@
+from decimal import Decimal, InvalidOperation
+
 from django.contrib.postgres.indexes import GinIndex
-from django.contrib.postgres.search import SearchVectorField
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import connections, models, router, transaction
+from django.db.models import Case, Count, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce, Concat, Substr
+from django.dispatch import Signal
 
 from apps.core.models import TimeStampedModel
 
+# Product fields whose values feed the stored search vector
+SEARCH_VECTOR_SOURCE_FIELDS = frozenset(
+    {'title', 'description', 'sku', 'brand', 'brand_id', 'category', 'category_id'}
+)
+SEARCH_VECTOR_BATCH_SIZE = 1000
+# Product fields that feed the search backend's index
+SEARCH_INDEX_SOURCE_FIELDS = SEARCH_VECTOR_SOURCE_FIELDS | {'is_active'}
+# Product fields that feed the autocomplete index
+SUGGEST_SOURCE_FIELDS = frozenset(
+    {'title', 'slug', 'stock', 'is_active', 'brand', 'brand_id', 'category', 'category_id'}
+)
+# Stored search vector per catalog language: language code -> (field, text search config)
+SEARCH_VECTOR_CONFIGS = {
+    'en': ('search_vector', 'english'),
+    'tr': ('search_vector_tr', 'turkish'),
+}
+DEFAULT_SEARCH_LANGUAGE = 'en'
+
+# Product fields that decide which active-product counts a product adds to
+PRODUCT_COUNT_SOURCE_FIELDS = frozenset({'is_active', 'category', 'category_id', 'brand', 'brand_id'})
+# Denormalized counts, written only by SQL updates
+PRODUCT_COUNT_FIELDS = frozenset({'product_count', 'subtree_product_count'})
+# Category tree columns, written only by the SQL updates of Category._update_path()
+TREE_FIELDS = frozenset({'path', 'depth'})
+
+# Product fields whose values feed the ProductAttribute lookup rows
+ATTRIBUTE_SOURCE_FIELDS = frozenset({'attributes'})
+ATTRIBUTE_BATCH_SIZE = 1000
+
+# Units accepted in the ``weight`` and ``dimensions`` attributes, as multiples
+# of the canonical unit stored in the measurement columns (grams, centimetres)
+WEIGHT_UNITS = {
+    'mg': Decimal('0.001'),
+    'g': Decimal('1'),
+    'kg': Decimal('1000'),
+    'oz': Decimal('28.349523125'),
+    'lb': Decimal('453.59237'),
+}
+LENGTH_UNITS = {
+    'mm': Decimal('0.1'),
+    'cm': Decimal('1'),
+    'm': Decimal('100'),
+    'in': Decimal('2.54'),
+    'ft': Decimal('30.48'),
+}
+MEASUREMENT_PRECISION = Decimal('0.001')
+# Product columns derived from the attributes, in canonical units
+MEASUREMENT_FIELDS = ('weight_grams', 'width_cm', 'height_cm', 'depth_cm')
+
+# Sent after ProductQuerySet writes that bypass post_save: update(), bulk_create()
+# and bulk_update(). Arguments:
+# - ``pks``: the written products, or None when unknown (update() of fields
+#   the search and autocomplete indexes and attributes do not read).
+# - ``fields``: the set of written fields, or None for inserts.
+# - ``groups``: the set of ``(category_id, brand_id)`` pairs whose product
+#   counts may have changed, or None when no count source field was written.
+product_bulk_write = Signal()
+
 
 def validate_product_attributes(value):
     """
@@ -31,6 +94,11 @@ def validate_product_attributes(value):
         for field in required_dim_fields:
             if field not in dims:
                 raise ValidationError(f"Dimensions missing required field: {field}")
+        if str(dims["unit"]).lower() not in LENGTH_UNITS:
+            raise ValidationError(f"Dimensions unit must be one of: {', '.join(LENGTH_UNITS)}")
+        for field in ["width", "height", "depth"]:
+            if _measurement(dims[field], 1) is None:
+                raise ValidationError(f"Dimensions {field} must be a non-negative number")
 
     # Validate weight if present
     if "weight" in value:
@@ -39,6 +107,119 @@ def validate_product_attributes(value):
             raise ValidationError("Weight must be an object")
         if "value" not in weight or "unit" not in weight:
             raise ValidationError("Weight must have 'value' and 'unit' fields")
+        if str(weight["unit"]).lower() not in WEIGHT_UNITS:
+            raise ValidationError(f"Weight unit must be one of: {', '.join(WEIGHT_UNITS)}")
+        if _measurement(weight["value"], 1) is None:
+            raise ValidationError("Weight value must be a non-negative number")
+
+
+def _measurement(value, factor):
+    """``value`` converted with ``factor``, or None if it is not a non-negative number."""
+    if isinstance(value, bool) or not isinstance(value, (int, float, str, Decimal)):
+        return None
+    try:
+        value = Decimal(str(value))
+    except InvalidOperation:
+        return None
+    if not value.is_finite() or value < 0:
+        return None
+    return (value * factor).quantize(MEASUREMENT_PRECISION)
+
+
+def normalized_measurements(attributes):
+    """
+    Return the ``MEASUREMENT_FIELDS`` values of a product's attributes:
+    weight in grams and dimensions in centimetres, None where missing or invalid.
+    """
+    measurements = dict.fromkeys(MEASUREMENT_FIELDS)
+    if not isinstance(attributes, dict):
+        return measurements
+    weight = attributes.get('weight')
+    if isinstance(weight, dict):
+        factor = WEIGHT_UNITS.get(str(weight.get('unit')).lower())
+        if factor is not None:
+            measurements['weight_grams'] = _measurement(weight.get('value'), factor)
+    dims = attributes.get('dimensions')
+    if isinstance(dims, dict):
+        factor = LENGTH_UNITS.get(str(dims.get('unit')).lower())
+        if factor is not None:
+            for name in ('width', 'height', 'depth'):
+                measurements[f'{name}_cm'] = _measurement(dims.get(name), factor)
+    return measurements
+
+
+def _active_product_count(**lookups):
+    """Scalar subquery counting the active products matching ``lookups``."""
+    count = (
+        Product.objects.filter(is_active=True, **lookups)
+        .order_by()
+        .values('is_active')
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    return Coalesce(Subquery(count), 0)
+
+
+def _save_kwargs_without_sql_fields(instance, kwargs):
+    """
+    Keep a full ``save()`` of an existing row from writing back the product
+    counts and tree path it loaded, which concurrent product writes and
+    category moves may have changed since.
+    """
+    if instance._state.adding or kwargs.get('force_insert') or kwargs.get('update_fields') is not None:
+        return kwargs
+    excluded = PRODUCT_COUNT_FIELDS | TREE_FIELDS
+    update_fields = [
+        field.name
+        for field in instance._meta.concrete_fields
+        if not field.primary_key and field.name not in excluded
+    ]
+    return {**kwargs, 'update_fields': update_fields}
+
+
+class CategoryQuerySet(models.QuerySet):
+    """Category queryset maintaining the denormalized product counts."""
+
+    def add_products(self, category_id, delta):
+        """
+        Add ``delta`` to the counts of category ``category_id`` and the subtree
+        counts of its ancestors, in one UPDATE.
+        """
+        target_path = Subquery(Category.objects.filter(pk=category_id).order_by().values('path'))
+        return (
+            self.alias(target_path=target_path)
+            .filter(target_path__startswith=F('path'))
+            .update(
+                product_count=Case(
+                    When(pk=category_id, then=F('product_count') + delta),
+                    default=F('product_count'),
+                ),
+                subtree_product_count=F('subtree_product_count') + delta,
+            )
+        )
+
+    def with_ancestors(self):
+        """These categories and all their ancestors."""
+        pks = set()
+        for path in self.order_by().values_list('path', flat=True):
+            pks.update(int(pk) for pk in path.split('/')[:-1])
+        return Category.objects.using(self.db).filter(pk__in=pks)
+
+    def recount_products(self):
+        """
+        Recompute ``product_count`` and ``subtree_product_count`` from the
+        products table, writing only the rows that drifted.
+
+        Returns the number of corrected values.
+        """
+        direct = _active_product_count(category_id=OuterRef('pk'))
+        subtree = _active_product_count(category__path__startswith=OuterRef('path'))
+        return (
+            self.alias(actual=direct).exclude(product_count=F('actual')).update(product_count=direct)
+            + self.alias(actual=subtree)
+            .exclude(subtree_product_count=F('actual'))
+            .update(subtree_product_count=subtree)
+        )
 
 
 class Category(TimeStampedModel):
@@ -53,6 +234,16 @@ class Category(TimeStampedModel):
     - Fashion (parent=None)
       - Men's Fashion (parent=Fashion)
       - Women's Fashion (parent=Fashion)
+
+    The tree is also stored as a materialized path: ``path`` lists the ids
+    from the root down to the category itself (``"1/4/9/"``) and ``depth``
+    is 0 for roots. Both are maintained by ``save()``; moving a category
+    rewrites its whole subtree in one UPDATE. Writes that bypass ``save()``
+    (``QuerySet.update(parent=...)``) leave them stale.
+
+    ``product_count`` and ``subtree_product_count`` count the active products
+    in the category itself and in its whole subtree. Product writes keep them
+    up to date (see ``signals``); ``reconcile_product_counts`` repairs drift.
     """
 
     name = models.CharField(max_length=200)
@@ -61,6 +252,12 @@ class Category(TimeStampedModel):
         'self', on_delete=models.CASCADE, null=True, blank=True, related_name='children'
     )
     description = models.TextField(blank=True)
+    path = models.CharField(max_length=255, editable=False, default='')
+    depth = models.PositiveSmallIntegerField(editable=False, default=0)
+    product_count = models.IntegerField(editable=False, default=0)
+    subtree_product_count = models.IntegerField(editable=False, default=0)
+
+    objects = CategoryQuerySet.as_manager()
 
     class Meta:
         db_table = 'categories'
@@ -68,45 +265,130 @@ class Category(TimeStampedModel):
         ordering = ['name']
         indexes = [
             models.Index(fields=['parent', 'name']),  # For tree traversal
+            # Prefix matches on the materialized path (subtree lookups)
+            models.Index(fields=['path'], name='category_path_idx', opclasses=['varchar_pattern_ops']),
         ]
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_parent_id = instance.__dict__.get('parent_id')
+        if 'name' in instance.__dict__:
+            instance._loaded_name = instance.name
+        return instance
+
+    def clean(self):
+        super().clean()
+        self._validate_parent()
+
+    def _validate_parent(self):
+        if self.pk and self.parent_id and (
+            self.parent_id == self.pk or f'/{self.pk}/' in f'/{self.parent.path}'
+        ):
+            raise ValidationError({'parent': 'A category cannot be moved under itself.'})
+
+    def save(self, *args, **kwargs):
+        kwargs = _save_kwargs_without_sql_fields(self, kwargs)
+        update_fields = kwargs.get('update_fields')
+        moved = (
+            self._state.adding
+            or getattr(self, '_loaded_parent_id', None) != self.parent_id
+        ) and (update_fields is None or 'parent' in update_fields or 'parent_id' in update_fields)
+        if not moved:
+            return super().save(*args, **kwargs)
+
+        self._validate_parent()
+        adding = self._state.adding
+        with transaction.atomic(using=kwargs.get('using') or router.db_for_write(Category, instance=self)):
+            super().save(*args, **kwargs)
+            old_ancestor_ids = self._update_path()
+            if not adding:
+                # The subtree's products moved from the old ancestors to the new ones
+                Category.objects.using(self._state.db).filter(
+                    pk__in=[*old_ancestor_ids, *self.ancestor_ids]
+                ).recount_products()
+        self._loaded_parent_id = self.parent_id
+
+    def _update_path(self):
+        """
+        Recompute the path and depth of this category and its whole subtree
+        from the stored rows, returning the ids of its previous ancestors.
+        """
+        categories = Category.objects.using(self._state.db)
+        parent = categories.filter(pk=self.parent_id).order_by().values('path', 'depth').first()
+        path = f'{parent["path"] if parent else ""}{self.pk}/'
+        depth = parent['depth'] + 1 if parent else 0
+        old = categories.filter(pk=self.pk).values('path', 'depth').get()
+        if old['path']:
+            categories.filter(path__startswith=old['path']).update(
+                path=Concat(Value(path), Substr('path', len(old['path']) + 1)),
+                depth=F('depth') + (depth - old['depth']),
+            )
+        else:
+            categories.filter(pk=self.pk).update(path=path, depth=depth)
+        self.path, self.depth = path, depth
+        return [int(pk) for pk in old['path'].split('/')[:-2]]
+
+    @property
+    def ancestor_ids(self):
+        """Ids of the ancestors, root first, read from the stored path."""
+        return [int(pk) for pk in self.path.split('/')[:-2]]
+
     def get_ancestors(self):
         """Get all ancestor categories (parent, grandparent, etc.)."""
-        ancestors = []
-        current = self.parent
-        while current:
-            ancestors.append(current)
-            current = current.parent
-        return ancestors
+        return list(Category.objects.filter(pk__in=self.ancestor_ids).order_by('-depth'))
+
+    def get_breadcrumbs(self):
+        """Get the categories from the root down to this one."""
+        return list(Category.objects.filter(pk__in=[*self.ancestor_ids, self.pk]).order_by('depth'))
 
     def get_descendants(self):
         """Get all descendant categories (children, grandchildren, etc.)."""
-        descendants = list(self.children.all())
-        for child in self.children.all():
-            descendants.extend(child.get_descendants())
-        return descendants
+        return list(
+            Category.objects.filter(path__startswith=self.path).exclude(pk=self.pk).order_by('path')
+        )
+
+    def subtree_ids(self):
+        """Subquery selecting the ids of this category and all its descendants."""
+        return Category.objects.filter(path__startswith=self.path).values('pk')
 
     @property
     def is_root(self):
         """Check if this is a root category."""
-        return self.parent is None
+        return self.parent_id is None
 
     @property
     def level(self):
         """Get the depth level of this category in the tree."""
-        return len(self.get_ancestors())
+        return self.depth
+
+
+class BrandQuerySet(models.QuerySet):
+    """Brand queryset maintaining the denormalized product counts."""
+
+    def add_products(self, brand_id, delta):
+        """Add ``delta`` to the product count of brand ``brand_id``."""
+        return self.filter(pk=brand_id).update(product_count=F('product_count') + delta)
+
+    def recount_products(self):
+        """Recompute ``product_count`` for drifted rows; returns the number corrected."""
+        actual = _active_product_count(brand_id=OuterRef('pk'))
+        return self.alias(actual=actual).exclude(product_count=F('actual')).update(product_count=actual)
 
 
 class Brand(TimeStampedModel):
-    """Brand model."""
+    """Brand model with a maintained count of its active products."""
 
     name = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField(blank=True)
     logo_url = models.URLField(blank=True)
+    product_count = models.IntegerField(editable=False, default=0)
+
+    objects = BrandQuerySet.as_manager()
 
     class Meta:
         db_table = 'brands'
@@ -115,6 +397,203 @@ class Brand(TimeStampedModel):
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'name' in instance.__dict__:
+            instance._loaded_name = instance.name
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **_save_kwargs_without_sql_fields(self, kwargs))
+
+
+def _related_name_subquery(model, value):
+    """Build a scalar subquery selecting the name of a brand/category row."""
+    if isinstance(value, models.Model):
+        value = value.pk
+    elif isinstance(value, F):
+        value = OuterRef(value.name)
+    return Subquery(model.objects.filter(pk=value).order_by().values('name')[:1])
+
+
+def build_search_vector(config, **overrides):
+    """
+    Build the weighted search vector expression for a product row.
+
+    Title and SKU carry weight A, brand and category names B and the
+    description C, all parsed with the text search configuration ``config``.
+    ``overrides`` replaces a source column with the value being written, so
+    the vector can be computed in the same UPDATE statement that changes the
+    row.
+    """
+
+    def column(name):
+        value = overrides.get(name, F(name))
+        return value if hasattr(value, 'resolve_expression') else Value(value)
+
+    brand = overrides.get('brand_id', overrides.get('brand', OuterRef('brand_id')))
+    category = overrides.get('category_id', overrides.get('category', OuterRef('category_id')))
+    return (
+        SearchVector(column('title'), weight='A', config=config)
+        + SearchVector(column('sku'), weight='A', config=config)
+        + SearchVector(_related_name_subquery(Brand, brand), weight='B', config=config)
+        + SearchVector(_related_name_subquery(Category, category), weight='B', config=config)
+        + SearchVector(column('description'), weight='C', config=config)
+    )
+
+
+def build_search_vectors(**overrides):
+    """Return ``{field: expression}`` for the stored vector of every catalog language."""
+    return {
+        field: build_search_vector(config, **overrides)
+        for field, config in SEARCH_VECTOR_CONFIGS.values()
+    }
+
+
+def canonical_attribute_value(value):
+    """Casefolded, whitespace-collapsed string form of a scalar attribute value."""
+    if isinstance(value, bool):
+        value = 'true' if value else 'false'
+    return ' '.join(str(value).split()).casefold()[:255]
+
+
+def canonical_attributes(attributes):
+    """
+    Yield the ``(key, value)`` lookup pairs of a product's attributes.
+
+    Keys and scalar values are canonicalized; lists yield one pair per item.
+    Objects (``dimensions``, ``weight``) and nulls are not filterable this way.
+    """
+    if not isinstance(attributes, dict):
+        return
+    for key, value in attributes.items():
+        for item in value if isinstance(value, list) else [value]:
+            if item is not None and not isinstance(item, (dict, list)):
+                yield canonical_attribute_value(key)[:100], canonical_attribute_value(item)
+
+
+class ProductQuerySet(models.QuerySet):
+    """
+    Product queryset that keeps the stored search vectors and the values
+    derived from attributes in sync on bulk writes and reports the product
+    count groups they touch.
+    """
+
+    def _supports_search_vector(self):
+        return connections[self.db].vendor == 'postgresql'
+
+    def update_search_vector(self):
+        """Recompute the stored search vectors for every product in the queryset."""
+        if not self._supports_search_vector():
+            return 0
+        return super().update(**build_search_vectors())
+
+    def sync_attributes(self):
+        """
+        Rewrite the ``ProductAttribute`` rows and measurement columns of every
+        product in the queryset from its attributes.
+        """
+        attributes_by_pk = dict(self.order_by().values_list('pk', 'attributes'))
+        replace_product_attributes(self.db, attributes_by_pk)
+        self.model.objects.using(self.db).bulk_update(
+            [
+                self.model(pk=pk, **normalized_measurements(attributes))
+                for pk, attributes in attributes_by_pk.items()
+            ],
+            MEASUREMENT_FIELDS,
+            batch_size=ATTRIBUTE_BATCH_SIZE,
+        )
+
+    def update_primary_images(self):
+        """Point ``primary_image`` of every product in the queryset at its first media."""
+        first_media = (
+            Media.objects.filter(product=OuterRef('pk'))
+            .order_by(*Media._meta.ordering, 'pk')
+            .values('pk')[:1]
+        )
+        # Not a source of search vectors, counts or caches
+        return super().update(primary_image=Subquery(first_media))
+
+    def _count_groups(self):
+        return set(self.order_by().values_list('category_id', 'brand_id').distinct())
+
+    @staticmethod
+    def _written_group(kwargs, category_id, brand_id):
+        """The ``(category_id, brand_id)`` pair of a row after an update() with ``kwargs``."""
+        for name, current in (('category', category_id), ('brand', brand_id)):
+            value = kwargs.get(f'{name}_id', kwargs.get(name, current))
+            yield value.pk if isinstance(value, models.Model) else value
+
+    def update(self, **kwargs):
+        if SEARCH_VECTOR_SOURCE_FIELDS.intersection(kwargs) and self._supports_search_vector():
+            for field, vector in build_search_vectors(**kwargs).items():
+                kwargs.setdefault(field, vector)
+        groups = None
+        if PRODUCT_COUNT_SOURCE_FIELDS.intersection(kwargs):
+            groups = self._count_groups()
+            groups |= {tuple(self._written_group(kwargs, *group)) for group in groups}
+        pks = None
+        if (SEARCH_INDEX_SOURCE_FIELDS | SUGGEST_SOURCE_FIELDS | ATTRIBUTE_SOURCE_FIELDS).intersection(kwargs):
+            pks = list(self.order_by().values_list('pk', flat=True))
+        if ATTRIBUTE_SOURCE_FIELDS.intersection(kwargs) and isinstance(kwargs['attributes'], dict):
+            kwargs.update(normalized_measurements(kwargs['attributes']))
+        rows = super().update(**kwargs)
+        if ATTRIBUTE_SOURCE_FIELDS.intersection(kwargs):
+            self.model.objects.using(self.db).filter(pk__in=pks).sync_attributes()
+        product_bulk_write.send(
+            sender=self.model, pks=pks, fields=set(kwargs), groups=groups, using=self.db
+        )
+        return rows
+
+    def _update_search_vector_for(self, objs):
+        pks = [obj.pk for obj in objs if obj.pk is not None]
+        for start in range(0, len(pks), SEARCH_VECTOR_BATCH_SIZE):
+            batch = pks[start:start + SEARCH_VECTOR_BATCH_SIZE]
+            self.model.objects.using(self.db).filter(pk__in=batch).update_search_vector()
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.set_measurements()
+        objs = super().bulk_create(objs, *args, **kwargs)
+        if self._supports_search_vector():
+            self._update_search_vector_for(objs)
+        replace_product_attributes(self.db, {obj.pk: obj.attributes for obj in objs if obj.pk is not None})
+        product_bulk_write.send(
+            sender=self.model,
+            pks=[obj.pk for obj in objs],
+            fields=None,
+            groups={(obj.category_id, obj.brand_id) for obj in objs},
+            using=self.db,
+        )
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        if ATTRIBUTE_SOURCE_FIELDS.intersection(fields):
+            objs = list(objs)
+            for obj in objs:
+                obj.set_measurements()
+            fields = [*fields, *MEASUREMENT_FIELDS]
+        groups = None
+        if PRODUCT_COUNT_SOURCE_FIELDS.intersection(fields):
+            pks = [obj.pk for obj in objs]
+            groups = self.model.objects.using(self.db).filter(pk__in=pks)._count_groups()
+            groups |= {(obj.category_id, obj.brand_id) for obj in objs}
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        if self._supports_search_vector() and SEARCH_VECTOR_SOURCE_FIELDS.intersection(fields):
+            self._update_search_vector_for(objs)
+        if ATTRIBUTE_SOURCE_FIELDS.intersection(fields):
+            replace_product_attributes(self.db, {obj.pk: obj.attributes for obj in objs})
+        product_bulk_write.send(
+            sender=self.model,
+            pks=[obj.pk for obj in objs],
+            fields=set(fields),
+            groups=groups,
+            using=self.db,
+        )
+        return rows
+
 
 class Product(TimeStampedModel):
     """
@@ -153,8 +632,33 @@ class Product(TimeStampedModel):
     )
     is_active = models.BooleanField(default=True, db_index=True)
 
-    # Full-text search vector field
+    # Weight and dimensions from the attributes in canonical units, for range
+    # filters; maintained by ProductQuerySet and save()
+    weight_grams = models.DecimalField(
+        max_digits=12, decimal_places=3, null=True, blank=True, editable=False, db_index=True
+    )
+    width_cm = models.DecimalField(
+        max_digits=12, decimal_places=3, null=True, blank=True, editable=False, db_index=True
+    )
+    height_cm = models.DecimalField(
+        max_digits=12, decimal_places=3, null=True, blank=True, editable=False, db_index=True
+    )
+    depth_cm = models.DecimalField(
+        max_digits=12, decimal_places=3, null=True, blank=True, editable=False, db_index=True
+    )
+
+    # The first media in display order, for list cards; maintained by the
+    # Media signal handlers, update_primary_images() after bulk media writes
+    primary_image = models.ForeignKey(
+        'Media', on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='+'
+    )
+
+    # Full-text search vectors per language (see SEARCH_VECTOR_CONFIGS),
+    # maintained by ProductQuerySet and save()
     search_vector = SearchVectorField(null=True, blank=True)
+    search_vector_tr = SearchVectorField(null=True, blank=True)
+
+    objects = ProductQuerySet.as_manager()
 
     class Meta:
         db_table = 'products'
@@ -166,8 +670,12 @@ class Product(TimeStampedModel):
             models.Index(fields=['category', 'is_active', '-created_at']),
             models.Index(fields=['brand', 'is_active', '-created_at']),
             models.Index(fields=['category', 'brand', 'is_active']),
-            # GIN index for full-text search
+            # GIN indexes for full-text search, one per language
             GinIndex(fields=['search_vector'], name='product_search_gin_idx'),
+            GinIndex(fields=['search_vector_tr'], name='product_search_tr_gin_idx'),
+            # Trigram indexes for fuzzy and substring search (see lookups.TrigramContains)
+            GinIndex(fields=['title'], name='product_title_trgm_idx', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['sku'], name='product_sku_trgm_idx', opclasses=['gin_trgm_ops']),
             # GIN index for JSON attributes (enables faster JSON queries)
             GinIndex(fields=['attributes'], name='product_attributes_gin_idx'),
         ]
@@ -175,6 +683,38 @@ class Product(TimeStampedModel):
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if {'is_active', 'category_id', 'brand_id'}.issubset(instance.__dict__):
+            instance._loaded_count_group = instance.count_group
+        return instance
+
+    @property
+    def count_group(self):
+        """``(category_id, brand_id)`` whose counts this product adds to, or None if inactive."""
+        return (self.category_id, self.brand_id) if self.is_active else None
+
+    def set_measurements(self):
+        """Derive the measurement columns from the attributes."""
+        for field, value in normalized_measurements(self.attributes).items():
+            setattr(self, field, value)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or ATTRIBUTE_SOURCE_FIELDS.intersection(update_fields):
+            self.set_measurements()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *MEASUREMENT_FIELDS}
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or PRODUCT_COUNT_SOURCE_FIELDS.intersection(update_fields):
+            self._loaded_count_group = self.count_group
+        if update_fields is None or SEARCH_VECTOR_SOURCE_FIELDS.intersection(update_fields):
+            Product.objects.using(self._state.db).filter(pk=self.pk).update_search_vector()
+        if update_fields is None or ATTRIBUTE_SOURCE_FIELDS.intersection(update_fields):
+            replace_product_attributes(self._state.db, {self.pk: self.attributes})
+
     @property
     def in_stock(self):
         """Check if product is in stock."""
@@ -189,6 +729,47 @@ class Product(TimeStampedModel):
         self.attributes[key] = value
 
 
+class ProductAttribute(models.Model):
+    """
+    One canonicalized ``Product.attributes`` value, for indexed filtering.
+
+    Rows are derived from ``attributes`` (see ``canonical_attributes``) and
+    rewritten by ``Product.save()`` and ``ProductQuerySet`` writes; writes
+    that bypass both leave them stale until ``sync_attributes()`` runs.
+    """
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='attribute_values')
+    key = models.CharField(max_length=100)
+    value = models.CharField(max_length=255)
+
+    class Meta:
+        db_table = 'product_attributes'
+        constraints = [
+            models.UniqueConstraint(fields=['key', 'value', 'product'], name='product_attribute_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.key}={self.value}'
+
+
+def replace_product_attributes(using, attributes_by_pk):
+    """Replace the ``ProductAttribute`` rows of the products in ``{pk: attributes}``."""
+    if not attributes_by_pk:
+        return
+    rows = ProductAttribute.objects.using(using)
+    pks = list(attributes_by_pk)
+    for start in range(0, len(pks), ATTRIBUTE_BATCH_SIZE):
+        rows.filter(product_id__in=pks[start:start + ATTRIBUTE_BATCH_SIZE]).delete()
+    rows.bulk_create(
+        [
+            ProductAttribute(product_id=pk, key=key, value=value)
+            for pk, attributes in attributes_by_pk.items()
+            for key, value in set(canonical_attributes(attributes))
+        ],
+        batch_size=ATTRIBUTE_BATCH_SIZE,
+    )
+
+
 class Media(TimeStampedModel):
     """Product media (images, videos) model."""
 
@@ -204,5 +785,64 @@ class Media(TimeStampedModel):
         verbose_name_plural = 'media'
         ordering = ['order', 'created_at']
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'product_id' in instance.__dict__:
+            instance._loaded_product_id = instance.product_id
+        return instance
+
     def __str__(self):
         return f'{self.product.title} - Media {self.order}'
+
+
+class SearchTerm(models.Model):
+    """
+    Catalog vocabulary used for "did you mean" suggestions.
+
+    One row per word found in active product text (title, description, brand
+    and category names), in the style of PostgreSQL's ``ts_stat``. Rebuilt
+    periodically by the ``refresh_search_vocabulary`` command.
+    """
+
+    word = models.CharField(max_length=100, unique=True)
+    ndoc = models.IntegerField(default=0)  # number of products containing the word
+    nentry = models.IntegerField(default=0)  # total number of occurrences
+
+    class Meta:
+        db_table = 'search_terms'
+        indexes = [
+            GinIndex(fields=['word'], name='search_term_word_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
+
+    def __str__(self):
+        return self.word
+
+
+class SearchQueryStat(models.Model):
+    """
+    Result-cache hits and misses per normalized search query.
+
+    Counted in memory by each worker and flushed periodically (see
+    ``apps.catalog.search.cache``); the most frequent queries are pre-warmed
+    by the ``warm_search_cache`` command.
+    """
+
+    query = models.CharField(max_length=255, unique=True)
+    hits = models.PositiveIntegerField(default=0)
+    misses = models.PositiveIntegerField(default=0)
+    last_searched_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'search_query_stats'
+
+    def __str__(self):
+        return self.query
+
+    @property
+    def searches(self):
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.searches if self.searches else 0.0
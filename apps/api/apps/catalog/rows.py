@@ -0,0 +1,181 @@
+"""
+Fast read-only serialization from ``values_list()`` rows.
+
+``RowSerializer`` compiles a bound ``ModelSerializer`` (after its sparse
+fieldset trimming) into one column list and one converter per field, then
+builds the representation of each row without instantiating models or going
+through DRF's per-field ``get_attribute`` machinery. The converters are the
+fields' own ``to_representation``, except for types where a builtin gives
+the same result and for datetimes and decimals, whose timezone and
+quantization context are resolved once per compile; the output matches the
+serializer's exactly.
+
+Serializers with fields that cannot be read from a single row (to-many
+relations, method fields, properties without a ``row_computed_fields``
+entry) are not compiled; ``RowSerializer.compile()`` returns None for them.
+"""
+
+import decimal
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import ISO_8601, relations, serializers
+from rest_framework import fields as drf_fields
+from rest_framework.settings import api_settings
+
+# DRF fields whose ``to_representation`` is equivalent to a builtin
+BUILTIN_CONVERTERS = {
+    drf_fields.CharField: str,
+    drf_fields.SlugField: str,
+    drf_fields.URLField: str,
+    drf_fields.EmailField: str,
+    drf_fields.IntegerField: int,
+    drf_fields.BooleanField: bool,
+    drf_fields.ReadOnlyField: None,
+    relations.PrimaryKeyRelatedField: None,
+}
+
+
+class UnsupportedFieldError(Exception):
+    pass
+
+
+def _datetime_converter(field):
+    """``DateTimeField.to_representation`` with the output timezone resolved once."""
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or field_timezone is None:
+        return field.to_representation
+
+    def convert(value):
+        if getattr(value, 'tzinfo', None) is None:
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+    return convert
+
+
+def _decimal_converter(field):
+    """``DecimalField.to_representation`` with the quantization context built once."""
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if field.decimal_places is None or field.normalize_output or field.localize or not coerce_to_string:
+        return field.to_representation
+    exponent = decimal.Decimal('.1') ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    rounding = field.rounding
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            return field.to_representation(value)
+        return f'{value.quantize(exponent, rounding=rounding, context=context):f}'
+
+    return convert
+
+
+def _converter(field):
+    if isinstance(field, relations.PrimaryKeyRelatedField) and field.pk_field is not None:
+        return field.pk_field.to_representation
+    if type(field) is drf_fields.DateTimeField:
+        return _datetime_converter(field)
+    if type(field) is drf_fields.DecimalField:
+        return _decimal_converter(field)
+    return BUILTIN_CONVERTERS.get(type(field), field.to_representation)
+
+
+class RowSerializer:
+    """Serialize ``values_list(*columns)`` rows like a compiled ``ModelSerializer``."""
+
+    def __init__(self, columns, build):
+        self.columns = columns
+        self._build = build
+
+    @classmethod
+    def compile(cls, serializer):
+        """
+        Compile the bound ``serializer`` (a ``ModelSerializer``, or the
+        ``ListSerializer`` wrapping one); None if a field cannot be compiled.
+        """
+        if isinstance(serializer, serializers.ListSerializer):
+            serializer = serializer.child
+        # The primary key comes first so rows can be matched to ids
+        columns = [serializer.Meta.model._meta.pk.name]
+        try:
+            build = cls._compile_fields(serializer, '', columns)
+        except UnsupportedFieldError:
+            return None
+        return cls(columns, build)
+
+    @classmethod
+    def _column(cls, columns, name):
+        if name not in columns:
+            columns.append(name)
+        return columns.index(name)
+
+    @classmethod
+    def _compile_fields(cls, serializer, prefix, columns):
+        model = serializer.Meta.model
+        computed = getattr(serializer, 'row_computed_fields', {})
+        plan = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if name in computed:
+                sources, function = computed[name]
+                indexes = [cls._column(columns, f'{prefix}{source}') for source in sources]
+                plan.append((name, cls._computed(indexes, function)))
+            elif isinstance(field, (serializers.ListSerializer, relations.ManyRelatedField)):
+                raise UnsupportedFieldError(name)
+            elif isinstance(field, serializers.ModelSerializer):
+                nested_prefix = f'{prefix}{field.source}__'
+                pk_index = cls._column(columns, f'{nested_prefix}{field.Meta.model._meta.pk.name}')
+                plan.append((name, cls._nested(pk_index, cls._compile_fields(field, nested_prefix, columns))))
+            else:
+                if '.' in field.source or field.source == '*':
+                    raise UnsupportedFieldError(name)
+                try:
+                    model._meta.get_field(field.source)
+                except FieldDoesNotExist:
+                    if field.source != 'pk':
+                        raise UnsupportedFieldError(name)
+                index = cls._column(columns, f'{prefix}{field.source}')
+                plan.append((name, cls._value(index, _converter(field))))
+
+        def build(row):
+            return {name: convert(row) for name, convert in plan}
+
+        return build
+
+    @staticmethod
+    def _value(index, converter):
+        if converter is None:
+            return lambda row: row[index]
+
+        def convert(row):
+            value = row[index]
+            return None if value is None else converter(value)
+
+        return convert
+
+    @staticmethod
+    def _computed(indexes, function):
+        return lambda row: function(*(row[index] for index in indexes))
+
+    @staticmethod
+    def _nested(pk_index, build):
+        # A null foreign key joins a row of nulls
+        return lambda row: None if row[pk_index] is None else build(row)
+
+    def values(self, queryset):
+        """``queryset`` as the rows this serializer reads."""
+        return queryset.values_list(*self.columns)
+
+    def to_representation(self, rows):
+        build = self._build
+        return [build(row) for row in rows]
+
+    def serialize_ids(self, queryset, ids):
+        """Serialize the rows of ``queryset`` with the given primary keys, in that order."""
+        rows = {row[0]: row for row in self.values(queryset.filter(pk__in=ids))}
+        return self.to_representation(rows[pk] for pk in ids if pk in rows)
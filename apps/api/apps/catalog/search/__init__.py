@@ -0,0 +1,21 @@
+"""Pluggable catalog search: PostgreSQL full-text search or an in-process BM25 engine."""
+
+from .base import (
+    BACKENDS,
+    MATCH_FULLTEXT,
+    MATCH_FUZZY,
+    MATCH_MODES,
+    SearchBackend,
+    get_search_backend,
+)
+from .filters import ProductSearchFilter
+
+__all__ = [
+    'BACKENDS',
+    'MATCH_FULLTEXT',
+    'MATCH_FUZZY',
+    'MATCH_MODES',
+    'ProductSearchFilter',
+    'SearchBackend',
+    'get_search_backend',
+]
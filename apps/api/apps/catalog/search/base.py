@@ -0,0 +1,87 @@
+"""Search backend interface and registry."""
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from ..models import DEFAULT_SEARCH_LANGUAGE, SEARCH_VECTOR_CONFIGS, Product
+from .highlight import mark_words, render
+
+BACKENDS = {
+    'postgres': 'apps.catalog.search.postgres.PostgresSearchBackend',
+    'bm25': 'apps.catalog.search.bm25.BM25SearchBackend',
+}
+
+MATCH_FULLTEXT = 'fulltext'
+MATCH_FUZZY = 'fuzzy'
+MATCH_MODES = (MATCH_FULLTEXT, MATCH_FUZZY)
+
+
+class SearchBackend:
+    """
+    Base class for catalog search engines.
+
+    ``search`` narrows a product queryset to the matches for a query, annotates
+    each row with a ``rank`` and orders by relevance. ``language`` is a key of
+    ``SEARCH_VECTOR_CONFIGS``; engines that do language-aware stemming use it
+    to pick their analysis, others ignore it. The indexing hooks are
+    called after product writes commit; engines that index inside the database
+    can leave them as no-ops.
+    """
+
+    name = None
+
+    def search(self, queryset, query, match_mode=MATCH_FUZZY, language=DEFAULT_SEARCH_LANGUAGE):
+        raise NotImplementedError('subclasses of SearchBackend must provide a search() method')
+
+    def count(self, queryset, query, match_mode=MATCH_FUZZY, language=DEFAULT_SEARCH_LANGUAGE):
+        """Count the products of ``queryset`` matching ``query``, whatever ``search()`` keeps."""
+        return self.search(queryset, query, match_mode, language).order_by().count()
+
+    def index_products(self, product_ids):
+        """(Re)index the given products; inactive or deleted ones are dropped."""
+
+    def rebuild(self):
+        """Rebuild the whole index from the database."""
+
+    def highlight(self, product_ids, query, max_words, language=DEFAULT_SEARCH_LANGUAGE):
+        """
+        Return ``{product_id: {'title': html, 'description': html}}`` with matches
+        wrapped in ``<mark>``; descriptions are cut to ``max_words`` words.
+
+        Meant for the products of one result page only.
+        """
+        rows = Product.objects.filter(pk__in=product_ids).values_list('pk', 'title', 'description')
+        return {
+            pk: {
+                'title': render(mark_words(title, query)),
+                'description': render(mark_words(description, query, max_words)),
+            }
+            for pk, title, description in rows
+        }
+
+
+def search_vector_config(language):
+    """Return the ``(field, text search config)`` pair for a language, or the default's."""
+    return SEARCH_VECTOR_CONFIGS.get(language, SEARCH_VECTOR_CONFIGS[DEFAULT_SEARCH_LANGUAGE])
+
+
+_instances = {}
+
+
+def get_search_backend(name=None):
+    """
+    Return the shared backend instance for ``name`` or the configured default.
+
+    ``CATALOG_SEARCH_BACKEND`` selects the engine by name (``postgres``,
+    ``bm25``) or dotted path; when empty, PostgreSQL databases use the
+    ``postgres`` backend and every other database the in-process ``bm25``
+    engine.
+    """
+    name = name or settings.CATALOG_SEARCH_BACKEND
+    if not name:
+        name = 'postgres' if connection.vendor == 'postgresql' else 'bm25'
+    path = BACKENDS.get(name, name)
+    if path not in _instances:
+        _instances[path] = import_string(path)()
+    return _instances[path]
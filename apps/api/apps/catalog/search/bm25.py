@@ -0,0 +1,428 @@
+"""
+In-process BM25 search engine for deployments without PostgreSQL.
+
+The index lives in memory in every worker and is persisted to
+``CATALOG_SEARCH_INDEX_PATH`` as a compacted base file plus an append-only log
+(``<path>.log``) of the products written since. Product writes append their
+entries to the log under an exclusive file lock; every worker applies the
+entries it has not seen yet on its next search, as pending postings. Once the
+log holds ``CATALOG_SEARCH_INDEX_COMPACT_THRESHOLD`` entries the writer
+compacts the index into a new base file and starts a new log, and other
+workers notice the newer base file on their next search and reload it.
+"""
+
+import fcntl
+import json
+import os
+import re
+import tempfile
+import threading
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, FloatField, Value, When
+
+from ..models import DEFAULT_SEARCH_LANGUAGE, Product
+from .base import MATCH_FUZZY, SearchBackend
+
+# Term-frequency multiplier per indexed product field
+FIELD_WEIGHTS = {
+    'title': 3.0,
+    'sku': 3.0,
+    'brand__name': 2.0,
+    'category__name': 2.0,
+    'description': 1.0,
+}
+# Query words at least this long also match indexed terms they prefix (fuzzy mode)
+MIN_PREFIX_LENGTH = 3
+MAX_PREFIX_EXPANSIONS = 50
+# Ids per counting query (fewer where the database limits query parameters)
+COUNT_BATCH_SIZE = 10000
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text.casefold())
+
+
+def document_terms(row):
+    """Weighted term frequencies for one product row from ``Product.objects.values()``."""
+    freqs = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        for term in tokenize(row[field] or ''):
+            freqs[term] = freqs.get(term, 0.0) + weight
+    return freqs
+
+
+def document_rows(queryset):
+    for row in queryset.values('pk', *FIELD_WEIGHTS).iterator():
+        yield row['pk'], document_terms(row)
+
+
+class BM25Index:
+    """
+    Inverted index with NumPy postings and BM25 scoring.
+
+    Postings are stored in CSR form: the document slots containing term id
+    ``t`` are ``post_docs[offsets[t]:offsets[t + 1]]`` with weighted term
+    frequencies in ``post_tfs``. Documents added since the last compaction are
+    kept in per-term pending lists, and removed documents are masked out
+    through ``alive`` until ``compact()`` rewrites the arrays.
+    """
+
+    def __init__(self):
+        self.terms = {}  # term -> term id
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.post_docs = np.empty(0, dtype=np.int32)
+        self.post_tfs = np.empty(0, dtype=np.float32)
+        self.pending = {}  # term id -> [(slot, tf), ...]
+        self.doc_ids = np.empty(0, dtype=np.int64)  # slot -> product id
+        self.doc_len = np.empty(0, dtype=np.float32)
+        self.alive = np.empty(0, dtype=bool)
+        self.slots = {}  # product id -> slot
+        self.generation = ''  # identifies the saved base file a log belongs to
+        self._sorted_terms = None
+
+    def __len__(self):
+        return len(self.slots)
+
+    # Building and updating
+
+    def build(self, documents):
+        """Replace the index contents with ``(product_id, term_freqs)`` pairs."""
+        self.__init__()
+        postings, doc_ids, doc_len = [], [], []
+        for slot, (product_id, freqs) in enumerate(documents):
+            doc_ids.append(product_id)
+            doc_len.append(sum(freqs.values()))
+            for term, tf in freqs.items():
+                term_id = self.terms.setdefault(term, len(self.terms))
+                if term_id == len(postings):
+                    postings.append([])
+                postings[term_id].append((slot, tf))
+        self.doc_ids = np.array(doc_ids, dtype=np.int64)
+        self.doc_len = np.array(doc_len, dtype=np.float32)
+        self.alive = np.ones(len(doc_ids), dtype=bool)
+        self.slots = {product_id: slot for slot, product_id in enumerate(doc_ids)}
+        self._set_postings(postings)
+
+    def _set_postings(self, postings):
+        counts = [len(entries) for entries in postings]
+        self.offsets = np.concatenate([[0], np.cumsum(counts, dtype=np.int64)]).astype(np.int64)
+        flat = [entry for entries in postings for entry in entries]
+        self.post_docs = np.array([slot for slot, _tf in flat], dtype=np.int32)
+        self.post_tfs = np.array([tf for _slot, tf in flat], dtype=np.float32)
+        self.pending = {}
+
+    def add(self, product_id, freqs):
+        self.remove(product_id)
+        slot = len(self.doc_ids)
+        self.doc_ids = np.append(self.doc_ids, product_id)
+        self.doc_len = np.append(self.doc_len, np.float32(sum(freqs.values())))
+        self.alive = np.append(self.alive, True)
+        self.slots[product_id] = slot
+        for term, tf in freqs.items():
+            term_id = self.terms.get(term)
+            if term_id is None:
+                term_id = self.terms[term] = len(self.terms)
+                self.offsets = np.append(self.offsets, self.offsets[-1])
+                self._sorted_terms = None
+            self.pending.setdefault(term_id, []).append((slot, tf))
+
+    def remove(self, product_id):
+        slot = self.slots.pop(product_id, None)
+        if slot is not None:
+            self.alive[slot] = False
+
+    def postings(self, term_id):
+        start, end = self.offsets[term_id], self.offsets[term_id + 1]
+        docs, tfs = self.post_docs[start:end], self.post_tfs[start:end]
+        pending = self.pending.get(term_id)
+        if pending:
+            docs = np.concatenate([docs, np.array([slot for slot, _tf in pending], dtype=np.int32)])
+            tfs = np.concatenate([tfs, np.array([tf for _slot, tf in pending], dtype=np.float32)])
+        return docs, tfs
+
+    def compact(self):
+        """Drop removed documents and unused terms, and merge pending postings."""
+        keep = np.flatnonzero(self.alive)
+        remap = np.full(len(self.alive), -1, dtype=np.int64)
+        remap[keep] = np.arange(len(keep))
+        terms, postings = {}, []
+        for term, term_id in self.terms.items():
+            docs, tfs = self.postings(term_id)
+            live = self.alive[docs]
+            if live.any():
+                terms[term] = len(postings)
+                postings.append(list(zip(remap[docs[live]].tolist(), tfs[live].tolist())))
+        self.terms = terms
+        self._sorted_terms = None
+        self.doc_ids = self.doc_ids[keep]
+        self.doc_len = self.doc_len[keep]
+        self.alive = np.ones(len(keep), dtype=bool)
+        self.slots = {int(product_id): slot for slot, product_id in enumerate(self.doc_ids)}
+        self._set_postings(postings)
+
+    # Querying
+
+    def _expand(self, word):
+        """Term ids for a query word: the exact term plus terms it prefixes."""
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self.terms)
+        start = bisect_left(self._sorted_terms, word)
+        term_ids = []
+        for term in self._sorted_terms[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(word):
+                break
+            term_ids.append(self.terms[term])
+        return term_ids
+
+    def search(self, words, require_all=True, expand_prefixes=False, limit=1000, k1=1.2, b=0.75):
+        """
+        Rank documents for the query words with BM25.
+
+        With ``require_all`` every word must match (like ``plainto_tsquery``),
+        otherwise any word does. Returns ``(product_ids, scores)`` arrays, best
+        first.
+        """
+        total = int(self.alive.sum())
+        if not total or not words:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        avg_len = float(self.doc_len[self.alive].mean()) or 1.0
+        scores = np.zeros(len(self.doc_ids), dtype=np.float32)
+        matched = np.zeros(len(self.doc_ids), dtype=np.int32)
+        for word in dict.fromkeys(words):
+            if expand_prefixes and len(word) >= MIN_PREFIX_LENGTH:
+                term_ids = self._expand(word)
+            else:
+                term_ids = [self.terms[word]] if word in self.terms else []
+            hits = np.zeros(len(self.doc_ids), dtype=bool)
+            for term_id in term_ids:
+                docs, tfs = self.postings(term_id)
+                live = self.alive[docs]
+                docs, tfs = docs[live], tfs[live]
+                if not len(docs):
+                    continue
+                idf = np.log1p((total - len(docs) + 0.5) / (len(docs) + 0.5))
+                norm = k1 * (1 - b + b * self.doc_len[docs] / avg_len)
+                scores[docs] += idf * tfs * (k1 + 1) / (tfs + norm)
+                hits[docs] = True
+            matched += hits
+        required = len(set(words)) if require_all else 1
+        candidates = np.flatnonzero(matched >= required)
+        top = candidates[np.argsort(-scores[candidates], kind='stable')][:limit]
+        return self.doc_ids[top], scores[top]
+
+    # Persistence
+
+    def save(self, path):
+        """Compact and atomically write the index to ``path`` as a new generation."""
+        self.compact()
+        self.generation = uuid.uuid4().hex
+        terms = np.array(sorted(self.terms, key=self.terms.get), dtype=str)
+        handle, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(handle, 'wb') as tmp:
+            np.savez(
+                tmp,
+                terms=terms,
+                offsets=self.offsets,
+                post_docs=self.post_docs,
+                post_tfs=self.post_tfs,
+                doc_ids=self.doc_ids,
+                doc_len=self.doc_len,
+                generation=np.array(self.generation),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        index = cls()
+        with np.load(path) as data:
+            index.terms = {term: term_id for term_id, term in enumerate(data['terms'].tolist())}
+            index.offsets = data['offsets']
+            index.post_docs = data['post_docs']
+            index.post_tfs = data['post_tfs']
+            index.doc_ids = data['doc_ids']
+            index.doc_len = data['doc_len']
+            index.generation = str(data['generation']) if 'generation' in data.files else ''
+        index.alive = np.ones(len(index.doc_ids), dtype=bool)
+        index.slots = {int(product_id): slot for slot, product_id in enumerate(index.doc_ids)}
+        return index
+
+
+class BM25SearchBackend(SearchBackend):
+    """
+    Search backend ranking active products with the in-process BM25 index.
+
+    Terms are casefolded but not stemmed, so the index serves every language
+    alike and ``language`` is ignored.
+    """
+
+    name = 'bm25'
+
+    def __init__(self):
+        self._index = None
+        self._loaded = None  # (path, mtime) of the base file backing self._index
+        self._log_offset = 0  # bytes of the log applied to self._index
+        self._log_entries = 0  # log entries applied to self._index
+        self._lock = threading.RLock()
+
+    @property
+    def path(self):
+        return Path(settings.CATALOG_SEARCH_INDEX_PATH)
+
+    @property
+    def log_path(self):
+        return Path(f'{self.path}.log')
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    @contextmanager
+    def _file_lock(self):
+        """Serialize index writers across worker processes."""
+        path = self.path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(f'{path}.lock', 'w') as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _save(self, index):
+        """Write ``index`` as the new base file and start an empty log for it."""
+        path = self.path
+        index.save(path)
+        header = f'{index.generation}\n'.encode()
+        handle, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(handle, 'wb') as tmp:
+            tmp.write(header)
+        os.replace(tmp_path, self.log_path)
+        self._index = index
+        self._loaded = (path, self._mtime(path))
+        self._log_offset = len(header)
+        self._log_entries = 0
+
+    def _build(self):
+        index = BM25Index()
+        index.build(document_rows(Product.objects.filter(is_active=True)))
+        self._save(index)
+
+    def _read_log(self):
+        """
+        Apply the log entries appended since the last read to the loaded index.
+
+        Returns False when the log is missing or belongs to another base file.
+        """
+        try:
+            handle = open(self.log_path, 'rb')
+        except FileNotFoundError:
+            return False
+        with handle:
+            if handle.readline().rstrip(b'\n').decode() != self._index.generation:
+                return False
+            handle.seek(max(self._log_offset, handle.tell()))
+            data = handle.read()
+            # A writer may be halfway through the last line
+            end = data.rfind(b'\n') + 1
+            self._log_offset = handle.tell() - len(data) + end
+        for line in data[:end].splitlines():
+            product_id, freqs = json.loads(line)
+            if freqs is None:
+                self._index.remove(product_id)
+            else:
+                self._index.add(product_id, freqs)
+            self._log_entries += 1
+        return True
+
+    def get_index(self):
+        """Return the current index, reloading or building it when needed."""
+        with self._lock:
+            path = self.path
+            mtime = self._mtime(path)
+            if mtime is None:
+                self.rebuild()
+            elif self._loaded != (path, mtime):
+                self._index = BM25Index.load(path)
+                self._loaded = (path, mtime)
+                self._log_offset = self._log_entries = 0
+            self._read_log()
+            return self._index
+
+    def rebuild(self):
+        with self._lock, self._file_lock():
+            self._build()
+
+    def index_products(self, product_ids):
+        product_ids = list(product_ids)
+        threshold = settings.CATALOG_SEARCH_INDEX_COMPACT_THRESHOLD
+        with self._lock, self._file_lock():
+            if self._mtime(self.path) is None or len(product_ids) >= threshold:
+                self._build()
+                return
+            self.get_index()
+            if not self._read_log():
+                # No log for this base file yet: start one
+                self._save(self._index)
+            changes = dict.fromkeys(product_ids)  # None drops the product
+            changes.update(document_rows(Product.objects.filter(pk__in=product_ids, is_active=True)))
+            with open(self.log_path, 'ab') as log:
+                log.write(b''.join(
+                    json.dumps([product_id, freqs]).encode() + b'\n' for product_id, freqs in changes.items()
+                ))
+            self._read_log()
+            if self._log_entries >= threshold:
+                self._save(self._index)
+
+    def _rank(self, query, match_mode, limit):
+        with self._lock:
+            return self.get_index().search(
+                tokenize(query),
+                require_all=match_mode != MATCH_FUZZY,
+                expand_prefixes=match_mode == MATCH_FUZZY,
+                limit=limit,
+                k1=settings.CATALOG_SEARCH_BM25_K1,
+                b=settings.CATALOG_SEARCH_BM25_B,
+            )
+
+    def search(self, queryset, query, match_mode=MATCH_FUZZY, language=DEFAULT_SEARCH_LANGUAGE):
+        # One more than the view keeps, so that it sees the results are truncated
+        product_ids, scores = self._rank(query, match_mode, settings.CATALOG_SEARCH_MAX_RESULTS + 1)
+        if not len(product_ids):
+            return queryset.none()
+        rank = Case(
+            *[
+                When(pk=product_id, then=Value(score))
+                for product_id, score in zip(product_ids.tolist(), scores.tolist())
+            ],
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+        return queryset.filter(pk__in=product_ids.tolist()).annotate(rank=rank).order_by(
+            '-rank', '-created_at'
+        )
+
+    def count(self, queryset, query, match_mode=MATCH_FUZZY, language=DEFAULT_SEARCH_LANGUAGE):
+        """Count every ranked product that passes ``queryset``, in batches of ids."""
+        product_ids = self._rank(query, match_mode, None)[0].tolist()
+        queryset = queryset.order_by()
+        batch_size = COUNT_BATCH_SIZE
+        max_query_params = connections[queryset.db].features.max_query_params
+        if max_query_params:
+            # Leaving room for the filters' own parameters
+            batch_size = min(batch_size, max_query_params // 2)
+        return sum(
+            queryset.filter(pk__in=product_ids[start:start + batch_size]).count()
+            for start in range(0, len(product_ids), batch_size)
+        )
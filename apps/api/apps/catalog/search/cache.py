@@ -0,0 +1,116 @@
+"""
+Cached ranked result ids for ``?q=`` searches.
+
+The full ranked list of product ids for an endpoint's normalized query,
+filter set and search language is cached under the catalog version (see
+``apps.catalog.caching``), so paging through results slices the cached list
+and only loads the rows of the requested page. Hits and misses are counted
+per normalized query in ``SearchQueryStat``.
+"""
+
+import hashlib
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..caching import catalog_version
+from ..models import SearchQueryStat
+
+RESULT_CACHE_KEY = 'catalog:search:{version}:{digest}'
+# Query parameters that only affect which part of the result list is rendered
+PRESENTATION_PARAMS = frozenset(
+    {'page', 'page_size', 'highlight', 'highlight_words', 'format', 'fields', 'expand', 'layout'}
+)
+
+
+def normalize_query(query):
+    """Casefold and collapse whitespace; every search engine matches case-insensitively."""
+    return ' '.join(query.casefold().split())
+
+
+def result_cache_key(path, query_params, language, search_param='q'):
+    """Cache key for the ranked result list of a request's endpoint, search and filters."""
+    params = [('path', path), ('language', language)] + sorted(
+        (name, normalize_query(value) if name == search_param else value)
+        for name, values in query_params.lists()
+        if name not in PRESENTATION_PARAMS
+        for value in values
+    )
+    digest = hashlib.sha256(urlencode(params).encode()).hexdigest()
+    return RESULT_CACHE_KEY.format(version=catalog_version(), digest=digest)
+
+
+def get_ranked_ids(path, query_params, language, compute):
+    """
+    Return ``(product_ids, hit)`` for the request path, parameters and search language.
+
+    ``compute`` is called on a miss and must return the ranked ids as a list
+    (a ``TruncatedList`` when there are more matches than it holds); the
+    result is cached for ``CATALOG_SEARCH_CACHE_TTL`` seconds.
+    """
+    key = result_cache_key(path, query_params, language)
+    product_ids = cache.get(key)
+    if product_ids is not None:
+        return product_ids, True
+    product_ids = compute()
+    cache.set(key, product_ids, timeout=settings.CATALOG_SEARCH_CACHE_TTL)
+    return product_ids, False
+
+
+class SearchStats:
+    """
+    Per-query hit/miss counters, buffered in memory.
+
+    Counts are written to ``SearchQueryStat`` at most every
+    ``CATALOG_SEARCH_STATS_FLUSH_INTERVAL`` seconds so searches do not pay for
+    a write each.
+    """
+
+    def __init__(self):
+        self._hits = Counter()
+        self._misses = Counter()
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, query, hit):
+        query = normalize_query(query)[:255]
+        with self._lock:
+            (self._hits if hit else self._misses)[query] += 1
+        if time.monotonic() - self._flushed_at >= settings.CATALOG_SEARCH_STATS_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            hits, misses = self._hits, self._misses
+            self._hits, self._misses = Counter(), Counter()
+            self._flushed_at = time.monotonic()
+
+        now = timezone.now()
+        for query in hits.keys() | misses.keys():
+            counts = {'hits': hits[query], 'misses': misses[query]}
+            if self._increment(query, counts, now):
+                continue
+            try:
+                with transaction.atomic():
+                    SearchQueryStat.objects.create(query=query, last_searched_at=now, **counts)
+            except IntegrityError:
+                # Another worker created the row first
+                self._increment(query, counts, now)
+
+    @staticmethod
+    def _increment(query, counts, now):
+        return SearchQueryStat.objects.filter(query=query).update(
+            hits=F('hits') + counts['hits'],
+            misses=F('misses') + counts['misses'],
+            last_searched_at=now,
+        )
+
+
+search_stats = SearchStats()
@@ -0,0 +1,76 @@
+"""DRF filter backend exposing catalog search as the ``q`` query parameter."""
+
+from django.conf import settings
+from django.utils import translation
+from rest_framework import filters
+
+from ..models import DEFAULT_SEARCH_LANGUAGE, SEARCH_VECTOR_CONFIGS
+from .base import MATCH_MODES, get_search_backend
+
+
+class ProductSearchFilter(filters.BaseFilterBackend):
+    """
+    Filter and rank products by the ``q`` query parameter.
+
+    Matching and ranking are delegated to the configured search backend (see
+    ``get_search_backend``) in the request language, taken from the language
+    cookie or ``Accept-Language`` header. Results are ordered by relevance
+    unless the client asked for an explicit ``ordering``. Place this backend
+    after ``OrderingFilter``.
+    """
+
+    search_param = 'q'
+    match_param = 'match'
+    ordering_param = filters.OrderingFilter.ordering_param
+
+    def get_search_query(self, request):
+        return request.query_params.get(self.search_param, '').strip()
+
+    def get_match_mode(self, request):
+        mode = request.query_params.get(self.match_param, '').lower()
+        return mode if mode in MATCH_MODES else settings.CATALOG_SEARCH_MATCH_MODE
+
+    def get_language(self, request):
+        """Return the search language for the request, a key of ``SEARCH_VECTOR_CONFIGS``."""
+        language = translation.get_language_from_request(request).split('-')[0]
+        return language if language in SEARCH_VECTOR_CONFIGS else DEFAULT_SEARCH_LANGUAGE
+
+    def filter_queryset(self, request, queryset, view):
+        search_query = self.get_search_query(request)
+        if not search_query:
+            return queryset
+
+        ordering = queryset.query.order_by
+        queryset = get_search_backend().search(
+            queryset, search_query, self.get_match_mode(request), self.get_language(request)
+        )
+        if request.query_params.get(self.ordering_param):
+            return queryset.order_by(*ordering)
+        return queryset
+
+    def count(self, request, queryset):
+        """Count the products of the unsearched ``queryset`` matching the request's search."""
+        return get_search_backend().count(
+            queryset,
+            self.get_search_query(request),
+            self.get_match_mode(request),
+            self.get_language(request),
+        )
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.search_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Full-text search over title, SKU, brand, category and description.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.match_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Match mode: "fulltext" or "fuzzy" (adds trigram/prefix and substring matches).',
+                'schema': {'type': 'string', 'enum': list(MATCH_MODES)},
+            },
+        ]
@@ -0,0 +1,45 @@
+"""Helpers for highlighted search snippets."""
+
+import re
+from html import escape
+
+# Placeholder markers, swapped for <mark> tags after HTML-escaping the text
+MARK_START = '\x02'
+MARK_END = '\x03'
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def render(fragment):
+    """HTML-escape a marked fragment and turn the markers into ``<mark>`` tags."""
+    return escape(fragment or '').replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+
+
+def mark_words(text, query, max_words=None):
+    """
+    Mark words of ``text`` that start with any word of ``query``.
+
+    With ``max_words``, only a window of that many words is returned, starting
+    a few words before the first match.
+    """
+    words = [word.casefold() for word in _WORD_RE.findall(query)]
+    spans = list(_WORD_RE.finditer(text))
+    matched = [any(span.group().casefold().startswith(word) for word in words) for span in spans]
+
+    start, end = 0, len(spans)
+    if max_words and len(spans) > max_words:
+        first = matched.index(True) if True in matched else 0
+        start = max(0, min(first - max_words // 4, len(spans) - max_words))
+        end = start + max_words
+    if not spans:
+        return text
+
+    parts = []
+    position = spans[start].start() if start else 0
+    for span, is_match in zip(spans[start:end], matched[start:end]):
+        parts.append(text[position:span.start()])
+        parts.append(f'{MARK_START}{span.group()}{MARK_END}' if is_match else span.group())
+        position = span.end()
+    if end == len(spans):
+        parts.append(text[position:])
+    return ''.join(parts)
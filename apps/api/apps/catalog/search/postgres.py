@@ -0,0 +1,69 @@
+"""PostgreSQL search backend using the stored per-language ``Product`` search vectors."""
+
+from django.contrib.postgres.search import (
+    SearchHeadline,
+    SearchQuery,
+    SearchRank,
+    TrigramWordSimilarity,
+)
+from django.db.models import F, Q
+
+from ..models import DEFAULT_SEARCH_LANGUAGE, Product
+from .base import MATCH_FUZZY, SearchBackend, search_vector_config
+from .highlight import MARK_END, MARK_START, render
+
+
+class PostgresSearchBackend(SearchBackend):
+    """
+    Full-text search through the GIN-indexed search vector of the request
+    language (``search_vector`` for English, ``search_vector_tr`` for
+    Turkish), queried with the same text search configuration so both sides
+    are stemmed alike.
+
+    The vectors are maintained in SQL by ``ProductQuerySet`` and ``Product.save``,
+    so the indexing hooks have nothing to do. In ``fuzzy`` match mode, trigram
+    matches on the title (word similarity above
+    ``CATALOG_SEARCH_TRIGRAM_THRESHOLD``) and substring matches on title and
+    SKU are added, all served by the ``gin_trgm_ops`` indexes. Results are
+    ordered by rank, then trigram similarity.
+    """
+
+    name = 'postgres'
+
+    def search(self, queryset, query, match_mode=MATCH_FUZZY, language=DEFAULT_SEARCH_LANGUAGE):
+        field, config = search_vector_config(language)
+        search_query = SearchQuery(query, config=config)
+        condition = Q(**{field: search_query})
+        ranking = ['-rank']
+        if match_mode == MATCH_FUZZY:
+            condition |= (
+                Q(title__trigram_word_similar=query)
+                | Q(title__trigram_contains=query)
+                | Q(sku__trigram_contains=query)
+            )
+            queryset = queryset.annotate(similarity=TrigramWordSimilarity(query, 'title'))
+            ranking.append('-similarity')
+
+        return queryset.filter(condition).annotate(
+            rank=SearchRank(F(field), search_query)
+        ).order_by(*ranking, '-created_at')
+
+    def highlight(self, product_ids, query, max_words, language=DEFAULT_SEARCH_LANGUAGE):
+        """Build snippets with ``ts_headline`` in one query over the given rows only."""
+        _field, config = search_vector_config(language)
+        search_query = SearchQuery(query, config=config)
+        markers = {'start_sel': MARK_START, 'stop_sel': MARK_END, 'config': config}
+        rows = Product.objects.filter(pk__in=product_ids).annotate(
+            title_headline=SearchHeadline('title', search_query, highlight_all=True, **markers),
+            description_headline=SearchHeadline(
+                'description',
+                search_query,
+                max_words=max_words,
+                min_words=max(1, max_words // 2),
+                **markers,
+            ),
+        ).order_by().values_list('pk', 'title_headline', 'description_headline')
+        return {
+            pk: {'title': render(title), 'description': render(description)}
+            for pk, title, description in rows
+        }
@@ -1,7 +1,63 @@
+from django.db.models import BooleanField, ExpressionWrapper, Q
 from rest_framework import serializers
 
 from .models import Brand, Category, Media, Product
 
+# ``Product.in_stock`` as a SQL expression
+IN_STOCK_SQL = ExpressionWrapper(Q(stock__gt=0), output_field=BooleanField())
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer honouring the ``fields`` and ``expand`` context entries that
+    the catalog viewsets set from ``?fields=`` and ``?expand=``.
+
+    ``fields`` (a set, or None for every field) selects the rendered fields;
+    ``id`` is always kept. ``expand`` (a set, or None for the default) selects
+    which ``expandable_fields`` relations are nested; the others are rendered
+    as primary keys. Only the top-level serializer is trimmed.
+
+    With the ``side_load`` context entry, each ``side_loaded_fields``
+    relation is rendered as a ``<name>_id`` primary key instead, for the view
+    to emit the related objects once each.
+    """
+
+    expandable_fields = ()
+    # Relation name -> key of its objects in a side-loaded ``included`` section
+    side_loaded_fields = {}
+    # Model fields read by serializer fields that are not model fields
+    field_sources = {}
+
+    def _is_top_level(self):
+        parent = getattr(self, 'parent', None)
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self._is_top_level():
+            return fields
+        requested = self.context.get('fields')
+        if requested is not None:
+            fields = {name: field for name, field in fields.items() if name in requested or name == 'id'}
+        if self.context.get('side_load'):
+            fields = {
+                f'{name}_id' if name in self.side_loaded_fields else name: (
+                    serializers.PrimaryKeyRelatedField(source=name, read_only=True)
+                    if name in self.side_loaded_fields
+                    else field
+                )
+                for name, field in fields.items()
+            }
+        expand = self.context.get('expand')
+        if expand is not None:
+            for name in self.expandable_fields:
+                if name in fields and name not in expand:
+                    many = isinstance(fields[name], serializers.ListSerializer)
+                    fields[name] = serializers.PrimaryKeyRelatedField(read_only=True, many=many)
+        return fields
+
 
 class MediaSerializer(serializers.ModelSerializer):
     """Media serializer."""
@@ -11,7 +67,15 @@ class MediaSerializer(serializers.ModelSerializer):
         fields = ['id', 'url', 'alt_text', 'width', 'height', 'order']
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class PrimaryImageSerializer(serializers.ModelSerializer):
+    """A product's first media, for list cards."""
+
+    class Meta:
+        model = Media
+        fields = ['url', 'alt_text', 'width', 'height']
+
+
+class CategorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Category serializer."""
 
     class Meta:
@@ -19,7 +83,7 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'slug', 'parent', 'description', 'created_at']
 
 
-class BrandSerializer(serializers.ModelSerializer):
+class BrandSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Brand serializer."""
 
     class Meta:
@@ -27,11 +91,20 @@ class BrandSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'slug', 'description', 'logo_url', 'created_at']
 
 
-class ProductListSerializer(serializers.ModelSerializer):
+class ProductListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Product list serializer (minimal fields)."""
 
     brand = BrandSerializer(read_only=True)
     category = CategorySerializer(read_only=True)
+    primary_image = PrimaryImageSerializer(read_only=True)
+
+    expandable_fields = ('brand', 'category', 'primary_image')
+    side_loaded_fields = {'brand': 'brands', 'category': 'categories'}
+    field_sources = {'in_stock': ('stock',)}
+    # ``Product.in_stock`` computed from a values row (see ``rows.RowSerializer``)
+    row_computed_fields = {'in_stock': (('stock',), lambda stock: stock > 0)}
+    # The same as SQL (see ``dbjson.DatabaseJSONSerializer``)
+    sql_computed_fields = {'in_stock': IN_STOCK_SQL}
 
     class Meta:
         model = Product
@@ -43,18 +116,23 @@ class ProductListSerializer(serializers.ModelSerializer):
             'currency',
             'brand',
             'category',
+            'primary_image',
             'in_stock',
             'created_at',
         ]
 
 
-class ProductDetailSerializer(serializers.ModelSerializer):
+class ProductDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Product detail serializer (full fields)."""
 
     brand = BrandSerializer(read_only=True)
     category = CategorySerializer(read_only=True)
     media = MediaSerializer(many=True, read_only=True)
 
+    expandable_fields = ('brand', 'category', 'media')
+    field_sources = {'in_stock': ('stock',)}
+    sql_computed_fields = {'in_stock': IN_STOCK_SQL}
+
     class Meta:
         model = Product
         fields = [
@@ -0,0 +1,224 @@
+"""Signal handlers keeping denormalized catalog data in sync."""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import suggest
+from .caching import (
+    BRAND_VERSION_CACHE_KEY,
+    CATEGORY_TREE_VERSION_CACHE_KEY,
+    bump_catalog_version,
+    bump_version,
+)
+from .models import (
+    PRODUCT_COUNT_SOURCE_FIELDS,
+    SEARCH_INDEX_SOURCE_FIELDS,
+    SUGGEST_SOURCE_FIELDS,
+    Brand,
+    Category,
+    Media,
+    Product,
+    product_bulk_write,
+)
+from .search import get_search_backend
+
+# Media fields that decide which media is its product's primary image
+PRIMARY_IMAGE_SOURCE_FIELDS = frozenset({'product', 'product_id', 'order', 'created_at'})
+
+
+@receiver(post_save, sender=Brand)
+@receiver(post_save, sender=Category)
+def refresh_product_search_vectors(sender, instance, created, update_fields=None, **kwargs):
+    """Re-index products when the brand or category name they embed changes."""
+    if update_fields is not None and 'name' not in update_fields:
+        return
+    loaded_name = getattr(instance, '_loaded_name', None)
+    instance._loaded_name = instance.name
+    if created or loaded_name == instance.name:
+        return
+    instance.products.all().update_search_vector()
+    reindex_products(list(instance.products.values_list('pk', flat=True)))
+
+
+@receiver(pre_delete, sender=Brand)
+@receiver(pre_delete, sender=Category)
+def remember_orphaned_products(sender, instance, **kwargs):
+    """Record products that will lose their brand/category on delete."""
+    instance._orphaned_product_ids = list(instance.products.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Brand)
+@receiver(post_delete, sender=Category)
+def refresh_orphaned_products(sender, instance, **kwargs):
+    """Drop the deleted brand/category name from its former products' vectors."""
+    product_ids = getattr(instance, '_orphaned_product_ids', None)
+    if product_ids:
+        Product.objects.filter(pk__in=product_ids).update_search_vector()
+        reindex_products(product_ids)
+
+
+def reindex_products(product_ids):
+    """Update the search backend's index once the current transaction commits."""
+    transaction.on_commit(lambda: get_search_backend().index_products(product_ids))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def reindex_product(sender, instance, **kwargs):
+    reindex_products([instance.pk])
+
+
+@receiver(product_bulk_write, sender=Product)
+def reindex_bulk_products(sender, pks, fields, **kwargs):
+    if fields is not None and not SEARCH_INDEX_SOURCE_FIELDS.intersection(fields):
+        return
+    if pks is None:
+        transaction.on_commit(lambda: get_search_backend().rebuild())
+    else:
+        reindex_products(pks)
+
+
+def _product_refs(product):
+    refs = [(suggest.PRODUCT, product.pk)]
+    if product.brand_id:
+        refs.append((suggest.BRAND, product.brand_id))
+    if product.category_id:
+        refs.append((suggest.CATEGORY, product.category_id))
+    return refs
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def publish_product_suggestions(sender, instance, **kwargs):
+    """Refresh the product and its brand/category in every worker's autocomplete index."""
+    suggest.publish_changes(_product_refs(instance))
+
+
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+def publish_brand_suggestions(sender, instance, **kwargs):
+    suggest.publish_changes([(suggest.BRAND, instance.pk)])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def publish_category_suggestions(sender, instance, **kwargs):
+    suggest.publish_changes([(suggest.CATEGORY, instance.pk)])
+
+
+@receiver(product_bulk_write, sender=Product)
+def publish_bulk_product_suggestions(sender, pks, fields, **kwargs):
+    if fields is not None and not SUGGEST_SOURCE_FIELDS.intersection(fields):
+        return
+    if pks is None:
+        suggest.publish_changes(suggest.REBUILD)
+    else:
+        suggest.publish_changes([(suggest.PRODUCT, pk) for pk in pks])
+
+
+def _add_products(group, delta, using):
+    if group is None:
+        return
+    category_id, brand_id = group
+    if category_id is not None:
+        Category.objects.using(using).add_products(category_id, delta)
+    if brand_id is not None:
+        Brand.objects.using(using).add_products(brand_id, delta)
+
+
+def recount_product_groups(groups, using):
+    """Recount the categories (with their ancestors) and brands of ``(category_id, brand_id)`` pairs."""
+    category_ids = {category_id for category_id, _ in groups if category_id is not None}
+    brand_ids = {brand_id for _, brand_id in groups if brand_id is not None}
+    if category_ids:
+        Category.objects.using(using).filter(pk__in=category_ids).with_ancestors().recount_products()
+    if brand_ids:
+        Brand.objects.using(using).filter(pk__in=brand_ids).recount_products()
+
+
+@receiver(post_save, sender=Product)
+def update_product_counts(sender, instance, created, using, update_fields=None, **kwargs):
+    """Move the product between the active-product counts it adds to."""
+    if update_fields is not None and not PRODUCT_COUNT_SOURCE_FIELDS.intersection(update_fields):
+        return
+    group = instance.count_group
+    if created:
+        previous = None
+    elif hasattr(instance, '_loaded_count_group'):
+        previous = instance._loaded_count_group
+    else:
+        # Built without its loaded state: only the current counts can be repaired
+        if group is not None:
+            recount_product_groups({group}, using)
+        return
+    if previous != group:
+        _add_products(previous, -1, using)
+        _add_products(group, 1, using)
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_counts(sender, instance, using, **kwargs):
+    _add_products(instance.count_group, -1, using)
+
+
+@receiver(post_save, sender=Media)
+@receiver(post_delete, sender=Media)
+def update_primary_image(sender, instance, using, update_fields=None, **kwargs):
+    """Re-pick the primary image of the media's product, and of its previous product on a move."""
+    if update_fields is not None and not PRIMARY_IMAGE_SOURCE_FIELDS.intersection(update_fields):
+        return
+    product_ids = {instance.product_id, getattr(instance, '_loaded_product_id', instance.product_id)}
+    Product.objects.using(using).filter(pk__in=product_ids).update_primary_images()
+    instance._loaded_product_id = instance.product_id
+
+
+@receiver(product_bulk_write, sender=Product)
+def recount_bulk_product_groups(sender, using, groups=None, **kwargs):
+    if groups:
+        recount_product_groups(groups, using)
+
+
+@receiver(post_delete, sender=Category)
+def recount_deleted_category_ancestors(sender, instance, using, **kwargs):
+    """Drop the deleted subtree's products from the ancestors' subtree counts."""
+    Category.objects.using(using).filter(pk__in=instance.ancestor_ids).recount_products()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(product_bulk_write, sender=Product)
+def invalidate_catalog_caches(sender, **kwargs):
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_tree(sender, **kwargs):
+    bump_version(CATEGORY_TREE_VERSION_CACHE_KEY)
+
+
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+def invalidate_brand_slugs(sender, **kwargs):
+    bump_version(BRAND_VERSION_CACHE_KEY)
+
+
+def create_postgres_extensions(using, **kwargs):
+    """
+    Ensure pg_trgm exists before catalog tables are created.
+
+    Migration 0004 installs it too; this covers databases built without
+    migrations, such as the ``--nomigrations`` test database.
+    """
+    from django.db import connections
+
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
@@ -0,0 +1,62 @@
+"""
+Cached slug to id resolution for brand and category filters.
+
+Filtering products on ``brand_id IN (...)`` instead of joining and comparing
+``UPPER(brand.slug)`` lets the database use the product foreign key indexes.
+The slug to id map of each model is cached whole, keyed on a version counter
+that only writes to that model bump.
+"""
+
+from functools import reduce
+from operator import or_
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from .caching import (
+    BRAND_VERSION_CACHE_KEY,
+    CATEGORY_TREE_VERSION_CACHE_KEY,
+    get_version,
+)
+from .models import Brand, Category
+
+SLUG_MAP_CACHE_KEY = 'catalog:slugs:{model}:{version}'
+# Entries are replaced through the versions; the TTL only bounds orphans
+SLUG_MAP_CACHE_TTL = 24 * 60 * 60
+VERSION_CACHE_KEYS = {
+    Brand: BRAND_VERSION_CACHE_KEY,
+    Category: CATEGORY_TREE_VERSION_CACHE_KEY,
+}
+
+
+def get_slug_map(model):
+    """Return ``{casefolded slug: [ids]}`` for every row of ``model``."""
+    version = get_version(VERSION_CACHE_KEYS[model])
+    key = SLUG_MAP_CACHE_KEY.format(model=model._meta.model_name, version=version)
+    slug_map = cache.get(key)
+    if slug_map is None:
+        slug_map = {}
+        for slug, pk in model.objects.order_by().values_list('slug', 'pk'):
+            slug_map.setdefault(slug.casefold(), []).append(pk)
+        cache.set(key, slug_map, timeout=SLUG_MAP_CACHE_TTL)
+    return slug_map
+
+
+def resolve_slugs(model, slugs):
+    """
+    Return the ids of the ``model`` rows whose slug matches one of ``slugs``
+    case-insensitively.
+    """
+    slug_map = get_slug_map(model)
+    ids, missing = [], []
+    for slug in slugs:
+        if slug.casefold() in slug_map:
+            ids.extend(slug_map[slug.casefold()])
+        else:
+            missing.append(slug)
+    if missing:
+        # Rows written since the map was cached (its version is bumped on
+        # commit); unknown slugs are rare enough to look up directly
+        lookup = reduce(or_, (Q(slug__iexact=slug) for slug in missing))
+        ids.extend(model.objects.filter(lookup).values_list('pk', flat=True))
+    return ids
@@ -0,0 +1,110 @@
+"""
+"Did you mean" corrections drawn from the catalog vocabulary.
+
+``refresh_vocabulary`` rebuilds the ``SearchTerm`` table from active product
+text; ``did_you_mean`` maps each word of a query to its closest vocabulary
+word through the trigram index on ``SearchTerm.word``, one indexed lookup per
+word and no scan over the product table.
+"""
+
+import difflib
+import re
+from collections import Counter
+
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connection, transaction
+
+from .models import Brand, Category, Product, SearchTerm
+
+MIN_WORD_LENGTH = 3
+MAX_WORD_LENGTH = SearchTerm._meta.get_field('word').max_length
+
+_WORD_RE = re.compile(r'\w+')
+
+VOCABULARY_SQL = """
+    INSERT INTO {terms} (word, ndoc, nentry)
+    SELECT word, ndoc, nentry
+    FROM ts_stat($$
+        SELECT to_tsvector('simple', concat_ws(' ', p.title, p.description, b.name, c.name))
+        FROM {products} p
+        LEFT JOIN {brands} b ON b.id = p.brand_id
+        LEFT JOIN {categories} c ON c.id = p.category_id
+        WHERE p.is_active
+    $$)
+    WHERE length(word) BETWEEN %s AND %s AND word ~ '^[[:alpha:]]+$'
+"""
+
+
+def tokenize(text):
+    """Split text into lowercase vocabulary words."""
+    return [
+        word for word in _WORD_RE.findall(text.casefold())
+        if MIN_WORD_LENGTH <= len(word) <= MAX_WORD_LENGTH and word.isalpha()
+    ]
+
+
+def _refresh_vocabulary_python():
+    ndoc, nentry = Counter(), Counter()
+    products = Product.objects.filter(is_active=True).values_list(
+        'title', 'description', 'brand__name', 'category__name'
+    )
+    for fields in products.iterator():
+        words = tokenize(' '.join(value for value in fields if value))
+        nentry.update(words)
+        ndoc.update(set(words))
+    SearchTerm.objects.bulk_create(
+        [SearchTerm(word=word, ndoc=ndoc[word], nentry=count) for word, count in nentry.items()],
+        batch_size=1000,
+    )
+
+
+def refresh_vocabulary():
+    """Rebuild the vocabulary table from active products. Returns the number of words."""
+    with transaction.atomic():
+        SearchTerm.objects.all().delete()
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    VOCABULARY_SQL.format(
+                        terms=SearchTerm._meta.db_table,
+                        products=Product._meta.db_table,
+                        brands=Brand._meta.db_table,
+                        categories=Category._meta.db_table,
+                    ),
+                    [MIN_WORD_LENGTH, MAX_WORD_LENGTH],
+                )
+        else:
+            _refresh_vocabulary_python()
+    return SearchTerm.objects.count()
+
+
+def closest_word(word):
+    """Return the vocabulary word closest to ``word``, or None."""
+    if connection.vendor == 'postgresql':
+        return (
+            SearchTerm.objects.filter(word__trigram_similar=word)
+            .annotate(similarity=TrigramSimilarity('word', word))
+            .order_by('-similarity', '-ndoc')
+            .values_list('word', flat=True)
+            .first()
+        )
+    matches = difflib.get_close_matches(
+        word, SearchTerm.objects.values_list('word', flat=True), n=1, cutoff=0.7
+    )
+    return matches[0] if matches else None
+
+
+def did_you_mean(query):
+    """
+    Suggest a corrected query, or None when every word is already known.
+
+    Words too short to correct are kept as typed.
+    """
+    words = _WORD_RE.findall(query.casefold())
+    corrected = [
+        (closest_word(word) or word) if len(word) >= MIN_WORD_LENGTH else word
+        for word in words
+    ]
+    if corrected == words:
+        return None
+    return ' '.join(corrected)
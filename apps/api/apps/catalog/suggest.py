@@ -0,0 +1,201 @@
+"""
+In-memory prefix index serving product autocomplete.
+
+Each worker process keeps a ``SuggestionIndex`` built from the titles of
+active products and the names of brands and categories. Entries are stored as
+a sorted array of ``(key, ref)`` pairs, where every word of a phrase starts a
+key, so a prefix lookup is two binary searches plus a top-N selection over the
+matching slice.
+
+Writes publish the changed rows to a versioned change log in the cache. Each
+worker polls the version at most every ``CATALOG_SUGGEST_SYNC_INTERVAL``
+seconds and reloads only the changed rows; it falls back to a full rebuild
+when change records have expired, too many changes piled up or the version
+counter was evicted. Like the catalog versions (see ``caching``), the counter
+starts from the clock, so a recreated counter never repeats old versions.
+"""
+
+import heapq
+import math
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict
+from itertools import chain
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .caching import get_version, incr_version
+from .models import Brand, Category, Product
+
+PRODUCT = 'product'
+BRAND = 'brand'
+CATEGORY = 'category'
+
+VERSION_CACHE_KEY = 'catalog:suggest:version'
+CHANGE_CACHE_KEY = 'catalog:suggest:change:{}'
+CHANGE_TTL = 60 * 60
+# Workers further behind than this many versions rebuild instead of applying changes
+MAX_APPLIED_CHANGES = 1000
+
+# Published instead of a list of refs when the changed rows are unknown
+REBUILD = 'rebuild'
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def normalize(text):
+    """Casefold and collapse whitespace so keys and prefixes compare equal."""
+    return ' '.join(text.casefold().split())
+
+
+def _score(kind, popularity):
+    return settings.CATALOG_SUGGEST_WEIGHTS[kind] * (1 + math.log1p(popularity))
+
+
+class SuggestionIndex:
+    """Sorted-array prefix index over product, brand and category phrases."""
+
+    def __init__(self):
+        self._keys = []  # sorted (key, ref) pairs
+        self._entries = {}  # ref -> suggestion payload
+        self._entry_keys = {}  # ref -> keys inserted for it
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, ref, text, slug, score):
+        """Insert or replace the entry identified by ``ref`` (a ``(kind, pk)`` tuple)."""
+        self.remove(ref)
+        for key in self._set_entry(ref, text, slug, score):
+            insort(self._keys, (key, ref))
+
+    def _set_entry(self, ref, text, slug, score):
+        """Record the entry for ``ref`` and return its keys, without inserting them."""
+        phrase = normalize(text)
+        keys = {phrase[match.start():] for match in _WORD_RE.finditer(phrase)}
+        self._entry_keys[ref] = keys
+        self._entries[ref] = {'text': text, 'type': ref[0], 'slug': slug, 'score': round(score, 4)}
+        return keys
+
+    def remove(self, ref):
+        for key in self._entry_keys.pop(ref, ()):
+            position = bisect_left(self._keys, (key, ref))
+            if position < len(self._keys) and self._keys[position] == (key, ref):
+                del self._keys[position]
+        self._entries.pop(ref, None)
+
+    def clear(self):
+        self._keys = []
+        self._entries = {}
+        self._entry_keys = {}
+
+    def lookup(self, prefix, limit):
+        """Return up to ``limit`` entries with a word starting with ``prefix``, best first."""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        start = bisect_left(self._keys, (prefix,))
+        end = bisect_left(self._keys, (prefix + '\U0010ffff',), lo=start)
+        refs = {ref for _key, ref in self._keys[start:end]}
+        entries = (self._entries[ref] for ref in refs)
+        return heapq.nlargest(
+            limit, entries, key=lambda entry: (entry['score'], -len(entry['text']))
+        )
+
+    # Loading from the database
+
+    def _product_rows(self, queryset):
+        for pk, title, slug, stock in queryset.values_list('pk', 'title', 'slug', 'stock'):
+            yield (PRODUCT, pk), title, slug, _score(PRODUCT, int(stock > 0))
+
+    def _group_rows(self, kind, queryset):
+        for pk, name, slug, count in queryset.values_list('pk', 'name', 'slug', 'product_count'):
+            yield (kind, pk), name, slug, _score(kind, count)
+
+    def _load(self, rows):
+        for row in rows:
+            self.add(*row)
+
+    def rebuild(self):
+        """Reload every entry, sorting all keys once rather than inserting them one by one."""
+        self.clear()
+        rows = chain(
+            self._product_rows(Product.objects.filter(is_active=True)),
+            self._group_rows(BRAND, Brand.objects.all()),
+            self._group_rows(CATEGORY, Category.objects.all()),
+        )
+        keys = []
+        for ref, text, slug, score in rows:
+            keys.extend((key, ref) for key in self._set_entry(ref, text, slug, score))
+        keys.sort()
+        self._keys = keys
+
+    def apply(self, refs):
+        """Reload the given ``(kind, pk)`` refs from the database."""
+        by_kind = defaultdict(set)
+        for kind, pk in refs:
+            by_kind[kind].add(pk)
+        for kind, pks in by_kind.items():
+            for pk in pks:
+                self.remove((kind, pk))
+        if by_kind[PRODUCT]:
+            self._load(self._product_rows(Product.objects.filter(pk__in=by_kind[PRODUCT], is_active=True)))
+        if by_kind[BRAND]:
+            self._load(self._group_rows(BRAND, Brand.objects.filter(pk__in=by_kind[BRAND])))
+        if by_kind[CATEGORY]:
+            self._load(self._group_rows(CATEGORY, Category.objects.filter(pk__in=by_kind[CATEGORY])))
+
+    # Change log synchronisation
+
+    def sync(self):
+        """Bring the index up to date with the published change log."""
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < settings.CATALOG_SUGGEST_SYNC_INTERVAL:
+            return
+        with self._lock:
+            self._checked_at = now
+            current = get_version(VERSION_CACHE_KEY)
+            if self._version is None or not 0 <= current - self._version <= MAX_APPLIED_CHANGES:
+                self.rebuild()
+            elif current > self._version:
+                keys = [CHANGE_CACHE_KEY.format(v) for v in range(self._version + 1, current + 1)]
+                changes = cache.get_many(keys)
+                if len(changes) < len(keys) or REBUILD in changes.values():
+                    self.rebuild()
+                else:
+                    self.apply(ref for key in keys for ref in changes[key])
+            self._version = current
+
+    def invalidate(self):
+        """Force a full rebuild on the next lookup."""
+        self._version = None
+
+    def suggest(self, prefix, limit):
+        self.sync()
+        with self._lock:
+            return self.lookup(prefix, limit)
+
+
+suggestion_index = SuggestionIndex()
+
+
+def publish_changes(refs):
+    """
+    Record changed ``(kind, pk)`` refs, or ``REBUILD``, for every worker's index.
+
+    Publishing waits for the surrounding transaction to commit so workers never
+    reload rows before they are visible.
+    """
+
+    def publish():
+        version = incr_version(VERSION_CACHE_KEY)
+        cache.set(CHANGE_CACHE_KEY.format(version), refs, timeout=CHANGE_TTL)
+
+    transaction.on_commit(publish)
@@ -0,0 +1,9 @@
+"""Custom throttle classes for catalog endpoints."""
+
+from rest_framework.throttling import AnonRateThrottle
+
+
+class SuggestRateThrottle(AnonRateThrottle):
+    """Throttle for autocomplete - called on every keystroke, so far above the anon default."""
+    scope = 'suggest'
+    rate = '120/min'
@@ -0,0 +1,59 @@
+"""
+Prebuilt category tree for navigation menus.
+
+The nested tree is built from one query and cached as a ready-to-render
+payload. It is keyed on the category tree version, which only category writes
+bump; the variant with product counts is also keyed on the catalog version.
+"""
+
+from django.core.cache import cache
+
+from .caching import CATEGORY_TREE_VERSION_CACHE_KEY, catalog_version, get_version
+from .models import Category
+
+TREE_CACHE_KEY = 'catalog:category_tree:{version}'
+TREE_WITH_COUNTS_CACHE_KEY = 'catalog:category_tree:{version}:counts:{catalog_version}'
+# Entries are replaced through the versions; the TTLs only bound orphans
+TREE_CACHE_TTL = 24 * 60 * 60
+TREE_WITH_COUNTS_CACHE_TTL = 60 * 60
+
+
+def build_category_tree(with_counts=False):
+    """
+    Return the root categories as nested ``{'id', 'name', 'slug', 'children'}``
+    nodes, siblings ordered by name.
+
+    With ``with_counts`` each node also gets ``product_count``, the stored
+    number of active products in the category and all its descendants.
+    """
+    fields = ['id', 'name', 'slug', 'parent_id']
+    if with_counts:
+        fields.append('subtree_product_count')
+    rows = Category.objects.order_by('name').values(*fields)
+
+    nodes, roots = {}, []
+    for row in rows:
+        node = {'id': row['id'], 'name': row['name'], 'slug': row['slug'], 'children': []}
+        if with_counts:
+            node['product_count'] = row['subtree_product_count']
+        nodes[row['id']] = (node, row['parent_id'])
+    for node, parent_id in nodes.values():
+        parent = nodes.get(parent_id)
+        (parent[0]['children'] if parent else roots).append(node)
+    return roots
+
+
+def get_category_tree(with_counts=False):
+    """Return the cached category tree, building it on a miss."""
+    version = get_version(CATEGORY_TREE_VERSION_CACHE_KEY)
+    if with_counts:
+        key = TREE_WITH_COUNTS_CACHE_KEY.format(version=version, catalog_version=catalog_version())
+        timeout = TREE_WITH_COUNTS_CACHE_TTL
+    else:
+        key = TREE_CACHE_KEY.format(version=version)
+        timeout = TREE_CACHE_TTL
+    tree = cache.get(key)
+    if tree is None:
+        tree = build_category_tree(with_counts)
+        cache.set(key, tree, timeout=timeout)
+    return tree
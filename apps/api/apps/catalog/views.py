@@ -1,18 +1,52 @@
-from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
-from django.db.models import Q
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch, Q
+from django.http import Http404, HttpResponse
 from django_filters import rest_framework as django_filters
+from django_filters import utils as filter_utils
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, viewsets
+from rest_framework import filters, serializers, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import BasePermission
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 
-from .models import Brand, Category, Product
+from apps.core.pagination import (
+    KeysetPagination,
+    StandardResultsPagination,
+    TruncatedList,
+)
+from apps.core.renderers import StreamingJSONRenderer, StreamingResponseMixin
+
+from .caching import catalog_version
+from .dbjson import DatabaseJSONSerializer, JSONFragment, render_json
+from .facets import ATTRIBUTE_PARAM_PREFIX, get_attribute_keys, get_facets
+from .models import (
+    Brand,
+    Category,
+    Product,
+    ProductAttribute,
+    canonical_attribute_value,
+)
+from .rows import RowSerializer
+from .search import ProductSearchFilter, get_search_backend
+from .search.cache import get_ranked_ids, search_stats
 from .serializers import (
     BrandSerializer,
     CategorySerializer,
     ProductDetailSerializer,
     ProductListSerializer,
 )
+from .slugs import resolve_slugs
+from .spelling import did_you_mean
+from .suggest import suggestion_index
+from .throttles import SuggestRateThrottle
+from .tree import get_category_tree
+
+
+class CharInFilter(django_filters.BaseInFilter, django_filters.CharFilter):
+    """Comma-separated list of values."""
 
 
 class ProductFilter(django_filters.FilterSet):
@@ -20,30 +54,62 @@ class ProductFilter(django_filters.FilterSet):
     Advanced product filtering with price range and attribute queries.
 
     Supported filters:
-    - category: Category slug
-    - brand: Brand slug
+    - category: Comma-separated category slugs
+    - brand: Comma-separated brand slugs
     - min_price: Minimum price
     - max_price: Maximum price
     - in_stock: Boolean filter for stock availability
-    - color: Filter by color attribute
-    - material: Filter by material attribute
-    - size: Filter by size attribute
+    - weight_min, weight_max: Weight range in grams
+    - width_min, width_max, height_min, height_max, depth_min, depth_max:
+      Dimension ranges in centimetres
+    - attr.<key>: Filter by any attribute, e.g. ``attr.color=red,blue``
+    - color, material: Match values containing any of the given ones, as
+      before ``attr.<key>`` existed (``color=blue`` matches "Navy Blue")
+    - size: Shorthand for ``attr.size``
+
+    Attribute values match case-insensitively and comma-separated values
+    match any of them. They are looked up in the indexed ``ProductAttribute``
+    rows instead of the JSON column.
     """
 
-    category = django_filters.CharFilter(field_name='category__slug', lookup_expr='iexact')
-    brand = django_filters.CharFilter(field_name='brand__slug', lookup_expr='iexact')
+    category = CharInFilter(method='filter_category')
+    brand = CharInFilter(method='filter_brand')
     min_price = django_filters.NumberFilter(field_name='price', lookup_expr='gte')
     max_price = django_filters.NumberFilter(field_name='price', lookup_expr='lte')
     in_stock = django_filters.BooleanFilter(method='filter_in_stock')
 
-    # Attribute filters (JSON field queries)
-    color = django_filters.CharFilter(method='filter_color')
-    material = django_filters.CharFilter(method='filter_material')
-    size = django_filters.CharFilter(method='filter_size')
+    # Measurement ranges over the columns normalized from the attributes, so
+    # they hold whatever unit a product was entered in
+    weight_min = django_filters.NumberFilter(field_name='weight_grams', lookup_expr='gte')
+    weight_max = django_filters.NumberFilter(field_name='weight_grams', lookup_expr='lte')
+    width_min = django_filters.NumberFilter(field_name='width_cm', lookup_expr='gte')
+    width_max = django_filters.NumberFilter(field_name='width_cm', lookup_expr='lte')
+    height_min = django_filters.NumberFilter(field_name='height_cm', lookup_expr='gte')
+    height_max = django_filters.NumberFilter(field_name='height_cm', lookup_expr='lte')
+    depth_min = django_filters.NumberFilter(field_name='depth_cm', lookup_expr='gte')
+    depth_max = django_filters.NumberFilter(field_name='depth_cm', lookup_expr='lte')
+
+    # Shorthands for the most common attribute filters
+    color = CharInFilter(method='filter_attribute_contains')
+    material = CharInFilter(method='filter_attribute_contains')
+    size = CharInFilter(method='filter_attribute')
 
     class Meta:
         model = Product
-        fields = ['category', 'brand', 'min_price', 'max_price', 'in_stock', 'color', 'material', 'size']
+        fields = [
+            'category', 'brand', 'min_price', 'max_price', 'in_stock',
+            'weight_min', 'weight_max', 'width_min', 'width_max',
+            'height_min', 'height_max', 'depth_min', 'depth_max',
+            'color', 'material', 'size',
+        ]
+
+    def filter_category(self, queryset, name, value):
+        """Filter on the category ids of the slugs, so no join is needed."""
+        return queryset.filter(category_id__in=resolve_slugs(Category, value))
+
+    def filter_brand(self, queryset, name, value):
+        """Filter on the brand ids of the slugs, so no join is needed."""
+        return queryset.filter(brand_id__in=resolve_slugs(Brand, value))
 
     def filter_in_stock(self, queryset, name, value):
         """Filter products by stock availability."""
@@ -51,145 +117,669 @@ class ProductFilter(django_filters.FilterSet):
             return queryset.filter(stock__gt=0)
         return queryset.filter(stock=0)
 
-    def filter_color(self, queryset, name, value):
-        """Filter by color attribute in JSON field."""
-        return queryset.filter(attributes__color__icontains=value)
+    def filter_attribute(self, queryset, name, value):
+        """Filter by products having any of the values for attribute ``name``."""
+        matches = ProductAttribute.objects.filter(
+            key=canonical_attribute_value(name),
+            value__in=[canonical_attribute_value(item) for item in value],
+        )
+        return queryset.filter(pk__in=matches.values('product_id'))
+
+    def filter_attribute_contains(self, queryset, name, value):
+        """Filter by products with a value for attribute ``name`` containing any of the values."""
+        condition = Q()
+        for item in value:
+            condition |= Q(value__contains=canonical_attribute_value(item))
+        matches = ProductAttribute.objects.filter(condition, key=canonical_attribute_value(name))
+        return queryset.filter(pk__in=matches.values('product_id'))
+
+    def get_attribute_filters(self):
+        """``{key: values}`` of the ``attr.<key>`` parameters."""
+        attribute_filters = {}
+        for param in self.data:
+            key = param[len(ATTRIBUTE_PARAM_PREFIX):]
+            if not param.startswith(ATTRIBUTE_PARAM_PREFIX) or not key:
+                continue
+            raw = self.data.getlist(param) if hasattr(self.data, 'getlist') else [self.data[param]]
+            values = [item.strip() for item in ','.join(raw).split(',') if item.strip()]
+            if values:
+                attribute_filters[key] = values
+        return attribute_filters
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        for key, values in self.get_attribute_filters().items():
+            queryset = self.filter_attribute(queryset, key, values)
+        return queryset
 
-    def filter_material(self, queryset, name, value):
-        """Filter by material attribute in JSON field."""
-        return queryset.filter(attributes__material__icontains=value)
 
-    def filter_size(self, queryset, name, value):
-        """Filter by size attribute in JSON field."""
-        return queryset.filter(attributes__size__iexact=value)
+class SparseFieldsetViewMixin:
+    """
+    ``?fields=a,b`` and ``?expand=brand`` for the serializer of the
+    ``sparse_fieldset_actions`` (see ``serializers.SparseFieldsetMixin``).
 
+    Besides trimming the output, the queryset only loads the columns,
+    ``select_related`` joins and prefetches that the trimmed serializer
+    reads. ``expand=`` with no value renders every relation as an id.
+    """
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+    sparse_fieldset_actions = ('list', 'retrieve')
+    # Columns loaded whatever fields are requested
+    sparse_fieldset_required = ()
+
+    def _get_list_param(self, name):
+        if name not in self.request.query_params:
+            return None
+        values = ','.join(self.request.query_params.getlist(name)).split(',')
+        return {value.strip() for value in values if value.strip()}
+
+    def get_sparse_fieldset(self):
+        """Return the validated ``(fields, expand)`` sets of this request; None when absent."""
+        if not hasattr(self, '_sparse_fieldset'):
+            fields = expand = None
+            if self.action in self.sparse_fieldset_actions:
+                serializer_class = self.get_serializer_class()
+                fields, expand = self._get_list_param('fields'), self._get_list_param('expand')
+                unknown = {
+                    'fields': (fields or set()) - set(serializer_class().fields),
+                    'expand': (expand or set()) - set(serializer_class.expandable_fields),
+                }
+                errors = {
+                    param: [f'Unknown {param} values: {", ".join(sorted(names))}']
+                    for param, names in unknown.items()
+                    if names
+                }
+                if errors:
+                    raise ValidationError(errors)
+            self._sparse_fieldset = (fields, expand)
+        return self._sparse_fieldset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'], context['expand'] = self.get_sparse_fieldset()
+        return context
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in self.sparse_fieldset_actions:
+            queryset = self.load_serialized_only(queryset)
+        return queryset
+
+    def load_serialized_only(self, queryset):
+        """Restrict ``queryset`` to what the request's serializer renders."""
+        serializer = self.get_serializer()
+        model = queryset.model
+        only, related, prefetch = set(self.sparse_fieldset_required), [], []
+        for name, field in serializer.fields.items():
+            if isinstance(field, serializers.ListSerializer):
+                prefetch.append(field.source)
+            elif isinstance(field, serializers.ManyRelatedField):
+                relation = model._meta.get_field(field.source)
+                ids = relation.related_model.objects.only('pk', relation.field.name)
+                prefetch.append(Prefetch(field.source, queryset=ids))
+            elif isinstance(field, serializers.BaseSerializer):
+                related.append(field.source)
+                only.add(field.source)
+                nested_model = field.Meta.model
+                only.update(
+                    f'{field.source}__{column}'
+                    for nested_name, nested_field in field.fields.items()
+                    for column in _model_columns(nested_model, field, nested_name, nested_field)
+                )
+            else:
+                only.update(_model_columns(model, serializer, name, field))
+        return (
+            queryset.select_related(None)
+            .select_related(*related)
+            .prefetch_related(None)
+            .prefetch_related(*prefetch)
+            .only(*only)
+        )
+
+
+def _model_columns(model, serializer, name, field):
+    """Model fields read by serializer field ``name`` of ``serializer``."""
+    sources = getattr(serializer, 'field_sources', {}).get(name, (field.source,))
+    for source in sources:
+        try:
+            model._meta.get_field(source)
+        except FieldDoesNotExist:
+            continue
+        yield source
+
+
+class ProductListingMixin:
+    """Serve product sub-listings exactly like ``GET /products/``."""
+
+    def list_products(self, queryset):
+        """
+        Respond with ``queryset`` filtered, searched, ordered and paginated by
+        ``ProductViewSet`` from this request's query parameters.
+        """
+        view = ProductViewSet(
+            request=self.request,
+            args=self.args,
+            kwargs={},
+            format_kwarg=self.format_kwarg,
+            action='list',
+            queryset=queryset,
+        )
+        return view.list(self.request)
+
+
+class CategoryViewSet(
+    StreamingResponseMixin, SparseFieldsetViewMixin, ProductListingMixin, viewsets.ReadOnlyModelViewSet
+):
     """
     Category viewset with tree hierarchy support.
 
     Endpoints:
     - GET /categories/ - List all categories
+    - GET /categories/tree/ - Nested category tree (``counts=true`` adds product counts)
     - GET /categories/{slug}/ - Get category details
     - GET /categories/{slug}/children/ - Get child categories
-    - GET /categories/{slug}/products/ - Get products in category
+    - GET /categories/{slug}/products/ - Get products in category, with the
+      filters, ordering and pagination of /products/; ``include_descendants=true``
+      includes products of every subcategory
+
+    The list, detail and children endpoints accept ``fields``.
     """
 
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    renderer_classes = [StreamingJSONRenderer, BrowsableAPIRenderer]
     lookup_field = 'slug'
+    sparse_fieldset_actions = ('list', 'retrieve', 'children')
+
+    @action(detail=False, methods=['get'])
+    def tree(self, request):
+        """
+        Get the whole category tree as nested nodes.
+
+        Served from a prebuilt cached payload that is rebuilt, with one query,
+        after a category changes. With ``counts=true`` every node carries the
+        number of active products in its subtree.
+        """
+        with_counts = request.query_params.get('counts') in ('true', '1')
+        return Response(get_category_tree(with_counts))
 
     @action(detail=True, methods=['get'])
     def children(self, request, slug=None):
         """Get all child categories of this category."""
         category = self.get_object()
-        children = category.children.all()
+        children = self.load_serialized_only(category.children.all())
         serializer = self.get_serializer(children, many=True)
         return Response(serializer.data)
 
     @action(detail=True, methods=['get'])
     def products(self, request, slug=None):
-        """Get all products in this category."""
+        """Get the products in this category, optionally with its whole subtree."""
         category = self.get_object()
-        products = Product.objects.filter(
-            category=category, is_active=True
-        ).select_related('brand', 'category')
-        serializer = ProductListSerializer(products, many=True)
-        return Response(serializer.data)
+        if request.query_params.get('include_descendants') in ('true', '1'):
+            products = ProductViewSet.queryset.filter(category_id__in=category.subtree_ids())
+        else:
+            products = ProductViewSet.queryset.filter(category=category)
+        return self.list_products(products)
 
 
-class BrandViewSet(viewsets.ReadOnlyModelViewSet):
+class BrandViewSet(
+    StreamingResponseMixin, SparseFieldsetViewMixin, ProductListingMixin, viewsets.ReadOnlyModelViewSet
+):
     """
     Brand viewset.
 
     Endpoints:
     - GET /brands/ - List all brands
     - GET /brands/{slug}/ - Get brand details
-    - GET /brands/{slug}/products/ - Get products by brand
+    - GET /brands/{slug}/products/ - Get products by brand, with the filters,
+      ordering and pagination of /products/
+
+    The list and detail endpoints accept ``fields``.
     """
 
     queryset = Brand.objects.all()
     serializer_class = BrandSerializer
+    renderer_classes = [StreamingJSONRenderer, BrowsableAPIRenderer]
     lookup_field = 'slug'
 
     @action(detail=True, methods=['get'])
     def products(self, request, slug=None):
-        """Get all products by this brand."""
+        """Get the products of this brand."""
         brand = self.get_object()
-        products = Product.objects.filter(
-            brand=brand, is_active=True
-        ).select_related('brand', 'category')
-        serializer = ProductListSerializer(products, many=True)
-        return Response(serializer.data)
+        return self.list_products(ProductViewSet.queryset.filter(brand=brand))
+
+
+class ProductPagination(StandardResultsPagination):
+    """
+    Page-number pagination with cheap counts for the public product listing.
+
+    Unfiltered listings use the planner's estimate on large catalogs; filtered
+    counts are cached per filter set until the TTL or the next catalog write.
+    """
+
+    @property
+    def estimate_count_threshold(self):
+        return settings.CATALOG_ESTIMATED_COUNT_THRESHOLD
+
+    @property
+    def count_cache_timeout(self):
+        return settings.CATALOG_COUNT_CACHE_TTL
+
+    def get_count_cache_key(self, request, filter_params):
+        return f'{super().get_count_cache_key(request, filter_params)}:{catalog_version()}'
+
 
+# Opt-in ``layout`` values of product list responses
+LIST_LAYOUTS = ('compact', 'columnar')
 
-class ProductViewSet(viewsets.ReadOnlyModelViewSet):
+
+class ProductKeysetPagination(KeysetPagination):
+    """Cursor pagination over the product orderings backed by ``Product.Meta`` indexes."""
+
+    ordering_fields = ('-created_at', 'created_at', 'price', '-price', 'title', '-title')
+
+
+class ProductViewSet(StreamingResponseMixin, SparseFieldsetViewMixin, viewsets.ReadOnlyModelViewSet):
     """
     Advanced product viewset with filtering, search, sorting, and pagination.
 
     Query parameters:
-    - category: Filter by category slug
-    - brand: Filter by brand slug
+    - category: Filter by category slugs (comma-separated)
+    - brand: Filter by brand slugs (comma-separated)
     - min_price: Minimum price filter
     - max_price: Maximum price filter
     - in_stock: Filter by stock availability (true/false)
-    - color: Filter by color attribute
-    - material: Filter by material attribute
-    - size: Filter by size attribute
-    - q: Full-text search query (searches title, description, SKU)
+    - weight_min, weight_max: Weight range in grams
+    - width_min/width_max, height_min/height_max, depth_min/depth_max:
+      Dimension ranges in centimetres
+    - attr.<key>: Filter by any attribute value (comma-separated; keys listed
+      by /products/attributes/)
+    - color, material, size: Shorthands for attr.color, attr.material, attr.size
+    - q: Full-text search query (searches title, SKU, brand, category, description)
     - ordering: Sort by field (price, -price, created_at, -created_at)
     - page: Page number for pagination
+    - cursor: Keyset pagination cursor (see below)
     - page_size: Number of items per page
+    - fields: Comma-separated fields to render (``id`` is always included)
+    - expand: Comma-separated relations to nest (``brand``, ``category``,
+      ``primary_image`` on lists and ``media`` on the detail endpoint); the
+      others are rendered as ids. Without it every relation is nested.
+
+    - layout: ``compact`` or ``columnar`` list responses (see below)
+
+    ``fields`` and ``expand`` also trim the SQL: only the rendered columns
+    are loaded, and relations are only joined or prefetched when nested.
+
+    ``layout=compact`` rows reference ``brand_id`` and ``category_id``, and
+    each distinct brand and category is serialized once in an ``included``
+    object (``{"brands": [...], "categories": [...]}``). ``layout=columnar``
+    also turns ``results`` into one list of values per field.
+
+    List results carry ``primary_image``, the product's first media (lowest
+    ``order``), read through the denormalized ``Product.primary_image`` in
+    the listing query itself, so images cost no extra query.
+
+    ``count_exact`` is false when ``count`` is an estimate (large unfiltered
+    listings), so clients can render "about N results".
+
+    JSON is encoded with orjson, and pages of ``StreamingJSONRenderer.streaming_threshold``
+    items or more are streamed in chunks rather than rendered whole.
+
+    Extra endpoints:
+    - GET /products/batch/?slugs=a,b,c (or ?ids=1,2,3) - Several products, in request order
+    - GET /products/suggest/?prefix=wir&limit=8 - Autocomplete from an in-memory prefix index
+    - GET /products/facets/?<filters> - Brand, category and attribute counts plus a
+      price histogram; each facet ignores its own filter so values can be multi-selected
+
+    A search with no results adds a "did you mean" correction to the response
+    as ``suggestion`` (null when no correction is known). With
+    ``highlight=true``, each result of a search gets a ``highlight`` object
+    with marked-up title and description fragments (``highlight_words`` sets
+    the fragment length), computed for the returned page only.
+
+    List pages are read with ``values_list()`` and serialized by the compiled
+    ``RowSerializer`` (``CATALOG_FAST_SERIALIZATION``), which produces the
+    same output as ``ProductListSerializer`` without building model instances.
+    With ``CATALOG_DATABASE_JSON``, plain JSON list pages (no ``q``, cursor
+    or layout) and details are rendered by the database instead and written
+    to the response as is (see ``dbjson``).
+
+    The ranked ids of a search (up to ``CATALOG_SEARCH_MAX_RESULTS``) are
+    cached per normalized query and filter set until the catalog changes, so
+    further pages only load their own rows by primary key. Searches with more
+    matches page through the first ``CATALOG_SEARCH_MAX_RESULTS`` only, and
+    report every match as ``count`` with ``count_exact`` false.
+
+    Listings without ``q`` switch to keyset pagination when the ``cursor``
+    parameter is present (empty for the first page): responses carry
+    ``next``/``previous`` cursor links and no ``count``, and every page costs
+    the same as the first. Supported with each ``ordering`` (``-created_at``,
+    ``price``, ``-price``, ``title`` and their reverses).
 
     Examples:
     - /products/?category=electronics&brand=tech-inc
     - /products/?min_price=100&max_price=500
     - /products/?color=blue&in_stock=true
+    - /products/?attr.material=cotton,linen&attr.size=m
+    - /products/?weight_max=2000&width_max=40
+    - /products/?fields=id,title,slug,price&expand=
+    - /products/?layout=compact&page_size=100
     - /products/?q=wireless+headphones
     - /products/?ordering=-price&page=2
     """
 
     # Base queryset for router registration
     queryset = Product.objects.filter(is_active=True).select_related(
-        'brand', 'category'
+        'brand', 'category', 'primary_image'
     ).prefetch_related('media')
 
+    renderer_classes = [StreamingJSONRenderer, BrowsableAPIRenderer]
     lookup_field = 'slug'
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [
+        DjangoFilterBackend,
+        filters.SearchFilter,
+        filters.OrderingFilter,
+        ProductSearchFilter,
+    ]
     filterset_class = ProductFilter
+    pagination_class = ProductPagination
     search_fields = ['title', 'description', 'sku']
     ordering_fields = ['price', 'created_at', 'title']
     ordering = ['-created_at']
-
-    def get_queryset(self):
+    sparse_fieldset_actions = ('list', 'retrieve', 'batch')
+    # Keyset cursors read the ordering value of the page's first and last
+    # rows, and batches match the products they load by slug
+    sparse_fieldset_required = ('created_at', 'price', 'title', 'slug')
+
+    @property
+    def paginator(self):
+        """Use keyset pagination for non-search listings that ask for a cursor."""
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            cursor_param = ProductKeysetPagination.cursor_query_param
+            if cursor_param in params and not ProductSearchFilter().get_search_query(self.request):
+                self._paginator = ProductKeysetPagination()
+            else:
+                return super().paginator
+        return self._paginator
+
+    def get_layout(self):
+        """The requested ``layout`` of a list response, or None for the default."""
+        layout = self.request.query_params.get('layout')
+        if not layout or self.action != 'list':
+            return None
+        if layout not in LIST_LAYOUTS:
+            raise ValidationError({'layout': [f'Must be one of: {", ".join(LIST_LAYOUTS)}']})
+        return layout
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['side_load'] = self.get_layout() is not None
+        return context
+
+    def list(self, request, *args, **kwargs):
+        json_serializer = self.get_json_serializer()
+        if json_serializer is not None:
+            queryset = json_serializer.values(self.filter_queryset(self.get_queryset()))
+            page = self.paginate_queryset(queryset)
+            return self.json_response(self.get_paginated_response(json_serializer.render(page)).data)
+        return self.apply_layout(self.list_rows(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        json_serializer = self.get_json_serializer()
+        if json_serializer is None:
+            return super().retrieve(request, *args, **kwargs)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        text = json_serializer.values(queryset).first()
+        if text is None:
+            # As ``get_object_or_404()`` words it
+            raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+        return self.json_response(JSONFragment(text))
+
+    def list_rows(self, request, *args, **kwargs):
+        search_query = ProductSearchFilter().get_search_query(request)
+        if not search_query:
+            row_serializer = self.get_row_serializer()
+            if row_serializer is None or isinstance(self.paginator, ProductKeysetPagination):
+                return super().list(request, *args, **kwargs)
+            queryset = row_serializer.values(self.filter_queryset(self.get_queryset()))
+            page = self.paginate_queryset(queryset)
+            return self.get_paginated_response(row_serializer.to_representation(page))
+
+        product_ids, hit = self.get_search_result_ids()
+        search_stats.record(search_query, hit)
+        page_ids = self.paginate_queryset(product_ids)
+        response = self.get_paginated_response(self.serialize_products(page_ids))
+
+        if response.data['count'] == 0:
+            response.data['suggestion'] = did_you_mean(search_query)
+        elif request.query_params.get('highlight') in ('true', '1'):
+            self.add_highlights(response.data['results'], search_query)
+        return response
+
+    def get_search_result_ids(self):
         """
-        Get optimized queryset with select_related and prefetch_related.
-        Applies full-text search if 'q' parameter is provided.
+        Return ``(product_ids, hit)``: the ranked ids for this request's search
+        and filters, and whether they came from the result cache.
         """
-        queryset = super().get_queryset()
 
-        # Full-text search using Postgres search vectors
-        search_query = self.request.query_params.get('q', None)
-        if search_query:
-            # Use search_vector if it exists, otherwise create on-the-fly
-            search_vector = SearchVector('title', weight='A') + \
-                           SearchVector('description', weight='B') + \
-                           SearchVector('sku', weight='C')
-
-            query = SearchQuery(search_query)
-            queryset = queryset.annotate(
-                rank=SearchRank(search_vector, query)
-            ).filter(
-                Q(search_vector=query) |
-                Q(title__icontains=search_query) |
-                Q(description__icontains=search_query) |
-                Q(sku__icontains=search_query)
-            ).order_by('-rank', '-created_at')
+        def ranked_ids():
+            queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+            limit = settings.CATALOG_SEARCH_MAX_RESULTS
+            product_ids = list(queryset.values_list('pk', flat=True)[:limit + 1])
+            if len(product_ids) <= limit:
+                return product_ids
+            return TruncatedList(product_ids[:limit], self.count_search_results())
+
+        language = ProductSearchFilter().get_language(self.request)
+        return get_ranked_ids(self.request.path, self.request.query_params, language, ranked_ids)
+
+    def count_search_results(self):
+        """Count every product matching this request's search and filters."""
+        queryset = self.get_queryset().prefetch_related(None)
+        search_filter = None
+        for backend in self.filter_backends:
+            if issubclass(backend, ProductSearchFilter):
+                search_filter = backend()
+            else:
+                queryset = backend().filter_queryset(self.request, queryset, self)
+        return search_filter.count(self.request, queryset)
+
+    def apply_layout(self, response):
+        """
+        Side-load the brands and categories of a ``compact`` or ``columnar``
+        page, and turn a ``columnar`` page's rows into one list per field.
+        """
+        layout = self.get_layout()
+        if layout is None:
+            return response
+        rows = response.data['results']
+        response.data['included'] = self.get_included(rows)
+        if layout == 'columnar':
+            columns = list(self.get_serializer().fields)
+            if rows:
+                # Highlights are added after serialization
+                columns += [name for name in rows[0] if name not in columns]
+            response.data['results'] = {name: [row.get(name) for row in rows] for name in columns}
+        return response
+
+    def get_included(self, rows):
+        """Serialize each brand and category referenced by ``rows`` once."""
+        serializer_class = self.get_serializer_class()
+        included = {}
+        for name, key in serializer_class.side_loaded_fields.items():
+            if rows and f'{name}_id' not in rows[0]:
+                continue
+            nested = serializer_class._declared_fields[name]
+            ids = {row[f'{name}_id'] for row in rows} - {None}
+            objects = nested.Meta.model.objects.filter(pk__in=ids).order_by('pk') if ids else []
+            context = {'request': self.request, 'format': self.format_kwarg, 'view': self}
+            included[key] = type(nested)(objects, many=True, context=context).data
+        return included
+
+    def get_row_serializer(self):
+        """
+        The serializer compiled to read ``values_list()`` rows (see ``rows``),
+        or None when it is disabled or cannot be compiled for this request.
+        """
+        if not settings.CATALOG_FAST_SERIALIZATION:
+            return None
+        return RowSerializer.compile(self.get_serializer())
 
-        return queryset
+    def get_json_serializer(self):
+        """
+        The serializer compiled to SQL rendering this response's JSON (see
+        ``dbjson``), or None when it is disabled or does not apply.
+        """
+        if not settings.CATALOG_DATABASE_JSON or self.request.accepted_renderer.format != 'json':
+            return None
+        if self.action == 'list':
+            if (
+                self.get_layout() is not None
+                or ProductSearchFilter().get_search_query(self.request)
+                or isinstance(self.paginator, ProductKeysetPagination)
+            ):
+                return None
+        elif self.action == 'retrieve':
+            # No instance to check object permissions on
+            if any(
+                type(permission).has_object_permission is not BasePermission.has_object_permission
+                for permission in self.get_permissions()
+            ):
+                return None
+        else:
+            return None
+        return DatabaseJSONSerializer.compile(self.get_serializer())
+
+    def json_response(self, data):
+        """Respond with ``data`` rendered by ``dbjson.render_json()``."""
+        return HttpResponse(render_json(data), content_type=self.request.accepted_renderer.media_type)
+
+    def serialize_products(self, product_ids):
+        """Serialize the given products, loaded by primary key, in the order given."""
+        row_serializer = self.get_row_serializer()
+        if row_serializer is not None:
+            return row_serializer.serialize_ids(self.get_queryset(), product_ids)
+        products = self.get_queryset().in_bulk(product_ids)
+        page = [products[pk] for pk in product_ids if pk in products]
+        return self.get_serializer(page, many=True).data
+
+    def add_highlights(self, results, search_query):
+        """Attach highlighted fragments to the serialized rows of the current page."""
+        try:
+            max_words = int(self.request.query_params['highlight_words'])
+        except (KeyError, ValueError):
+            max_words = settings.CATALOG_SEARCH_HIGHLIGHT_WORDS
+        max_words = max(5, min(max_words, settings.CATALOG_SEARCH_HIGHLIGHT_MAX_WORDS))
+
+        highlights = get_search_backend().highlight(
+            [item['id'] for item in results],
+            search_query,
+            max_words,
+            ProductSearchFilter().get_language(self.request),
+        )
+        for item in results:
+            item['highlight'] = highlights.get(item['id'])
 
     def get_serializer_class(self):
         """Use detailed serializer for single product, list serializer for collections."""
-        if self.action == 'retrieve':
+        if self.action in ('retrieve', 'batch'):
             return ProductDetailSerializer
         return ProductListSerializer
+
+    @action(detail=False, methods=['get'])
+    def batch(self, request):
+        """
+        The products with the given comma-separated ``slugs`` (or ``ids``),
+        rendered like the detail endpoint, in the order requested.
+
+        Accepts ``fields`` and ``expand`` and up to ``CATALOG_BATCH_MAX_ITEMS``
+        products. Requested products that do not exist or are inactive are
+        listed in ``missing`` rather than failing the request.
+        """
+        field_name, keys = self.get_batch_keys()
+        products = self.get_queryset().in_bulk(keys, field_name=field_name)
+        serializer = self.get_serializer([products[key] for key in keys if key in products], many=True)
+        return Response({
+            'results': serializer.data,
+            'missing': [key for key in keys if key not in products],
+        })
+
+    def get_batch_keys(self):
+        """
+        Return ``(field_name, keys)`` for this batch request: the model field
+        to match and its requested values, in order and without duplicates.
+        """
+        params = [name for name in ('slugs', 'ids') if name in self.request.query_params]
+        if not params:
+            raise ValidationError({'slugs': ['Either slugs or ids is required.']})
+        if len(params) > 1:
+            raise ValidationError({'ids': ['Cannot be combined with slugs.']})
+        param = params[0]
+        values = ','.join(self.request.query_params.getlist(param)).split(',')
+        keys = list(dict.fromkeys(value.strip() for value in values if value.strip()))
+        if len(keys) > settings.CATALOG_BATCH_MAX_ITEMS:
+            raise ValidationError({param: [f'At most {settings.CATALOG_BATCH_MAX_ITEMS} values are allowed.']})
+        if param == 'slugs':
+            return 'slug', keys
+        try:
+            return 'pk', list(dict.fromkeys(int(key) for key in keys))
+        except ValueError:
+            raise ValidationError({'ids': ['Must be comma-separated integers.']})
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Facet counts for the products matching the listing filters.
+
+        Accepts the same filter and search parameters as the list endpoint.
+        Each facet is one grouped query, and the response is cached per filter
+        set until the catalog changes.
+        """
+        filterset = self.filterset_class(request.query_params, queryset=Product.objects.none())
+        if not filterset.is_valid():
+            raise filter_utils.translate_validation(filterset.errors)
+
+        matches = self.get_queryset().prefetch_related(None)
+        for backend in (filters.SearchFilter, ProductSearchFilter):
+            matches = backend().filter_queryset(request, matches, self)
+
+        def products_for(excluded):
+            params = request.query_params.copy()
+            for name in excluded:
+                params.pop(name, None)
+            return self.filterset_class(params, queryset=matches, request=request).qs
+
+        language = ProductSearchFilter().get_language(request)
+        return Response(get_facets(request.query_params, language, products_for))
+
+    @action(detail=False, methods=['get'])
+    def attributes(self, request):
+        """
+        The attribute keys that can be filtered with ``attr.<key>=``, with the
+        number of active products and distinct values of each.
+        """
+        return Response(get_attribute_keys())
+
+    @action(detail=False, methods=['get'], throttle_classes=[SuggestRateThrottle])
+    def suggest(self, request):
+        """
+        Autocomplete product titles, brand names and category names.
+
+        Served from this worker's in-memory prefix index without touching the
+        database, apart from incremental refreshes after catalog writes.
+        """
+        prefix = request.query_params.get('prefix', '').strip()
+        try:
+            limit = int(request.query_params.get('limit', settings.CATALOG_SUGGEST_LIMIT))
+        except ValueError:
+            limit = settings.CATALOG_SUGGEST_LIMIT
+        limit = max(1, min(limit, settings.CATALOG_SUGGEST_MAX_LIMIT))
+
+        results = []
+        if len(prefix) >= settings.CATALOG_SUGGEST_MIN_PREFIX_LENGTH:
+            results = suggestion_index.suggest(prefix, limit)
+        return Response({'prefix': prefix, 'results': results})
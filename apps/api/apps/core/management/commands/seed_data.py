@@ -3,6 +3,7 @@ import random
 from django.core.management.base import BaseCommand
 
 from apps.catalog.models import Brand, Category, Product
+from apps.catalog.spelling import refresh_vocabulary
 
 
 class Command(BaseCommand):
@@ -229,4 +230,5 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS(f'✓ Created {created_count} products'))
         self.stdout.write(self.style.SUCCESS(f'✓ Created {Category.objects.count()} categories'))
         self.stdout.write(self.style.SUCCESS(f'✓ Created {Brand.objects.count()} brands'))
+        self.stdout.write(self.style.SUCCESS(f'✓ Indexed {refresh_vocabulary()} search terms'))
         self.stdout.write(self.style.SUCCESS('Database seeded successfully!'))
@@ -1,11 +1,238 @@
 """Custom pagination classes for the API."""
 
-from rest_framework.pagination import PageNumberPagination
+import hashlib
+import json
+from base64 import b64decode, b64encode
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class TruncatedList(list):
+    """The first items of a longer result list, with the full list's ``total`` length."""
+
+    def __init__(self, items, total):
+        super().__init__(items)
+        self.total = total
+
+
+class CountStrategyPaginator(Paginator):
+    """Django paginator taking its total count from a callable."""
+
+    def __init__(self, object_list, per_page, get_count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._get_count = get_count
+
+    @cached_property
+    def count(self):
+        return self._get_count(self.object_list)
+
+
+def estimate_count(queryset):
+    """Row count estimated by the PostgreSQL planner, without running the query."""
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
 
 
 class StandardResultsPagination(PageNumberPagination):
-    """Standard pagination with configurable page size."""
+    """
+    Standard pagination with configurable page size.
+
+    Responses carry ``count_exact``, false when ``count`` is an estimate or
+    counts more rows than the paginated ``TruncatedList`` holds (its pages
+    only cover the items it holds). By default
+    every count is exact; subclasses for listings that look the same
+    to every user can opt into cheaper counts:
+
+    - ``estimate_count_threshold``: on PostgreSQL, unfiltered listings use
+      the planner's row estimate when it is at least this large (small tables
+      are still counted exactly).
+    - ``count_cache_timeout``: exact counts are cached for this many seconds
+      per endpoint and normalized filter parameters.
+    """
 
     page_size = 20
     page_size_query_param = 'page_size'
     max_page_size = 100  # Allow up to 100 items per page
+    estimate_count_threshold = None
+    count_cache_timeout = None
+    # Parameters that do not change which rows are counted
+    count_ignored_params = frozenset({'ordering', 'format', 'fields', 'expand', 'layout'})
+
+    def django_paginator_class(self, object_list, per_page):
+        return CountStrategyPaginator(object_list, per_page, get_count=self.get_count)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_exact = True
+        self.total_count = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_filter_params(self, request):
+        """Sorted ``(name, value)`` pairs of the parameters that select the counted rows."""
+        ignored = self.count_ignored_params | {self.page_query_param, self.page_size_query_param}
+        return sorted(
+            (name, value)
+            for name, values in request.query_params.lists()
+            if name not in ignored
+            for value in values
+        )
+
+    def get_count_cache_key(self, request, filter_params):
+        digest = hashlib.sha256(f'{request.path}?{urlencode(filter_params)}'.encode()).hexdigest()
+        return f'pagination:count:{digest}'
+
+    def get_count(self, object_list):
+        if isinstance(object_list, TruncatedList) and object_list.total > len(object_list):
+            # Pages only cover the list; the response reports the full total
+            self.count_exact = False
+            self.total_count = object_list.total
+        if not isinstance(object_list, QuerySet):
+            return len(object_list)
+
+        filter_params = self.get_filter_params(self.request)
+        if (
+            self.estimate_count_threshold is not None
+            and not filter_params
+            and connections[object_list.db].vendor == 'postgresql'
+        ):
+            estimate = estimate_count(object_list)
+            if estimate >= self.estimate_count_threshold:
+                self.count_exact = False
+                return estimate
+
+        if self.count_cache_timeout is None:
+            return object_list.count()
+        key = self.get_count_cache_key(self.request, filter_params)
+        count = cache.get(key)
+        if count is None:
+            count = object_list.count()
+            cache.set(key, count, timeout=self.count_cache_timeout)
+        return count
+
+    def get_paginated_response(self, data):
+        count = self.page.paginator.count if self.total_count is None else self.total_count
+        return Response({
+            'count': count,
+            'count_exact': self.count_exact,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count_exact'] = {
+            'type': 'boolean',
+            'description': 'False when count is an estimate or not every counted item can be paged to.',
+        }
+        return response_schema
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Keyset ("seek") pagination over one ordering field plus the primary key.
+
+    The queryset keeps the ordering applied by ``OrderingFilter`` when it is
+    one of ``ordering_fields`` (the first entry is the fallback). The primary
+    key breaks ties in the same direction, and each page starts with a
+    ``WHERE (field, pk) > (last field, last pk)`` condition instead of an
+    OFFSET, so a deep page costs the same as the first one and can be served
+    from an index on the ordering field. No total count is returned.
+
+    Cursors are opaque base64 encoded ``[ordering, value, pk, reverse]``
+    lists; a cursor only applies to the ordering it was issued for.
+    """
+
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering_fields = ('-created_at',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, request, queryset, view):
+        order_by = queryset.query.order_by
+        if len(order_by) == 1 and order_by[0] in self.ordering_fields:
+            return order_by[0]
+        return self.ordering_fields[0]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.field = queryset.model._meta.get_field(self.ordering.lstrip('-'))
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+
+        descending = self.ordering.startswith('-')
+        reverse = self.cursor is not None and self.cursor[2]
+        if reverse:
+            descending = not descending
+        if self.cursor is not None:
+            queryset = queryset.filter(self.seek_condition(descending, *self.cursor[:2]))
+        name = self.field.name
+        queryset = queryset.order_by(*([f'-{name}', '-pk'] if descending else [name, 'pk']))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+        return self.page
+
+    def seek_condition(self, descending, value, pk):
+        """Rows after ``(value, pk)`` in the given direction."""
+        name = self.field.name
+        after, from_ = ('lt', 'lte') if descending else ('gt', 'gte')
+        # The redundant range on the ordering field lets the database seek the index
+        return Q(**{f'{name}__{from_}': value}) & (
+            Q(**{f'{name}__{after}': value}) | Q(**{name: value, f'pk__{after}': pk})
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, obj, reverse):
+        value = self.field.value_to_string(obj)
+        token = json.dumps([self.ordering, value, obj.pk, reverse], separators=(',', ':'))
+        encoded = b64encode(token.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        """Return ``(value, pk, reverse)`` from the request's cursor, or None on the first page."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            ordering, value, pk, reverse = json.loads(b64decode(encoded.encode(), validate=True))
+            if ordering != self.ordering:
+                raise ValueError(ordering)
+            # Only scalars can be compared against the ordering column
+            if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+                raise ValueError(value)
+            value = self.field.to_python(value)
+            if value is None:
+                raise ValueError(value)
+            return value, int(pk), bool(reverse)
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
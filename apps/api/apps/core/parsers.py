@@ -0,0 +1,39 @@
+"""
+JSON parser built on orjson.
+
+``ORJSONParser`` is a drop-in ``JSONParser``. Bodies orjson rejects (not
+UTF-8, NaN or infinity constants when ``STRICT_JSON`` is off, malformed
+JSON) go through ``JSONParser``, which either parses them as before or
+raises the same ``ParseError``. So do bodies with runs of 19 or more digits,
+which may hold integers orjson would read as floats beyond 64 bits.
+"""
+
+import io
+import re
+
+import orjson
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from .renderers import ORJSONRenderer
+
+# Digit runs long enough to exceed a 64-bit integer (or part of a long decimal
+# or string, which only costs the slower parser)
+_LONG_NUMBER_RE = re.compile(rb'\d{19}')
+
+
+class ORJSONParser(JSONParser):
+    """``JSONParser`` decoding with orjson."""
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        body = stream.read()
+        if encoding.lower().replace('-', '') == 'utf8' and not _LONG_NUMBER_RE.search(body):
+            try:
+                return orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass
+        return super().parse(io.BytesIO(body), media_type, parser_context)
@@ -0,0 +1,123 @@
+"""
+JSON renderers built on orjson.
+
+``ORJSONRenderer`` is a drop-in ``JSONRenderer``: orjson encodes datetimes,
+UUIDs and numpy arrays itself and hands the rest (``Decimal``, lazy
+strings, querysets) to DRF's encoder. Output that orjson cannot produce
+(indented or ASCII-only JSON, integers over 64 bits) falls back to
+``JSONRenderer``. Unlike the stdlib encoder, NaN and infinities render as
+null.
+
+``StreamingJSONRenderer`` can also produce its output in chunks; views
+with ``StreamingResponseMixin`` send large lists as a streaming response
+instead of building the whole body first.
+"""
+
+import orjson
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_UTC_Z
+
+
+class ORJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` encoding with orjson where the output is the same."""
+
+    def supports(self, accepted_media_type, renderer_context):
+        """Whether orjson can produce the JSON requested for this response."""
+        return (
+            self.compact
+            and not self.ensure_ascii
+            and self.get_indent(accepted_media_type, renderer_context or {}) is None
+        )
+
+    def dumps(self, data):
+        content = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        # Escaped like JSONRenderer, for JSON that is a strict JavaScript subset
+        return content.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or not self.supports(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            return self.dumps(data)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class StreamingJSONRenderer(ORJSONRenderer):
+    """
+    ``ORJSONRenderer`` that can render lists of at least ``streaming_threshold``
+    items, at the top level or as values of a top-level object, in chunks of
+    ``chunk_size`` items (see ``iter_render()``).
+    """
+
+    streaming_threshold = 100
+    chunk_size = 50
+
+    def _is_large_list(self, value):
+        return isinstance(value, (list, tuple)) and len(value) >= self.streaming_threshold
+
+    def should_stream(self, data, accepted_media_type=None, renderer_context=None):
+        """Whether ``data`` holds a list large enough to stream."""
+        if not self.supports(accepted_media_type, renderer_context):
+            return False
+        if isinstance(data, dict):
+            return all(isinstance(key, str) for key in data) and any(map(self._is_large_list, data.values()))
+        return self._is_large_list(data)
+
+    def iter_render(self, data, accepted_media_type=None, renderer_context=None):
+        """Yield ``render()``'s output in chunks, one per ``chunk_size`` list items."""
+        if not self.should_stream(data, accepted_media_type, renderer_context):
+            yield self.render(data, accepted_media_type, renderer_context)
+        elif isinstance(data, dict):
+            yield b'{'
+            for index, (key, value) in enumerate(data.items()):
+                member = (b',' if index else b'') + self.dumps(key) + b':'
+                if self._is_large_list(value):
+                    yield member
+                    yield from self._iter_list(value, accepted_media_type, renderer_context)
+                else:
+                    yield member + self._render_value(value, accepted_media_type, renderer_context)
+            yield b'}'
+        else:
+            yield from self._iter_list(data, accepted_media_type, renderer_context)
+
+    def _render_value(self, value, accepted_media_type, renderer_context):
+        # A list item, so that None renders as null rather than b''
+        return self.render([value], accepted_media_type, renderer_context)[1:-1]
+
+    def _iter_list(self, items, accepted_media_type, renderer_context):
+        yield b'['
+        for start in range(0, len(items), self.chunk_size):
+            chunk = self.render(list(items[start:start + self.chunk_size]), accepted_media_type, renderer_context)
+            yield (b',' if start else b'') + chunk[1:-1]
+        yield b']'
+
+
+class StreamingResponseMixin:
+    """
+    Send responses whose ``StreamingJSONRenderer`` would stream them (see
+    ``StreamingJSONRenderer.should_stream()``) as ``StreamingHttpResponse``.
+    """
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        renderer = getattr(response, 'accepted_renderer', None)
+        if (
+            not isinstance(response, Response)
+            or not isinstance(renderer, StreamingJSONRenderer)
+            or not renderer.should_stream(response.data, response.accepted_media_type, response.renderer_context)
+        ):
+            return response
+        streaming_response = StreamingHttpResponse(
+            renderer.iter_render(response.data, response.accepted_media_type, response.renderer_context),
+            status=response.status_code,
+            content_type=renderer.media_type,
+        )
+        for header, value in response.items():
+            if header.lower() != 'content-type':
+                streaming_response[header] = value
+        streaming_response.cookies = response.cookies
+        return streaming_response
@@ -1,4 +1,9 @@
 from rest_framework import permissions, viewsets
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.renderers import BrowsableAPIRenderer
+
+from apps.core.parsers import ORJSONParser
+from apps.core.renderers import ORJSONRenderer
 
 from .models import CartItem, Order
 from .serializers import CartItemSerializer, OrderSerializer
@@ -9,6 +14,8 @@ class CartItemViewSet(viewsets.ModelViewSet):
 
     serializer_class = CartItemSerializer
     permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [ORJSONParser, FormParser, MultiPartParser]
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
 
     def get_queryset(self):
         return CartItem.objects.filter(user=self.request.user)
@@ -37,6 +37,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     # Third party
     'rest_framework',
     'rest_framework_simplejwt',
@@ -133,6 +134,11 @@ PASSWORD_HASHERS = [
 
 # Internationalization
 LANGUAGE_CODE = 'en-us'
+# Catalog languages; product search picks the matching stored search vector
+LANGUAGES = [
+    ('en', 'English'),
+    ('tr', 'Turkish'),
+]
 TIME_ZONE = 'UTC'
 USE_I18N = True
 USE_TZ = True
@@ -216,3 +222,70 @@ CACHES = {
         'LOCATION': REDIS_URL,
     }
 }
+
+# Catalog search
+# Search engine: "postgres", "bm25" or a dotted path to a SearchBackend; empty
+# picks "postgres" on PostgreSQL and the in-process BM25 engine elsewhere
+CATALOG_SEARCH_BACKEND = env('CATALOG_SEARCH_BACKEND', default='')
+CATALOG_SEARCH_INDEX_PATH = env(
+    'CATALOG_SEARCH_INDEX_PATH', default=str(BASE_DIR / 'var' / 'search_index.npz')
+)
+# Product writes the BM25 index keeps in its append log before compacting it
+# into a new base file; larger batches rebuild the index instead
+CATALOG_SEARCH_INDEX_COMPACT_THRESHOLD = env.int('CATALOG_SEARCH_INDEX_COMPACT_THRESHOLD', default=1000)
+CATALOG_SEARCH_MAX_RESULTS = 1000
+CATALOG_SEARCH_BM25_K1 = 1.2
+CATALOG_SEARCH_BM25_B = 0.75
+# Match mode for ?q= searches: "fulltext" (search vector only) or "fuzzy"
+# (adds trigram/substring matches on PostgreSQL, prefix matches with BM25)
+CATALOG_SEARCH_MATCH_MODE = env('CATALOG_SEARCH_MATCH_MODE', default='fuzzy')
+CATALOG_SEARCH_TRIGRAM_THRESHOLD = env.float('CATALOG_SEARCH_TRIGRAM_THRESHOLD', default=0.3)
+if DATABASES['default']['ENGINE'].rsplit('.', 1)[-1] in ('postgresql', 'postgis'):
+    # Threshold of the % and %> trigram operators, set by the server when the
+    # connection starts rather than with an extra query per connection
+    database_options = DATABASES['default'].setdefault('OPTIONS', {})
+    database_options['options'] = ' '.join(filter(None, [
+        database_options.get('options'),
+        f'-c pg_trgm.similarity_threshold={CATALOG_SEARCH_TRIGRAM_THRESHOLD}',
+        f'-c pg_trgm.word_similarity_threshold={CATALOG_SEARCH_TRIGRAM_THRESHOLD}',
+    ]))
+# Description fragment length (in words) for ?highlight=true, and its upper bound
+CATALOG_SEARCH_HIGHLIGHT_WORDS = 35
+CATALOG_SEARCH_HIGHLIGHT_MAX_WORDS = 100
+# Seconds a ranked result id list stays cached (catalog writes invalidate it
+# earlier), and how often each worker writes its per-query hit/miss counts
+CATALOG_SEARCH_CACHE_TTL = env.int('CATALOG_SEARCH_CACHE_TTL', default=300)
+CATALOG_SEARCH_STATS_FLUSH_INTERVAL = env.int('CATALOG_SEARCH_STATS_FLUSH_INTERVAL', default=60)
+
+# Product listing counts: unfiltered listings report the planner's estimate
+# (PostgreSQL) once it reaches the threshold; filtered counts are cached
+CATALOG_ESTIMATED_COUNT_THRESHOLD = env.int('CATALOG_ESTIMATED_COUNT_THRESHOLD', default=10000)
+CATALOG_COUNT_CACHE_TTL = env.int('CATALOG_COUNT_CACHE_TTL', default=60)
+
+# Serialize product list pages from values_list() rows instead of model
+# instances (same output, see apps.catalog.rows)
+CATALOG_FAST_SERIALIZATION = env.bool('CATALOG_FAST_SERIALIZATION', default=True)
+# Have the database render product list pages and details as JSON text
+# (apps.catalog.dbjson); plain JSON responses only, other requests fall back
+CATALOG_DATABASE_JSON = env.bool('CATALOG_DATABASE_JSON', default=False)
+
+# Most products fetched by one /api/v1/products/batch/ request
+CATALOG_BATCH_MAX_ITEMS = env.int('CATALOG_BATCH_MAX_ITEMS', default=50)
+
+# Product facets (/api/v1/products/facets/)
+CATALOG_FACET_PRICE_BUCKETS = 10
+CATALOG_FACETS_CACHE_TTL = env.int('CATALOG_FACETS_CACHE_TTL', default=300)
+
+# Product autocomplete (/api/v1/products/suggest/)
+# Score multipliers per suggestion type; brand and category scores also grow
+# with their number of active products
+CATALOG_SUGGEST_WEIGHTS = {
+    'product': 1.0,
+    'brand': 2.0,
+    'category': 1.5,
+}
+CATALOG_SUGGEST_LIMIT = 8
+CATALOG_SUGGEST_MAX_LIMIT = 20
+CATALOG_SUGGEST_MIN_PREFIX_LENGTH = 2
+# Seconds between checks of the shared change log by each worker
+CATALOG_SUGGEST_SYNC_INTERVAL = env.int('CATALOG_SUGGEST_SYNC_INTERVAL', default=5)
@@ -1,12 +1,13 @@
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from rest_framework.test import APIClient
 
 User = get_user_model()
 
 
 @pytest.fixture(autouse=True)
-def configure_test_settings(settings):
+def configure_test_settings(settings, tmp_path):
     """Configure DRF settings for tests."""
     # Disable throttling and use custom pagination for tests
     settings.REST_FRAMEWORK = {
@@ -24,6 +25,15 @@ def configure_test_settings(settings):
         'DEFAULT_THROTTLE_CLASSES': [],
         'DEFAULT_THROTTLE_RATES': {},
     }
+    # Keep cache state per-process and independent of a running Redis
+    settings.CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    }
+    cache.clear()
+    # Write search statistics immediately so none carry over between tests
+    settings.CATALOG_SEARCH_STATS_FLUSH_INTERVAL = 0
+    # Fresh BM25 index per test, built from that test's data on first search
+    settings.CATALOG_SEARCH_INDEX_PATH = str(tmp_path / 'search_index.npz')
     yield
 
 
@@ -1,6 +1,9 @@
+from decimal import Decimal
+
 import pytest
+from django.core.cache import cache
 
-from apps.catalog.models import Brand, Category, Product
+from apps.catalog.models import Brand, Category, Media, Product
 
 
 @pytest.mark.django_db
@@ -74,3 +77,686 @@ def test_product_detail_endpoint(api_client):
     assert response.status_code == 200
     assert response.data['title'] == 'Product Detail'
     assert response.data['sku'] == 'PROD-002'
+
+
+@pytest.fixture
+def suggestions(settings):
+    from apps.catalog.suggest import suggestion_index
+
+    settings.CATALOG_SUGGEST_SYNC_INTERVAL = 0
+    suggestion_index.invalidate()
+    return suggestion_index
+
+
+@pytest.mark.django_db
+def test_product_suggest_endpoint(api_client, suggestions):
+    """Test autocomplete matches word prefixes across products, brands and categories."""
+    brand = Brand.objects.create(name='Wirecraft', slug='wirecraft')
+    category = Category.objects.create(name='Audio', slug='audio')
+    Product.objects.create(
+        title='Gaming Headset Wireless',
+        slug='gaming-headset-wireless',
+        sku='SUG-001',
+        description='Description',
+        price=59.99,
+        brand=brand,
+        category=category,
+    )
+    Product.objects.create(
+        title='Desk Lamp', slug='desk-lamp', sku='SUG-002', description='Description', price=19.99
+    )
+
+    response = api_client.get('/api/v1/products/suggest/?prefix=WIR')
+    assert response.status_code == 200
+    results = response.data['results']
+    assert {(item['type'], item['text']) for item in results} == {
+        ('product', 'Gaming Headset Wireless'),
+        ('brand', 'Wirecraft'),
+    }
+    # Brands outweigh single products by default
+    assert results[0]['type'] == 'brand'
+
+    response = api_client.get('/api/v1/products/suggest/?prefix=w')
+    assert response.data['results'] == []
+
+
+@pytest.mark.django_db
+def test_product_suggest_refreshes_incrementally(
+    api_client, suggestions, django_capture_on_commit_callbacks
+):
+    """Test the prefix index picks up writes through the published change log."""
+    product = Product.objects.create(
+        title='Desk Lamp', slug='desk-lamp', sku='SUG-003', description='Description', price=19.99
+    )
+    assert len(api_client.get('/api/v1/products/suggest/?prefix=desk').data['results']) == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        product.title = 'Floor Lamp'
+        product.save()
+    assert api_client.get('/api/v1/products/suggest/?prefix=desk').data['results'] == []
+    assert len(api_client.get('/api/v1/products/suggest/?prefix=floor').data['results']) == 1
+
+    # Queryset updates publish the updated products rather than a full rebuild
+    from apps.catalog.suggest import CHANGE_CACHE_KEY, PRODUCT, VERSION_CACHE_KEY
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Product.objects.filter(pk=product.pk).update(slug='floor-lamp', stock=3)
+    assert cache.get(CHANGE_CACHE_KEY.format(cache.get(VERSION_CACHE_KEY))) == [(PRODUCT, product.pk)]
+    results = api_client.get('/api/v1/products/suggest/?prefix=floor').data['results']
+    assert [item['slug'] for item in results] == ['floor-lamp']
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Product.objects.filter(pk=product.pk).update(is_active=False)
+    assert api_client.get('/api/v1/products/suggest/?prefix=floor').data['results'] == []
+
+
+@pytest.mark.django_db
+def test_product_suggest_survives_version_counter_reset(api_client, suggestions):
+    from apps.catalog.suggest import VERSION_CACHE_KEY
+
+    product = Product.objects.create(
+        title='Desk Lamp', slug='desk-lamp', sku='SUG-004', description='Description', price=19.99
+    )
+    assert len(api_client.get('/api/v1/products/suggest/?prefix=desk').data['results']) == 1
+
+    # Evicted, then recreated below the worker's version by another process
+    for version in (None, 1):
+        cache.delete(VERSION_CACHE_KEY)
+        if version is not None:
+            cache.set(VERSION_CACHE_KEY, version, timeout=None)
+        Product.objects.filter(pk=product.pk).update(title=f'Floor Lamp {version}')
+        results = api_client.get('/api/v1/products/suggest/?prefix=floor').data['results']
+        assert [item['text'] for item in results] == [f'Floor Lamp {version}']
+
+
+@pytest.mark.django_db
+def test_suggestion_rebuild_matches_incremental_index():
+    from apps.catalog.suggest import BRAND, PRODUCT, SuggestionIndex
+
+    brand = Brand.objects.create(name='Lumen Works', slug='lumen')
+    products = Product.objects.bulk_create([
+        Product(title=title, slug=f'sug-{i}', sku=f'SUG-R{i}', description='D', price=10, brand=brand)
+        for i, title in enumerate(['Desk Lamp', 'Lamp Shade', 'Floor  lamp'])
+    ])
+    rebuilt, incremental = SuggestionIndex(), SuggestionIndex()
+    rebuilt.rebuild()
+    incremental.apply([(BRAND, brand.pk), *((PRODUCT, product.pk) for product in products)])
+
+    assert rebuilt._keys == incremental._keys == sorted(incremental._keys)
+    assert rebuilt._entries == incremental._entries
+    assert [entry['text'] for entry in rebuilt.lookup('lam', 10)] == ['Desk Lamp', 'Lamp Shade', 'Floor  lamp']
+
+
+@pytest.mark.django_db
+def test_product_list_cursor_pagination(api_client):
+    import json
+    from base64 import b64encode
+
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    Product.objects.bulk_create([
+        Product(title=f'Product {i}', slug=f'cur-{i}', sku=f'CUR-{i}', description='D', price=price)
+        for i, price in enumerate([30, 10, 20, 10, 50])
+    ])
+
+    url = '/api/v1/products/?ordering=price&page_size=2&cursor='
+    seen = []
+    while url:
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(url)
+        assert response.status_code == 200
+        assert 'count' not in response.data
+        assert not any('OFFSET' in query['sql'] or 'COUNT(' in query['sql'] for query in queries)
+        seen.append([item['slug'] for item in response.data['results']])
+        url = response.data['next']
+    assert seen == [['cur-1', 'cur-3'], ['cur-2', 'cur-0'], ['cur-4']]
+
+    response = api_client.get(api_client.get(
+        '/api/v1/products/?ordering=price&page_size=2&cursor='
+    ).data['next'])
+    previous = api_client.get(response.data['previous'])
+    assert [item['slug'] for item in previous.data['results']] == ['cur-1', 'cur-3']
+    assert previous.data['previous'] is None
+
+    # Default -created_at ordering; ties on the timestamp are broken by id
+    url, slugs = '/api/v1/products/?page_size=2&cursor=', []
+    while url:
+        response = api_client.get(url)
+        slugs += [item['slug'] for item in response.data['results']]
+        url = response.data['next']
+    assert slugs == list(Product.objects.order_by('-created_at', '-pk').values_list('slug', flat=True))
+
+    assert api_client.get('/api/v1/products/?ordering=-price&cursor=bogus').status_code == 404
+    for token in (
+        ['-created_at', None, 1, False],
+        ['-created_at', '', 1, False],
+        ['-created_at', {'a': 1}, 1, False],
+        ['price', [10], 1, False],
+    ):
+        cursor = b64encode(json.dumps(token).encode()).decode()
+        params = {'ordering': token[0], 'cursor': cursor}
+        assert api_client.get('/api/v1/products/', params).status_code == 404
+
+
+@pytest.mark.django_db
+def test_product_list_count_cached_per_filter_set(
+    api_client, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    Product.objects.bulk_create([
+        Product(title=f'Product {i}', slug=f'count-{i}', sku=f'CNT-{i}', description='D', price=10 * i)
+        for i in range(1, 6)
+    ])
+
+    response = api_client.get('/api/v1/products/?min_price=20&ordering=price')
+    assert (response.data['count'], response.data['count_exact']) == (4, True)
+    # Same filters on another page and ordering: the page query only
+    with django_assert_num_queries(1):
+        response = api_client.get('/api/v1/products/?ordering=-price&min_price=20&page_size=2&page=2')
+    assert response.data['count'] == 4
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Product.objects.create(title='New', slug='count-new', sku='CNT-N', description='D', price=99)
+    assert api_client.get('/api/v1/products/?min_price=20').data['count'] == 5
+
+
+@pytest.mark.django_db
+def test_product_facets_exclude_own_filter(api_client, django_assert_max_num_queries):
+    acme = Brand.objects.create(name='Acme', slug='acme')
+    zeta = Brand.objects.create(name='Zeta', slug='zeta')
+    shoes = Category.objects.create(name='Shoes', slug='shoes')
+    Product.objects.bulk_create([
+        Product(title='Red shoe', slug='f-1', sku='F-1', description='D', price=10, brand=acme,
+                category=shoes, attributes={'color': 'Red', 'size': 'M'}),
+        Product(title='Blue shoe', slug='f-2', sku='F-2', description='D', price=30, brand=acme,
+                category=shoes, attributes={'color': ' BLUE'}),
+        Product(title='Blue hat', slug='f-3', sku='F-3', description='D', price=110, brand=zeta,
+                attributes={'color': 'Blue'}),
+    ])
+
+    url = '/api/v1/products/facets/?brand=acme&color=blue'
+    # One grouped query per facet, plus the price bounds and the brand slug map
+    with django_assert_max_num_queries(8):
+        facets = api_client.get(url).data
+
+    # The brand facet ignores ?brand= but applies ?color=
+    assert [(b['slug'], b['count']) for b in facets['brands']] == [('acme', 1), ('zeta', 1)]
+    # The color facet ignores ?color= but applies ?brand=, and lists the
+    # canonical values the attribute filters match
+    assert [(c['value'], c['count']) for c in facets['attributes']['color']] == [('blue', 1), ('red', 1)]
+    assert facets['categories'] == [{'id': shoes.pk, 'slug': 'shoes', 'name': 'Shoes', 'count': 1}]
+    price = facets['price']
+    assert (price['min'], price['max']) == ('30.00', '30.00')
+    assert sum(bucket['count'] for bucket in price['buckets']) == 1
+
+    with django_assert_max_num_queries(0):
+        assert api_client.get(url).data == facets
+    assert api_client.get('/api/v1/products/facets/?min_price=abc').status_code == 400
+
+
+@pytest.mark.django_db
+def test_category_and_brand_products_are_paginated_and_filtered(api_client, django_assert_max_num_queries):
+    acme = Brand.objects.create(name='Acme', slug='acme')
+    root = Category.objects.create(name='Electronics', slug='electronics')
+    child = Category.objects.create(name='Laptops', slug='laptops', parent=root)
+    leaf = Category.objects.create(name='Gaming', slug='gaming', parent=child)
+    Product.objects.bulk_create([
+        Product(title=f'P{i}', slug=f'sub-{i}', sku=f'SUB-{i}', description='D', price=10 * (i + 1),
+                brand=acme, category=category)
+        for i, category in enumerate([root, child, leaf, leaf])
+    ])
+
+    response = api_client.get('/api/v1/categories/electronics/products/')
+    assert [item['slug'] for item in response.data['results']] == ['sub-0']
+
+    url = '/api/v1/categories/electronics/products/?include_descendants=true&ordering=-price&page_size=2'
+    with django_assert_max_num_queries(4):
+        response = api_client.get(url)
+    assert response.data['count'] == 4
+    assert [item['slug'] for item in response.data['results']] == ['sub-3', 'sub-2']
+
+    response = api_client.get('/api/v1/categories/laptops/products/?include_descendants=1&min_price=30')
+    assert sorted(item['slug'] for item in response.data['results']) == ['sub-2', 'sub-3']
+
+    response = api_client.get('/api/v1/brands/acme/products/?ordering=price&page_size=3')
+    assert response.data['count'] == 4
+    assert [item['slug'] for item in response.data['results']] == ['sub-0', 'sub-1', 'sub-2']
+
+
+@pytest.mark.django_db
+def test_category_materialized_path_follows_moves(django_assert_num_queries):
+    from django.core.exceptions import ValidationError
+
+    electronics = Category.objects.create(name='Electronics', slug='electronics')
+    laptops = Category.objects.create(name='Laptops', slug='laptops', parent=electronics)
+    gaming = Category.objects.create(name='Gaming', slug='gaming', parent=laptops)
+    computers = Category.objects.create(name='Computers', slug='computers')
+    assert (gaming.path, gaming.depth) == (f'{electronics.pk}/{laptops.pk}/{gaming.pk}/', 2)
+
+    gaming = Category.objects.get(pk=gaming.pk)
+    with django_assert_num_queries(1):
+        assert gaming.get_ancestors() == [laptops, electronics]
+    with django_assert_num_queries(1):
+        assert gaming.get_breadcrumbs() == [electronics, laptops, gaming]
+    with django_assert_num_queries(1):
+        assert electronics.get_descendants() == [laptops, gaming]
+
+    # Moving a subtree rewrites it in a bounded number of statements: the
+    # row itself, the path reads, one UPDATE for the subtree and two
+    # recounting the old and new ancestors' product counts, inside a savepoint
+    laptops = Category.objects.get(pk=laptops.pk)
+    laptops.parent = computers
+    with django_assert_num_queries(8):
+        laptops.save()
+    gaming.refresh_from_db()
+    assert (gaming.path, gaming.level) == (f'{computers.pk}/{laptops.pk}/{gaming.pk}/', 2)
+    assert electronics.get_descendants() == []
+
+    laptops.parent = gaming
+    with pytest.raises(ValidationError):
+        laptops.save()
+
+
+@pytest.mark.django_db
+def test_stale_category_save_keeps_moved_path():
+    a = Category.objects.create(name='A', slug='a')
+    b = Category.objects.create(name='B', slug='b', parent=a)
+    c = Category.objects.create(name='C', slug='c', parent=b)
+    d = Category.objects.create(name='D', slug='d')
+    stale = Category.objects.get(pk=c.pk)
+
+    b.parent = d
+    b.save()
+    stale.description = 'Edited'
+    stale.save()
+
+    c.refresh_from_db()
+    assert (c.path, c.depth, c.description) == (f'{d.pk}/{b.pk}/{c.pk}/', 2, 'Edited')
+    assert d.get_descendants() == [b, c]
+
+    # Moving the stale instance starts from the stored path, not its own
+    stale.parent = a
+    stale.save()
+    d.refresh_from_db()
+    assert stale.path == f'{a.pk}/{c.pk}/'
+    assert d.get_descendants() == [b]
+
+
+@pytest.mark.django_db
+def test_category_tree_endpoint_is_cached_until_categories_change(
+    api_client, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    electronics = Category.objects.create(name='Electronics', slug='electronics')
+    laptops = Category.objects.create(name='Laptops', slug='laptops', parent=electronics)
+    Category.objects.create(name='Audio', slug='audio', parent=electronics)
+    Product.objects.create(title='Laptop', slug='laptop', sku='TREE-1', description='D', price=1, category=laptops)
+
+    with django_assert_num_queries(1):
+        tree = api_client.get('/api/v1/categories/tree/').data
+    assert [node['slug'] for node in tree] == ['electronics']
+    assert [child['slug'] for child in tree[0]['children']] == ['audio', 'laptops']
+    with django_assert_num_queries(0):
+        assert api_client.get('/api/v1/categories/tree/').data == tree
+
+    counted = api_client.get('/api/v1/categories/tree/?counts=true').data
+    assert counted[0]['product_count'] == 1
+    assert [child['product_count'] for child in counted[0]['children']] == [0, 1]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Category.objects.create(name='Phones', slug='phones', parent=electronics)
+    tree = api_client.get('/api/v1/categories/tree/').data
+    assert [child['slug'] for child in tree[0]['children']] == ['audio', 'laptops', 'phones']
+
+
+@pytest.mark.django_db
+def test_category_and_brand_product_counts_follow_product_writes():
+    import io
+
+    from django.core.management import call_command
+
+    electronics = Category.objects.create(name='Electronics', slug='electronics')
+    laptops = Category.objects.create(name='Laptops', slug='laptops', parent=electronics)
+    phones = Category.objects.create(name='Phones', slug='phones', parent=electronics)
+    acme = Brand.objects.create(name='Acme', slug='acme')
+    other = Brand.objects.create(name='Other', slug='other')
+
+    def counts():
+        rows = Category.objects.values_list('slug', 'product_count', 'subtree_product_count')
+        return {slug: (direct, subtree) for slug, direct, subtree in rows}, dict(
+            Brand.objects.values_list('slug', 'product_count')
+        )
+
+    laptop = Product.objects.create(
+        title='Laptop', slug='laptop', sku='L-1', price=10, category=laptops, brand=acme
+    )
+    Product.objects.create(title='Phone', slug='phone', sku='P-1', price=10, category=phones, brand=acme)
+    Product.objects.create(
+        title='Old phone', slug='old-phone', sku='P-2', price=10, category=phones, is_active=False
+    )
+    assert counts() == (
+        {'electronics': (0, 2), 'laptops': (1, 1), 'phones': (1, 1)},
+        {'acme': 2, 'other': 0},
+    )
+
+    # Saving a moved product shifts it between the old and new counts
+    laptop = Product.objects.get(pk=laptop.pk)
+    laptop.category, laptop.brand = phones, other
+    laptop.save()
+    assert counts() == (
+        {'electronics': (0, 2), 'laptops': (0, 0), 'phones': (2, 2)},
+        {'acme': 1, 'other': 1},
+    )
+
+    # Bulk writes recount the groups they touched
+    Product.objects.filter(category=phones).update(is_active=False)
+    assert counts()[0]['electronics'] == (0, 0)
+    Product.objects.filter(slug='old-phone').update(is_active=True, category=laptops)
+    assert counts()[0] == {'electronics': (0, 1), 'laptops': (1, 1), 'phones': (0, 0)}
+
+    Product.objects.get(slug='old-phone').delete()
+    laptops.parent = phones
+    laptops.save()
+    Product.objects.create(title='Tablet', slug='tablet', sku='T-1', price=10, category=laptops)
+    assert counts()[0] == {'electronics': (0, 1), 'laptops': (1, 1), 'phones': (0, 1)}
+
+    # Saving a stale instance does not write its loaded counts back
+    stale = Category.objects.get(pk=electronics.pk)
+    Product.objects.create(title='Watch', slug='watch', sku='W-1', price=10, category=electronics)
+    stale.description = 'Gadgets'
+    stale.save()
+    assert counts()[0]['electronics'] == (1, 2)
+
+    phones.delete()
+    assert counts()[0] == {'electronics': (1, 1)}
+
+    # Drift from writes that bypass the ORM is repaired by the reconcile command
+    Category.objects.update(product_count=7)
+    Brand.objects.update(product_count=7)
+    call_command('reconcile_product_counts', stdout=io.StringIO())
+    assert counts() == ({'electronics': (1, 1)}, {'acme': 0, 'other': 0})
+
+
+@pytest.mark.django_db
+def test_brand_and_category_filters_accept_several_slugs(api_client, django_capture_on_commit_callbacks):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    acme = Brand.objects.create(name='Acme', slug='acme')
+    zeta = Brand.objects.create(name='Zeta', slug='zeta')
+    other = Brand.objects.create(name='Other', slug='other')
+    shoes = Category.objects.create(name='Shoes', slug='shoes')
+    for i, brand in enumerate([acme, zeta, other]):
+        Product.objects.create(
+            title=f'Shoe {i}', slug=f'shoe-{i}', sku=f'S-{i}', price=10, brand=brand, category=shoes
+        )
+
+    def slugs(url):
+        return sorted(product['slug'] for product in api_client.get(url).data['results'])
+
+    assert slugs('/api/v1/products/?brand=acme,ZETA') == ['shoe-0', 'shoe-1']
+    assert slugs('/api/v1/products/?brand=acme,missing&category=shoes') == ['shoe-0']
+    assert slugs('/api/v1/products/?brand=missing') == []
+
+    # The slugs resolve to ids from the cached maps; products are filtered on
+    # the foreign key columns instead of the joined slugs
+    with CaptureQueriesContext(connection) as queries:
+        assert slugs('/api/v1/products/?brand=zeta,other&category=shoes') == ['shoe-1', 'shoe-2']
+    sql = ' '.join(query['sql'] for query in queries)
+    assert f'"brand_id" IN ({zeta.pk}, {other.pk})' in sql
+    assert 'UPPER' not in sql
+    assert 'FROM "brands"' not in sql and 'FROM "categories"' not in sql
+
+    # A new brand is found before and after the map is rebuilt
+    with django_capture_on_commit_callbacks(execute=True):
+        new = Brand.objects.create(name='New', slug='new')
+    Product.objects.create(title='Shoe 3', slug='shoe-3', sku='S-3', price=10, brand=new)
+    assert slugs('/api/v1/products/?brand=new') == ['shoe-3']
+
+
+@pytest.mark.django_db
+def test_products_filter_on_any_attribute(api_client, django_capture_on_commit_callbacks):
+    from apps.catalog.models import ProductAttribute
+
+    shirt = Product.objects.create(
+        title='Shirt', slug='shirt', sku='A-1', price=10,
+        attributes={'color': 'Navy  Blue', 'material': 'Cotton', 'tags': ['Summer', 'Sale'],
+                    'weight': {'value': 200, 'unit': 'g'}},
+    )
+    Product.objects.bulk_create([
+        Product(title='Scarf', slug='scarf', sku='A-2', description='D', price=10,
+                attributes={'color': 'Red', 'material': 'Linen', 'organic': True}),
+        Product(title='Hat', slug='hat', sku='A-3', description='D', price=10, attributes={'color': 'Red'}),
+    ])
+
+    def slugs(query):
+        return sorted(product['slug'] for product in api_client.get(f'/api/v1/products/?{query}').data['results'])
+
+    assert slugs('attr.color=navy blue') == ['shirt']
+    assert slugs('attr.Material=cotton,LINEN') == ['scarf', 'shirt']
+    assert slugs('attr.color=red&attr.material=linen') == ['scarf']
+    assert slugs('attr.tags=sale') == ['shirt']
+    assert slugs('attr.organic=true') == ['scarf']
+    assert slugs('color=red') == ['hat', 'scarf']
+    assert slugs('attr.color=green') == []
+    # The color and material shorthands match substrings, attr.<key> whole values
+    assert slugs('color=BLUE') == ['shirt']
+    assert slugs('attr.color=blue') == []
+    assert slugs('material=lin,cot&color=navy') == ['shirt']
+
+    # Lookup rows follow attribute writes
+    with django_capture_on_commit_callbacks(execute=True):
+        shirt.attributes['color'] = 'Green'
+        shirt.save()
+        Product.objects.filter(slug='hat').update(attributes={'color': 'Green'})
+    assert slugs('attr.color=green') == ['hat', 'shirt']
+    assert not ProductAttribute.objects.filter(key='color', value='navy blue').exists()
+
+    keys = {row['key']: row for row in api_client.get('/api/v1/products/attributes/').data}
+    assert sorted(keys) == ['color', 'material', 'organic', 'tags']
+    assert (keys['color']['products'], keys['color']['values']) == (3, 2)
+
+
+@pytest.mark.django_db
+def test_products_filter_on_normalized_weight_and_dimensions(api_client):
+    from django.core.exceptions import ValidationError
+
+    from apps.catalog.models import validate_product_attributes
+
+    def dims(width, unit):
+        return {'width': width, 'height': 10, 'depth': 1, 'unit': unit}
+
+    bag = Product.objects.create(
+        title='Bag', slug='bag', sku='M-1', price=10,
+        attributes={'weight': {'value': 1.5, 'unit': 'kg'}, 'dimensions': dims(35, 'cm')},
+    )
+    Product.objects.bulk_create([
+        Product(title='Crate', slug='crate', sku='M-2', description='D', price=10,
+                attributes={'weight': {'value': 2500, 'unit': 'g'}, 'dimensions': dims(0.5, 'm')}),
+        Product(title='Pouch', slug='pouch', sku='M-3', description='D', price=10,
+                attributes={'weight': {'value': 8, 'unit': 'oz'}, 'dimensions': dims(12, 'in')}),
+        Product(title='Plain', slug='plain', sku='M-4', description='D', price=10),
+    ])
+    assert (bag.weight_grams, bag.width_cm) == (1500, 35)
+
+    def slugs(query):
+        return sorted(product['slug'] for product in api_client.get(f'/api/v1/products/?{query}').data['results'])
+
+    assert slugs('weight_max=2000') == ['bag', 'pouch']
+    assert slugs('weight_min=2000') == ['crate']
+    assert slugs('width_max=40') == ['bag', 'pouch']
+    assert slugs('width_min=30.48&width_max=30.48') == ['pouch']
+
+    Product.objects.filter(slug='crate').update(attributes={'weight': {'value': 1, 'unit': 'lb'}})
+    assert Product.objects.get(slug='crate').weight_grams == Decimal('453.592')
+
+    with pytest.raises(ValidationError):
+        validate_product_attributes({'weight': {'value': 1, 'unit': 'stone'}})
+    with pytest.raises(ValidationError):
+        validate_product_attributes({'dimensions': {**dims(-1, 'cm')}})
+
+
+@pytest.mark.django_db
+def test_sparse_fieldsets_trim_output_and_sql(api_client):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    acme = Brand.objects.create(name='Acme', slug='acme')
+    shoes = Category.objects.create(name='Shoes', slug='shoes')
+    product = Product.objects.create(
+        title='Shoe', slug='shoe', sku='SF-1', description='Long text', price=10, brand=acme, category=shoes
+    )
+    product.media.create(url='https://example.com/shoe.jpg')
+
+    with CaptureQueriesContext(connection) as queries:
+        results = api_client.get('/api/v1/products/?fields=title,slug,price').data['results']
+    assert results == [{'id': product.pk, 'title': 'Shoe', 'slug': 'shoe', 'price': '10.00'}]
+    page_sql = queries[-1]['sql']
+    assert 'JOIN' not in page_sql and '"description"' not in page_sql and 'search_vector' not in page_sql
+
+    # Relations left out of expand are rendered as ids without joins
+    with CaptureQueriesContext(connection) as queries:
+        result = api_client.get('/api/v1/products/?fields=brand,category&expand=category').data['results'][0]
+    assert result['brand'] == acme.pk and result['category']['slug'] == 'shoes'
+    assert '"brands"' not in queries[-1]['sql'] and '"categories"' in queries[-1]['sql']
+
+    detail = api_client.get('/api/v1/products/shoe/?fields=media,in_stock&expand=').data
+    assert detail == {'id': product.pk, 'media': [product.media.get().pk], 'in_stock': False}
+    assert set(api_client.get('/api/v1/brands/acme/?fields=name').data) == {'id', 'name'}
+    # Requested fields only apply to the endpoint's own serializer
+    response = api_client.get('/api/v1/brands/acme/products/?fields=title')
+    assert response.data['results'] == [{'id': product.pk, 'title': 'Shoe'}]
+
+    response = api_client.get('/api/v1/products/?fields=title,bogus&expand=owner')
+    assert response.status_code == 400
+    assert set(response.data) == {'fields', 'expand'}
+
+
+@pytest.mark.django_db
+def test_compact_and_columnar_list_layouts_side_load_relations(api_client, django_assert_num_queries):
+    acme = Brand.objects.create(name='Acme', slug='acme')
+    shoes = Category.objects.create(name='Shoes', slug='shoes')
+    Product.objects.bulk_create([
+        Product(title=f'Shoe {i}', slug=f'shoe-{i}', sku=f'LY-{i}', description='D', price=10,
+                brand=acme if i < 3 else None, category=shoes)
+        for i in range(4)
+    ])
+    api_client.get('/api/v1/products/?layout=compact')  # cache the count
+
+    # The page query, then one query per side-loaded relation
+    with django_assert_num_queries(3):
+        data = api_client.get('/api/v1/products/?layout=compact&ordering=title').data
+    assert [(row['slug'], row['brand_id'], row['category_id']) for row in data['results']] == [
+        ('shoe-0', acme.pk, shoes.pk), ('shoe-1', acme.pk, shoes.pk),
+        ('shoe-2', acme.pk, shoes.pk), ('shoe-3', None, shoes.pk),
+    ]
+    assert 'brand' not in data['results'][0]
+    assert [brand['slug'] for brand in data['included']['brands']] == ['acme']
+    assert [category['slug'] for category in data['included']['categories']] == ['shoes']
+
+    data = api_client.get('/api/v1/products/?layout=columnar&ordering=title&fields=title,brand').data
+    assert data['results'] == {
+        'id': [row['id'] for row in Product.objects.order_by('title').values('id')],
+        'title': ['Shoe 0', 'Shoe 1', 'Shoe 2', 'Shoe 3'],
+        'brand_id': [acme.pk, acme.pk, acme.pk, None],
+    }
+    assert list(data['included']) == ['brands']
+    assert api_client.get('/api/v1/products/?layout=rows').status_code == 400
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query', [
+    '',
+    'ordering=price&page_size=3',
+    'q=shoe',
+    'fields=title,in_stock,brand&expand=',
+    'layout=compact&fields=slug,category',
+])
+def test_row_serializer_matches_product_list_serializer(api_client, settings, query):
+    acme = Brand.objects.create(name='Acme', slug='acme', logo_url='https://example.com/a.png')
+    parent = Category.objects.create(name='Shoes', slug='shoes')
+    boots = Category.objects.create(name='Boots', slug='boots', parent=parent)
+    Product.objects.bulk_create([
+        Product(title=f'Shoe {i}', slug=f'shoe-{i}', sku=f'RS-{i}', description='Shoe', price=f'{i}9.5',
+                stock=i % 2, brand=acme if i % 3 else None, category=boots if i % 2 else parent)
+        for i in range(5)
+    ])
+
+    settings.CATALOG_FAST_SERIALIZATION = False
+    expected = api_client.get(f'/api/v1/products/?{query}')
+    settings.CATALOG_FAST_SERIALIZATION = True
+    actual = api_client.get(f'/api/v1/products/?{query}')
+    assert actual.status_code == 200
+    assert actual.content == expected.content
+
+
+@pytest.mark.django_db
+def test_product_batch(api_client, settings, django_assert_num_queries):
+    acme = Brand.objects.create(name='Acme', slug='acme')
+    products = Product.objects.bulk_create([
+        Product(title=f'Mug {i}', slug=f'mug-{i}', sku=f'BT-{i}', description='Mug', price='5.00',
+                brand=acme, is_active=i != 3)
+        for i in range(4)
+    ])
+    Media.objects.create(product=products[2], url='https://example.com/mug.png')
+
+    # The products with brand and category, then their media
+    with django_assert_num_queries(2):
+        data = api_client.get('/api/v1/products/batch/?slugs=mug-2,missing,mug-0,mug-3,mug-2').data
+    assert [product['slug'] for product in data['results']] == ['mug-2', 'mug-0']
+    assert data['results'][0] == api_client.get('/api/v1/products/mug-2/').data
+    assert data['missing'] == ['missing', 'mug-3']
+
+    data = api_client.get(f'/api/v1/products/batch/?ids={products[1].pk},0&fields=title&expand=').data
+    assert data == {'results': [{'id': products[1].pk, 'title': 'Mug 1'}], 'missing': [0]}
+
+    settings.CATALOG_BATCH_MAX_ITEMS = 2
+    for query in ('slugs=a,b,c', 'ids=1,x', 'slugs=a&ids=1', ''):
+        assert api_client.get(f'/api/v1/products/batch/?{query}').status_code == 400
+
+
+@pytest.mark.django_db
+def test_primary_image_follows_media_writes(django_assert_num_queries):
+    lamp = Product.objects.create(title='Lamp', slug='lamp', sku='PI-1', description='Lamp', price='10.00')
+    desk = Product.objects.create(title='Desk', slug='desk', sku='PI-2', description='Desk', price='90.00')
+    back = Media.objects.create(product=lamp, url='https://example.com/back.png', order=2)
+    assert Product.objects.get(pk=lamp.pk).primary_image_id == back.pk
+    front = Media.objects.create(product=lamp, url='https://example.com/front.png', order=1)
+    assert Product.objects.get(pk=lamp.pk).primary_image_id == front.pk
+
+    front.order = 3
+    front.save(update_fields=['order'])
+    assert Product.objects.get(pk=lamp.pk).primary_image_id == back.pk
+    # Fields that do not decide the order leave the products alone
+    with django_assert_num_queries(1):
+        front.save(update_fields=['alt_text'])
+
+    back = Media.objects.get(pk=back.pk)
+    back.product = desk
+    back.save()
+    assert Product.objects.get(pk=lamp.pk).primary_image_id == front.pk
+    assert Product.objects.get(pk=desk.pk).primary_image_id == back.pk
+
+    front.delete()
+    assert Product.objects.get(pk=lamp.pk).primary_image_id is None
+
+
+@pytest.mark.django_db
+def test_product_list_primary_image(api_client, django_assert_num_queries):
+    Product.objects.bulk_create([
+        Product(title=f'Lamp {i}', slug=f'lamp-{i}', sku=f'PL-{i}', description='Lamp', price='10.00')
+        for i in range(3)
+    ])
+    # The count and the page query, with or without images
+    with django_assert_num_queries(2):
+        api_client.get('/api/v1/products/?ordering=title')
+    for product in Product.objects.all():
+        Media.objects.create(product=product, url=f'https://example.com/{product.slug}.png', alt_text='Lamp', order=1)
+
+    cache.clear()
+    with django_assert_num_queries(2):
+        results = api_client.get('/api/v1/products/?ordering=title').data['results']
+    assert results[0]['primary_image'] == {
+        'url': 'https://example.com/lamp-0.png', 'alt_text': 'Lamp', 'width': None, 'height': None,
+    }
+    results = api_client.get('/api/v1/products/?fields=title,primary_image&expand=').data['results']
+    assert {row['primary_image'] for row in results} == set(Media.objects.values_list('pk', flat=True))
@@ -0,0 +1,88 @@
+"""Parity of the database-rendered JSON responses with the DRF serializers."""
+
+import datetime
+
+import pytest
+
+from apps.catalog.models import Brand, Category, Media, Product
+
+
+@pytest.fixture
+def catalog(db):
+    acme = Brand.objects.create(name='Acmé "Shoes"', slug='acme', logo_url='https://example.com/a.png')
+    shoes = Category.objects.create(name='Shoes', slug='shoes', description='All shoes')
+    boots = Category.objects.create(name='Boots', slug='boots', parent=shoes)
+    products = Product.objects.bulk_create([
+        Product(
+            title=f'Shoe {i} – “quoted”', slug=f'shoe-{i}', sku=f'DJ-{i}', description='Line\nbreak',
+            price=['20', '9.5', '0.99', '1234.56'][i], stock=i % 2,
+            brand=acme if i % 3 else None, category=boots if i % 2 else shoes,
+            attributes={'color': 'Red', 'dimensions': {'width': 10, 'height': 2.5, 'unit': 'cm'}} if i else {},
+        )
+        for i in range(4)
+    ])
+    # Datetimes without microseconds render without a fraction
+    Product.objects.filter(pk=products[0].pk).update(created_at=datetime.datetime(2024, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc))
+    Media.objects.bulk_create([
+        Media(product=products[1], url='https://example.com/2.png', order=2),
+        Media(product=products[1], url='https://example.com/1.png', alt_text='Front', width=640, height=480, order=1),
+    ])
+    Product.objects.filter(pk=products[1].pk).update_primary_images()
+    return products
+
+
+def get_both(client, settings, url):
+    settings.CATALOG_DATABASE_JSON = False
+    expected = client.get(url)
+    settings.CATALOG_DATABASE_JSON = True
+    actual = client.get(url)
+    assert actual.status_code == expected.status_code
+    return expected.json(), actual.json()
+
+
+@pytest.mark.parametrize('query', [
+    '',
+    'ordering=price&page_size=2&page=2',
+    'fields=title,price,in_stock,brand&expand=',
+    'expand=category',
+    'brand=acme&in_stock=true',
+    'color=red',
+    'q=shoe',
+    'layout=compact',
+    'cursor=',
+])
+def test_product_list_matches_serializer(api_client, settings, catalog, query):
+    expected, actual = get_both(api_client, settings, f'/api/v1/products/?{query}')
+    assert actual == expected
+
+
+@pytest.mark.parametrize('url', [
+    '/api/v1/categories/shoes/products/',
+    '/api/v1/brands/acme/products/?ordering=-price',
+])
+def test_sub_listings_match_serializer(api_client, settings, catalog, url):
+    expected, actual = get_both(api_client, settings, url)
+    assert actual == expected
+
+
+@pytest.mark.parametrize('slug', ['shoe-0', 'shoe-1', 'shoe-2', 'missing'])
+@pytest.mark.parametrize('query', ['', 'fields=title,media,attributes&expand=', 'expand=media'])
+def test_product_detail_matches_serializer(api_client, settings, catalog, slug, query):
+    expected, actual = get_both(api_client, settings, f'/api/v1/products/{slug}/?{query}')
+    assert actual == expected
+
+
+def test_database_renders_the_json(api_client, settings, catalog, django_assert_num_queries):
+    settings.CATALOG_DATABASE_JSON = True
+
+    # Count and page, each product's JSON built by the page query
+    with django_assert_num_queries(2) as context:
+        response = api_client.get('/api/v1/products/')
+    assert 'JSON_OBJECT' in context.captured_queries[-1]['sql']
+    assert response['Content-Type'] == 'application/json'
+    assert response.json()['count'] == 4
+
+    # Media are aggregated by a subquery rather than prefetched
+    with django_assert_num_queries(1):
+        response = api_client.get('/api/v1/products/shoe-1/')
+    assert [item['order'] for item in response.json()['media']] == [1, 2]
@@ -0,0 +1,90 @@
+import datetime
+import io
+import uuid
+from decimal import Decimal
+
+import pytest
+import zoneinfo
+from django.http import StreamingHttpResponse
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from apps.catalog.models import Product
+from apps.core.parsers import ORJSONParser
+from apps.core.renderers import ORJSONRenderer, StreamingJSONRenderer
+
+PAYLOAD = {
+    'price': Decimal('19.90'),
+    'created_at': datetime.datetime(2024, 5, 6, 7, 8, 9, 123456, tzinfo=datetime.timezone.utc),
+    'local': datetime.datetime(2024, 5, 6, 7, 8, 9, tzinfo=zoneinfo.ZoneInfo('Europe/Istanbul')),
+    'day': datetime.date(2024, 5, 6),
+    'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'title': 'Çay “bardağı” ',
+    'label': gettext_lazy('Products'),
+    'counts': {1: 2, 'x': None},
+    'items': [1, 2.5, True, None, ('a', 'b')],
+}
+
+
+@pytest.mark.parametrize('data', [PAYLOAD, [PAYLOAD, {}], 'text', 2**70, None])
+def test_orjson_renderer_matches_json_renderer(data):
+    assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+def test_orjson_renderer_falls_back_for_indented_json():
+    media_type = 'application/json; indent=4'
+    assert ORJSONRenderer().render(PAYLOAD, media_type) == JSONRenderer().render(PAYLOAD, media_type)
+
+
+@pytest.mark.parametrize('body', [
+    b'{"a": [1, 2.5, "\\u00e7"], "b": null}',
+    b'[]',
+    b'"x"',
+    b'{"id": 123456789012345678901234567890, "min": -9999999999999999999}',
+])
+def test_orjson_parser_matches_json_parser(body):
+    assert ORJSONParser().parse(io.BytesIO(body)) == JSONParser().parse(io.BytesIO(body))
+
+
+def test_orjson_parser_falls_back_to_json_parser():
+    body = '{"title": "çay"}'.encode('latin-1')
+    assert ORJSONParser().parse(io.BytesIO(body), parser_context={'encoding': 'latin-1'}) == {'title': 'çay'}
+
+    with pytest.raises(ParseError) as error:
+        ORJSONParser().parse(io.BytesIO(b'{"a": NaN}'))
+    with pytest.raises(ParseError) as expected:
+        JSONParser().parse(io.BytesIO(b'{"a": NaN}'))
+    assert str(error.value) == str(expected.value)
+
+
+def test_streaming_renderer_chunks_large_lists(monkeypatch):
+    monkeypatch.setattr(StreamingJSONRenderer, 'streaming_threshold', 3)
+    monkeypatch.setattr(StreamingJSONRenderer, 'chunk_size', 2)
+    renderer = StreamingJSONRenderer()
+    data = {'count': 5, 'next': None, 'results': [PAYLOAD, {}, [], None, 'x']}
+
+    chunks = list(renderer.iter_render(data))
+    assert b''.join(chunks) == JSONRenderer().render(data)
+    # Braces, one chunk per member and the list brackets around three chunks of items
+    assert len(chunks) == 10
+    assert list(renderer.iter_render({'results': [1, 2]})) == [b'{"results":[1,2]}']
+
+
+@pytest.mark.django_db
+def test_large_product_pages_are_streamed(api_client, monkeypatch):
+    monkeypatch.setattr(StreamingJSONRenderer, 'streaming_threshold', 3)
+    Product.objects.bulk_create([
+        Product(title=f'Lamp {i}', slug=f'lamp-{i}', sku=f'SR-{i}', description='Lamp', price='10.00')
+        for i in range(4)
+    ])
+
+    assert not api_client.get('/api/v1/products/?page_size=2').streaming
+    response = api_client.get('/api/v1/products/?page_size=4')
+    assert isinstance(response, StreamingHttpResponse)
+    assert response['Content-Type'] == 'application/json'
+
+    content = b''.join(response.streaming_content)
+    monkeypatch.setattr(StreamingJSONRenderer, 'streaming_threshold', 100)
+    assert content == api_client.get('/api/v1/products/?page_size=4').content
@@ -0,0 +1,342 @@
+"""Tests for the stored product search vector and the ``q`` search path."""
+
+import pytest
+from django.db import connection
+
+from apps.catalog.models import Brand, Category, Product, SearchTerm
+from apps.catalog.spelling import did_you_mean, refresh_vocabulary
+
+requires_postgres = pytest.mark.skipif(
+    connection.vendor != 'postgresql', reason='Full-text search requires PostgreSQL'
+)
+
+
+def make_product(index, **kwargs):
+    defaults = {
+        'title': f'Product {index}',
+        'slug': f'product-{index}',
+        'sku': f'SKU-{str(index).zfill(3)}',
+        'description': 'Description',
+        'price': 10,
+    }
+    defaults.update(kwargs)
+    return Product(**defaults)
+
+
+def vector_lexemes(product):
+    product.refresh_from_db(fields=['search_vector'])
+    return str(product.search_vector)
+
+
+@requires_postgres
+@pytest.mark.django_db
+def test_search_vector_populated_on_save_with_brand_and_category():
+    brand = Brand.objects.create(name='Acoustica', slug='acoustica')
+    category = Category.objects.create(name='Headphones', slug='headphones')
+    product = make_product(1, title='Wireless Cans', brand=brand, category=category)
+    product.save()
+
+    lexemes = vector_lexemes(product)
+    assert 'wireless' in lexemes
+    assert 'acoustica' in lexemes
+    assert 'headphon' in lexemes
+
+
+@requires_postgres
+@pytest.mark.django_db
+def test_search_vector_populated_on_bulk_and_queryset_update():
+    Product.objects.bulk_create([make_product(i) for i in range(3)])
+    assert not Product.objects.filter(search_vector__isnull=True).exists()
+
+    Product.objects.filter(slug='product-1').update(title='Mechanical Keyboard')
+    assert 'keyboard' in vector_lexemes(Product.objects.get(slug='product-1'))
+
+
+@requires_postgres
+@pytest.mark.django_db
+def test_search_vector_follows_brand_rename():
+    brand = Brand.objects.create(name='Oldname', slug='brand')
+    product = make_product(1, brand=brand)
+    product.save()
+
+    brand.name = 'Newname'
+    brand.save()
+
+    lexemes = vector_lexemes(product)
+    assert 'newnam' in lexemes
+    assert 'oldnam' not in lexemes
+
+
+@pytest.mark.django_db
+def test_only_renames_reindex_brand_and_category_products(monkeypatch):
+    from apps.catalog import signals
+
+    reindexed = []
+    monkeypatch.setattr(signals, 'reindex_products', reindexed.append)
+    brand = Brand.objects.create(name='Sonora', slug='sonora')
+    category = Category.objects.create(name='Audio', slug='audio')
+    make_product(1, brand=brand, category=category).save()
+    reindexed.clear()
+
+    for instance in (Brand.objects.get(pk=brand.pk), Category.objects.get(pk=category.pk)):
+        instance.description = 'Edited'
+        instance.save()
+        assert reindexed == []
+        instance.name = 'Renamed'
+        instance.save()
+        assert len(reindexed) == 1
+        instance.save()
+        assert len(reindexed) == 1
+        reindexed.clear()
+
+
+@requires_postgres
+@pytest.mark.django_db
+def test_search_matches_brand_name_and_orders_by_rank(api_client):
+    brand = Brand.objects.create(name='Sonora', slug='sonora')
+    make_product(1, title='Sonora Speaker', brand=brand).save()
+    make_product(2, title='Plain Speaker', brand=brand).save()
+    make_product(3, title='Desk Lamp').save()
+
+    response = api_client.get('/api/v1/products/?q=sonora')
+
+    assert response.status_code == 200
+    titles = [item['title'] for item in response.data['results']]
+    assert titles == ['Sonora Speaker', 'Plain Speaker']
+
+
+@requires_postgres
+@pytest.mark.django_db
+def test_search_uses_vector_for_request_language(api_client):
+    make_product(1, title='Kablosuz Kulaklık', description='Bluetooth kulaklıklar').save()
+
+    response = api_client.get(
+        '/api/v1/products/?q=kulaklıkları&match=fulltext', HTTP_ACCEPT_LANGUAGE='tr-TR,tr;q=0.9'
+    )
+    assert [item['title'] for item in response.data['results']] == ['Kablosuz Kulaklık']
+    response = api_client.get('/api/v1/products/?q=kulaklıkları&match=fulltext')
+    assert response.data['count'] == 0
+
+
+def test_search_language_from_accept_language_header():
+    from django.test import RequestFactory
+
+    from apps.catalog.search import ProductSearchFilter
+
+    factory = RequestFactory()
+    search_filter = ProductSearchFilter()
+    assert search_filter.get_language(factory.get('/', HTTP_ACCEPT_LANGUAGE='tr-TR,tr;q=0.9')) == 'tr'
+    assert search_filter.get_language(factory.get('/', HTTP_ACCEPT_LANGUAGE='de-DE')) == 'en'
+    assert search_filter.get_language(factory.get('/')) == 'en'
+
+
+@pytest.mark.django_db
+def test_trigram_contains_lookup_matches_case_insensitive_substring():
+    make_product(1, title='Wireless Headphones').save()
+    make_product(2, title='Desk Lamp').save()
+
+    matches = Product.objects.filter(title__trigram_contains='HEADPHONE')
+
+    assert [p.title for p in matches] == ['Wireless Headphones']
+
+
+@requires_postgres
+@pytest.mark.django_db
+def test_fuzzy_search_tolerates_misspelling(api_client):
+    make_product(1, title='Wireless Headphones').save()
+    make_product(2, title='Desk Lamp').save()
+
+    response = api_client.get('/api/v1/products/?q=headfones')
+    assert [item['title'] for item in response.data['results']] == ['Wireless Headphones']
+
+    response = api_client.get('/api/v1/products/?q=headfones&match=fulltext')
+    assert response.data['results'] == []
+
+
+@pytest.mark.django_db
+def test_refresh_vocabulary_and_did_you_mean():
+    brand = Brand.objects.create(name='Acoustica', slug='acoustica')
+    make_product(1, title='Wireless Headphones', description='Noise cancelling', brand=brand).save()
+    make_product(2, title='Hidden Keyboard', is_active=False).save()
+
+    assert refresh_vocabulary() == SearchTerm.objects.count()
+    assert SearchTerm.objects.filter(word='headphones', ndoc=1).exists()
+    assert SearchTerm.objects.filter(word='acoustica').exists()
+    assert not SearchTerm.objects.filter(word='keyboard').exists()
+
+    assert did_you_mean('wireles headfones') == 'wireless headphones'
+    assert did_you_mean('wireless headphones') is None
+
+
+@requires_postgres
+@pytest.mark.django_db
+def test_zero_result_search_returns_suggestion(api_client):
+    make_product(1, title='Wireless Headphones').save()
+    refresh_vocabulary()
+
+    response = api_client.get('/api/v1/products/?q=wirelss&match=fulltext')
+
+    assert response.data['count'] == 0
+    assert response.data['suggestion'] == 'wireless'
+
+
+def test_bm25_index_ranks_and_updates_incrementally(tmp_path):
+    from apps.catalog.search.bm25 import BM25Index
+
+    index = BM25Index()
+    index.build([
+        (1, {'wireless': 3.0, 'headphones': 3.0}),
+        (2, {'wireless': 1.0, 'speaker': 3.0, 'portable': 3.0}),
+        (3, {'desk': 3.0, 'lamp': 3.0}),
+    ])
+    ids, _scores = index.search(['wireless'])
+    assert ids.tolist() == [1, 2]
+    assert index.search(['wireless', 'speaker'])[0].tolist() == [2]
+    assert index.search(['wireless', 'speaker'], require_all=False)[0].tolist() == [2, 1]
+    assert index.search(['head'], expand_prefixes=True)[0].tolist() == [1]
+
+    index.add(4, {'wireless': 3.0, 'keyboard': 3.0})
+    index.remove(1)
+    assert sorted(index.search(['wireless'])[0].tolist()) == [2, 4]
+
+    path = tmp_path / 'index.npz'
+    index.save(path)
+    loaded = type(index).load(path)
+    assert len(loaded) == 3
+    assert sorted(loaded.search(['wireless'])[0].tolist()) == [2, 4]
+
+
+@pytest.mark.django_db
+def test_bm25_backend_search_endpoint(api_client, settings):
+    settings.CATALOG_SEARCH_BACKEND = 'bm25'
+    brand = Brand.objects.create(name='Sonora', slug='sonora')
+    make_product(1, title='Sonora Speaker', brand=brand).save()
+    make_product(2, title='Plain Speaker', brand=brand).save()
+    make_product(3, title='Desk Lamp').save()
+
+    response = api_client.get('/api/v1/products/?q=sonora')
+    assert [item['title'] for item in response.data['results']] == ['Sonora Speaker', 'Plain Speaker']
+
+    response = api_client.get('/api/v1/products/?q=speak&ordering=title')
+    assert [item['title'] for item in response.data['results']] == ['Plain Speaker', 'Sonora Speaker']
+
+
+@pytest.mark.django_db
+def test_bm25_backend_logs_writes_until_compaction(settings):
+    from apps.catalog.search.bm25 import BM25SearchBackend
+
+    settings.CATALOG_SEARCH_INDEX_COMPACT_THRESHOLD = 3
+    writer, reader = BM25SearchBackend(), BM25SearchBackend()
+    lamp = make_product(1, title='Desk Lamp')
+    lamp.save()
+    lamp_pk = lamp.pk
+    writer.rebuild()
+    assert reader.get_index().search(['lamp'])[0].tolist() == [lamp_pk]
+    base_mtime = writer._mtime(writer.path)
+
+    # Single writes go to the log; other workers apply it without reloading
+    speaker = make_product(2, title='Lamp Speaker')
+    speaker.save()
+    writer.index_products([speaker.pk])
+    lamp.delete()
+    writer.index_products([lamp_pk])
+    assert writer._mtime(writer.path) == base_mtime
+    assert reader.get_index().search(['lamp'])[0].tolist() == [speaker.pk]
+
+    # The third entry compacts the index into a new base file and log
+    Product.objects.filter(pk=speaker.pk).update(title='Floor Lamp')
+    writer.index_products([speaker.pk])
+    assert writer._mtime(writer.path) != base_mtime
+    assert writer.log_path.read_text() == f'{writer.get_index().generation}\n'
+    assert reader.get_index().search(['floor'])[0].tolist() == [speaker.pk]
+    assert len(reader.get_index()) == 1
+
+
+def test_mark_words_escapes_and_windows_fragment():
+    from apps.catalog.search.highlight import mark_words, render
+
+    assert render(mark_words('Wireless <b>Headphones</b>', 'headphone')) == (
+        'Wireless &lt;b&gt;<mark>Headphones</mark>&lt;/b&gt;'
+    )
+    text = ' '.join(f'word{i}' for i in range(20)) + ' target ' + ' '.join(f'w{i}' for i in range(20))
+    fragment = render(mark_words(text, 'target', max_words=8))
+    assert fragment == 'word18 word19 <mark>target</mark> w0 w1 w2 w3 w4'
+
+
+@pytest.mark.django_db
+def test_search_highlight_only_for_current_page(api_client):
+    for i in range(3):
+        make_product(i, title=f'Wireless Speaker {i}', description='A wireless speaker for travel').save()
+
+    response = api_client.get('/api/v1/products/?q=wireless&highlight=true&page_size=2')
+
+    results = response.data['results']
+    assert len(results) == 2
+    assert results[0]['highlight']['title'].startswith('<mark>Wireless</mark>')
+    assert '<mark>wireless</mark>' in results[0]['highlight']['description']
+    assert 'highlight' not in api_client.get('/api/v1/products/?q=wireless').data['results'][0]
+
+
+@pytest.mark.django_db
+def test_search_pages_served_from_cached_ranked_ids(api_client, django_capture_on_commit_callbacks):
+    from apps.catalog.models import SearchQueryStat
+
+    for i in range(3):
+        make_product(i, title=f'Wireless Speaker {i}').save()
+
+    first = api_client.get('/api/v1/products/?q=Wireless&page_size=2')
+    second = api_client.get('/api/v1/products/?q=wireless++&page_size=2&page=2')
+    assert first.data['count'] == second.data['count'] == 3
+    ids = [item['id'] for item in first.data['results'] + second.data['results']]
+    assert len(set(ids)) == 3
+
+    stat = SearchQueryStat.objects.get(query='wireless')
+    assert (stat.hits, stat.misses) == (1, 1)
+
+    # A catalog write invalidates the cached list
+    with django_capture_on_commit_callbacks(execute=True):
+        make_product(9, title='Wireless Mouse').save()
+    assert api_client.get('/api/v1/products/?q=wireless').data['count'] == 4
+    stat.refresh_from_db()
+    assert (stat.hits, stat.misses) == (1, 2)
+
+
+@pytest.mark.django_db
+def test_truncated_search_results_report_inexact_count(api_client, settings):
+    settings.CATALOG_SEARCH_MAX_RESULTS = 2
+    for i in range(5):
+        make_product(i, title=f'Desk Lamp {i}').save()
+
+    for _request in range(2):
+        response = api_client.get('/api/v1/products/?q=lamp')
+        assert (response.data['count'], response.data['count_exact']) == (5, False)
+        assert len(response.data['results']) == 2
+        assert response.data['next'] is None
+
+    # Pages only cover the ranked ids that are kept
+    response = api_client.get('/api/v1/products/?q=lamp&page_size=1')
+    assert response.data['count'] == 5
+    assert api_client.get(response.data['next']).data['next'] is None
+    assert api_client.get('/api/v1/products/?q=lamp&page_size=1&page=3').status_code == 404
+
+    response = api_client.get('/api/v1/products/?q=lamp 1&match=fulltext')
+    assert (response.data['count'], response.data['count_exact']) == (1, True)
+
+
+@pytest.mark.django_db
+def test_warm_search_cache_command(api_client):
+    from django.core.management import call_command
+
+    from apps.catalog.models import SearchQueryStat
+
+    make_product(1, title='Desk Lamp').save()
+    SearchQueryStat.objects.create(query='lamp', misses=5)
+    SearchQueryStat.objects.create(query='chair', misses=1)
+
+    call_command('warm_search_cache', top=1)
+
+    assert api_client.get('/api/v1/products/?q=lamp').data['count'] == 1
+    api_client.get('/api/v1/products/?q=lamp', HTTP_ACCEPT_LANGUAGE='tr')
+    assert SearchQueryStat.objects.get(query='lamp').hits == 2
+    api_client.get('/api/v1/products/?q=chair')
+    assert SearchQueryStat.objects.get(query='chair').misses == 2